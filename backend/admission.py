@@ -0,0 +1,136 @@
+"""
+admission.py — Contrôle d'admission des appels sortants vers Kimi
+
+Au plus `limit` appels en cours par processus ; au-delà, les appels attendent
+dans une file bornée (`queue_max` places) au plus `max_wait` secondes. Une file
+pleine ou une attente trop longue lève Overloaded, transformée en 429 +
+Retry-After : en pic de charge, on sert bien moins de requêtes plutôt que de
+les laisser toutes expirer.
+"""
+import math
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+import instrumentation
+
+KIMI_MAX_CONCURRENCY = max(1, int(os.environ.get("KIMI_MAX_CONCURRENCY", "6")))
+KIMI_QUEUE_MAX       = max(0, int(os.environ.get("KIMI_QUEUE_MAX", str(4 * KIMI_MAX_CONCURRENCY))))
+KIMI_QUEUE_TIMEOUT   = float(os.environ.get("KIMI_QUEUE_TIMEOUT", "30"))
+
+# Poids de la dernière mesure dans la moyenne glissante de durée d'un appel
+_EWMA_ALPHA = 0.2
+
+
+class Overloaded(RuntimeError):
+    """Capacité d'appels Kimi dépassée ; retry_after = délai conseillé au client (secondes)."""
+
+    def __init__(self, message: str, retry_after: float = 1):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionController:
+    """Limite de concurrence + file d'attente bornée dans le temps (thread-safe)."""
+
+    def __init__(self, limit: int = KIMI_MAX_CONCURRENCY, queue_max: int = KIMI_QUEUE_MAX,
+                 max_wait: float = KIMI_QUEUE_TIMEOUT, name: str = "kimi"):
+        self.limit = limit
+        self.queue_max = queue_max
+        self.max_wait = max_wait
+        self.name = name
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        # Compteurs cumulés du processus
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_avg = None            # durée moyenne d'un appel (s), moyenne glissante
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    @contextmanager
+    def slot(self):
+        """Tient une place d'appel ; le dict produit contient l'attente en file (« queue_wait »)."""
+        wait = self.acquire()
+        started = time.perf_counter()
+        try:
+            yield {"queue_wait": wait}
+        finally:
+            self.release(time.perf_counter() - started)
+
+    def acquire(self) -> float:
+        """Attend une place ; retourne le temps passé en file ou lève Overloaded."""
+        with self._cond:
+            if self.active < self.limit:
+                self.active += 1
+                self.admitted += 1
+                return 0.0
+            if self.waiting >= self.queue_max:
+                self.rejected += 1
+                self._emit("rejected")
+                raise Overloaded("Trop de requêtes en cours vers l'API Kimi, réessayez plus tard.",
+                                 self.retry_after())
+            self.waiting += 1
+            self._emit("queued")
+            started = time.perf_counter()
+            deadline = started + self.max_wait
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0 or (not self._cond.wait(remaining) and self.active >= self.limit):
+                        self.timed_out += 1
+                        self._emit("timed_out", queue_wait=time.perf_counter() - started)
+                        raise Overloaded("Attente trop longue pour l'API Kimi, réessayez plus tard.",
+                                         self.retry_after())
+            finally:
+                self.waiting -= 1
+                self._emit("dequeued")
+            wait = time.perf_counter() - started
+            self.active += 1
+            self.admitted += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            return wait
+
+    def release(self, held: float = None):
+        with self._cond:
+            self.active -= 1
+            if held is not None:
+                self.hold_avg = held if self.hold_avg is None else \
+                    (1 - _EWMA_ALPHA) * self.hold_avg + _EWMA_ALPHA * held
+            self._cond.notify()
+
+    def saturated(self) -> bool:
+        """File d'attente pleine : une nouvelle conversion serait rejetée (429 immédiat)."""
+        return self.active >= self.limit and self.waiting >= self.queue_max
+
+    def retry_after(self) -> float:
+        """Délai estimé avant qu'une place se libère pour un nouvel arrivant."""
+        hold = self.hold_avg or 5.0
+        return hold * (self.waiting + 1) / self.limit
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "queue_depth": self.waiting,
+                "queue_max": self.queue_max,
+                "max_wait": self.max_wait,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "wait_avg": round(self.wait_total / self.admitted, 4) if self.admitted else 0.0,
+                "wait_max": round(self.wait_max, 4),
+                "call_avg": round(self.hold_avg, 4) if self.hold_avg is not None else None,
+            }
+
+    def _emit(self, outcome: str, **fields):
+        instrumentation.emit("admission_" + outcome, name=self.name, queue_depth=self.waiting, **fields)
+
+
+kimi_admission = AdmissionController()
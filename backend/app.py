@@ -1,108 +1,398 @@
 """
 app.py — Serveur web Flask pour le convertisseur de CV Maltem Africa
 """
+import io
 import os
+import re
+import json
+import math
+import time
 import uuid
-from flask import Flask, request, jsonify, send_file, send_from_directory
+import logging
+from flask import Flask, Response, g, request, jsonify, send_file, send_from_directory
 from werkzeug.utils import secure_filename
 
-from cv_parser import extract_cv_text
-from kimi_extractor import structure_cv_with_kimi
-from cv_formatter import generate_maltem_cv
+import batch
+import metrics
+import pipeline
+import tracing
+import warmup
+import kimi_cache
+from jobs import JobManager, JobQueueFull
+from retention import OutputStore
+from admission import kimi_admission, KIMI_QUEUE_TIMEOUT
+from kimi_extractor import KIMI_CONNECT_TIMEOUT, KIMI_READ_TIMEOUT
 
 # ── Configuration ────────────────────────────────────────────────────────────
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"),
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
 app = Flask(__name__, static_folder="static")
 
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), "uploads")
 OUTPUT_FOLDER = os.path.join(os.path.dirname(__file__), "outputs")
 ALLOWED_EXTENSIONS = {"pdf", "docx"}
 MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10 MB max
+SSE_KEEPALIVE = 15  # secondes entre deux commentaires keepalive du flux /jobs/<id>/events
+# Attente max de POST /convert : place Kimi + un appel complet + extraction et génération (504 au-delà)
+CONVERT_TIMEOUT = float(os.environ.get(
+    "CONVERT_TIMEOUT", str(KIMI_QUEUE_TIMEOUT + KIMI_CONNECT_TIMEOUT + KIMI_READ_TIMEOUT + 60)))
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")   # X-Request-ID accepté du client / proxy
 
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["OUTPUT_FOLDER"] = OUTPUT_FOLDER
-app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+# Limite globale de Flask = celle des lots ; les envois d'un seul CV sont vérifiés dans save_upload()
+app.config["MAX_CONTENT_LENGTH"] = max(MAX_CONTENT_LENGTH, int(batch.BATCH_MAX_MB * 1024 * 1024))
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
+# Avant install() : la conversion factice du préchauffage n'apparaît ni dans les métriques ni dans les traces
+warmup.warm_up()
+metrics.install()
+tracing.install()
+
+output_store = OutputStore(OUTPUT_FOLDER)
+job_manager = JobManager(OUTPUT_FOLDER, store=output_store)
+
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-# ── Routes ────────────────────────────────────────────────────────────────────
-@app.route("/")
-def index():
-    return send_from_directory("static", "index.html")
-
-
-@app.route("/convert", methods=["POST"])
-def convert_cv():
+def check_upload():
     """
-    Endpoint principal :
-    1. Reçoit le fichier CV (PDF ou DOCX)
-    2. Extrait le texte
-    3. Structurise avec Kimi NVIDIA
-    4. Génère le CV Maltem DOCX
-    5. Retourne le fichier
+    Valide le fichier du champ 'cv_file'.
+    Retourne (fichier, None) ou (None, réponse_erreur).
     """
-    # Vérification du fichier
+    if (request.content_length or 0) > MAX_CONTENT_LENGTH:
+        return None, (jsonify({"error": "Fichier trop volumineux (10 Mo max)."}), 413)
+
     if "cv_file" not in request.files:
-        return jsonify({"error": "Aucun fichier reçu. Utilisez le champ 'cv_file'."}), 400
+        return None, (jsonify({"error": "Aucun fichier reçu. Utilisez le champ 'cv_file'."}), 400)
 
     file = request.files["cv_file"]
 
     if file.filename == "":
-        return jsonify({"error": "Nom de fichier vide."}), 400
+        return None, (jsonify({"error": "Nom de fichier vide."}), 400)
 
     if not allowed_file(file.filename):
-        return jsonify({"error": "Format non supporté. Envoyez un fichier PDF ou DOCX."}), 400
+        return None, (jsonify({"error": "Format non supporté. Envoyez un fichier PDF ou DOCX."}), 400)
+
+    return file, None
+
+
+def save_upload():
+    """
+    Valide et enregistre le fichier du champ 'cv_file'.
+    Retourne (chemin, nom_original, None) ou (None, None, réponse_erreur).
+    """
+    file, error = check_upload()
+    if error:
+        return None, None, error
 
-    # Sauvegarder le fichier uploadé
     unique_id = str(uuid.uuid4())[:8]
     filename = secure_filename(file.filename)
     input_path = os.path.join(UPLOAD_FOLDER, f"{unique_id}_{filename}")
     file.save(input_path)
+    return input_path, file.filename, None
+
+
+def read_upload():
+    """Comme save_upload(), sans passer par le disque : retourne (contenu, nom_original, erreur)."""
+    file, error = check_upload()
+    if error:
+        return None, None, error
+    return file.read(), file.filename, None
+
+
+def read_batch_uploads():
+    """
+    Lit les CV d'un lot en mémoire : une archive ZIP et / ou plusieurs champs 'cv_file'.
+    Retourne (items, ignorés, None) ou (None, None, réponse_erreur).
+    """
+    files = [f for f in request.files.getlist("cv_file") if f.filename]
+    if not files:
+        return None, None, (jsonify({"error": "Aucun fichier reçu. Envoyez un ZIP ou plusieurs champs 'cv_file'."}), 400)
+
+    items, skipped = [], []
+    budget = batch.BatchBudget()
+    try:
+        for file in files:
+            ext = file.filename.rsplit(".", 1)[-1].lower() if "." in file.filename else ""
+            if ext == "zip":
+                try:
+                    found, ignored = batch.unpack_zip(file.stream, budget)
+                except ValueError as e:
+                    found, ignored = [], [{"file": file.filename, "status": "skipped", "error": str(e)}]
+                items += found
+                skipped += ignored
+            elif allowed_file(file.filename):
+                data = file.read()
+                budget.reserve(1, len(data))
+                items.append((data, file.filename))
+            else:
+                skipped.append({"file": file.filename, "status": "skipped", "error": "Format non supporté."})
+    except batch.BatchTooLarge as e:
+        return None, None, (jsonify({"error": str(e)}), 400)
+
+    if not items:
+        return None, None, (jsonify({"error": "Aucun CV PDF ou DOCX dans le lot.", "files": skipped}), 400)
+    return items, skipped, None
+
+
+def submit_job(source, filename: str, pinned: bool = True):
+    """Soumet un job ; retourne (job, None) ou (None, réponse 503) si la file est pleine."""
+    try:
+        return job_manager.submit(source, filename, pinned=pinned), None
+    except JobQueueFull:
+        if isinstance(source, str) and os.path.exists(source):
+            os.remove(source)
+        return None, queue_full_response()
+
+
+def queue_full_response():
+    resp = jsonify({"error": "Serveur saturé, réessayez dans quelques instants."})
+    resp.headers["Retry-After"] = "30"
+    return resp, 503
+
+
+def overloaded_response(retry_after):
+    resp = jsonify({"error": "Serveur saturé, réessayez dans quelques instants.", "retry_after": retry_after})
+    resp.headers["Retry-After"] = str(retry_after)
+    return resp, 429
+
+
+def job_error_response(job):
+    if job.http_status == 429:
+        return overloaded_response(job.retry_after or 1)
+    return jsonify({"error": job.error}), job.http_status
+
+
+def send_job_result(job):
+    # Un flux par réponse : le même résultat peut servir plusieurs requêtes (doublons regroupés)
+    return send_file(
+        io.BytesIO(job.output.getvalue()) if job.output is not None else job.output_path,
+        as_attachment=True,
+        download_name=job.download_name,
+        mimetype=pipeline.DOCX_MIMETYPE
+    )
+
+
+# ── Métriques HTTP et traces ──────────────────────────────────────────────────
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+    request_id = request.headers.get("X-Request-ID", "")
+    g.trace_tokens = tracing.start(f"{request.method} {request.path}",
+                                   request_id if REQUEST_ID_RE.match(request_id) else None)
+
+
+@app.after_request
+def count_request(response):
+    # Pour un flux (SSE, ZIP), la durée mesurée est celle de l'envoi des en-têtes
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.observe_request(endpoint, request.method, response.status_code,
+                            time.perf_counter() - g.get("started", time.perf_counter()))
+    return tracing.finish(response, method=request.method, path=request.path, status=response.status_code)
+
+
+@app.teardown_request
+def end_trace(exc):
+    tracing.reset(g.pop("trace_tokens", None))
+
+
+# ── Routes ────────────────────────────────────────────────────────────────────
+@app.route("/")
+def index():
+    return send_from_directory("static", "index.html")
+
+
+@app.route("/convert", methods=["POST"])
+def convert_cv():
+    """
+    Endpoint principal (synchrone, conservé pour compatibilité) :
+    1. Reçoit le fichier CV (PDF ou DOCX), gardé en mémoire
+    2. Le confie au pool de jobs (extraction, Kimi, génération DOCX dans un BytesIO)
+    3. Attend la fin du job et retourne le DOCX depuis le buffer (aucun fichier écrit)
+    """
+    # File d'admission Kimi pleine : refus immédiat, avant de lire le fichier
+    if kimi_admission.saturated():
+        return overloaded_response(math.ceil(kimi_admission.retry_after()))
+
+    data, filename, error = read_upload()
+    if error:
+        return error
+
+    job, error = submit_job(data, filename, pinned=False)
+    if error:
+        return error
+
+    if not job.done.wait(CONVERT_TIMEOUT):
+        # Worker bloqué (flux Kimi, analyse PDF…) : le thread de la requête est rendu ;
+        # le job s'arrête avant son étape suivante si personne d'autre ne l'attend
+        job_manager.release(job)
+        return jsonify({"error": "La conversion prend trop de temps, réessayez plus tard."}), 504
+    job_manager.discard(job.id)
+    if job.status == "error":
+        return job_error_response(job)
+    return send_job_result(job)
+
+
+@app.route("/render", methods=["POST"])
+def render_cv():
+    """
+    Génère le DOCX à partir d'un cv_data déjà structuré (sortie de convert.py --json,
+    corrigée à la main) : corps JSON, ou fichier JSON dans le champ 'cv_json'.
+    Ni extraction ni appel Kimi : quelques centaines de millisecondes.
+    """
+    if (request.content_length or 0) > MAX_CONTENT_LENGTH:
+        return jsonify({"error": "Fichier trop volumineux (10 Mo max)."}), 413
+
+    if request.is_json:
+        cv_data = request.get_json(silent=True)
+    elif "cv_json" in request.files:
+        try:
+            cv_data = json.loads(request.files["cv_json"].read())
+        except ValueError:
+            cv_data = None
+    else:
+        return jsonify({"error": "Envoyez le cv_data en JSON (corps de la requête ou champ 'cv_json')."}), 400
+    if cv_data is None:
+        return jsonify({"error": "JSON invalide."}), 400
 
     try:
-        # Étape 1 : Extraction du texte
-        raw_text = extract_cv_text(input_path)
-        if not raw_text.strip():
-            return jsonify({"error": "Impossible d'extraire le texte du CV. Le fichier semble vide ou protégé."}), 400
-
-        # Étape 2 : Structuration avec Kimi NVIDIA
-        cv_data = structure_cv_with_kimi(raw_text)
-
-        # Étape 3 : Génération du CV Maltem
-        nom = cv_data.get("nom_prenom", "CV").replace(" ", "_")
-        output_filename = f"CV_Maltem_{nom}_{unique_id}.docx"
-        output_path = os.path.join(OUTPUT_FOLDER, output_filename)
-        generate_maltem_cv(cv_data, output_path)
-
-        # Étape 4 : Envoi du fichier
-        return send_file(
-            output_path,
-            as_attachment=True,
-            download_name=output_filename,
-            mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
-
-    except ValueError as e:
-        return jsonify({"error": str(e)}), 400
-    except RuntimeError as e:
-        return jsonify({"error": str(e)}), 502
+        output, download_name = pipeline.render_in_memory(cv_data)
     except Exception as e:
-        return jsonify({"error": f"Erreur interne : {str(e)}"}), 500
-    finally:
-        # Nettoyer le fichier uploadé
-        if os.path.exists(input_path):
-            os.remove(input_path)
+        return jsonify({"error": pipeline.error_message(e)}), pipeline.error_status(e)
+    return send_file(output, as_attachment=True, download_name=download_name,
+                     mimetype=pipeline.DOCX_MIMETYPE)
+
+
+@app.route("/convert/batch", methods=["POST"])
+def convert_batch():
+    """
+    Conversion d'un lot (archive ZIP ou plusieurs champs 'cv_file').
+    La réponse est un ZIP envoyé au fil de l'eau : chaque CV_Maltem_*.docx y est
+    ajouté dès sa conversion terminée, puis manifest.json avec le statut de chaque fichier.
+    Les CV passent par la file des jobs : 503 si elle ne peut en accueillir aucun.
+    """
+    items, skipped, error = read_batch_uploads()
+    if error:
+        return error
+
+    count = len(items)
+    try:
+        run = batch.Batch(items, job_manager)
+    except JobQueueFull:
+        return queue_full_response()
+    response = Response(batch.stream_zip(run, skipped), mimetype="application/zip",
+                        headers={"Content-Disposition": f"attachment; filename=CV_Maltem_lot_{count}.zip",
+                                 "X-Accel-Buffering": "no"})
+    # Déconnexion, même avant le premier morceau : les jobs du lot sont abandonnés
+    response.call_on_close(run.close)
+    return response
+
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    """Démarre une conversion en arrière-plan et retourne immédiatement son identifiant."""
+    if kimi_admission.saturated():
+        return overloaded_response(math.ceil(kimi_admission.retry_after()))
+
+    input_path, filename, error = save_upload()
+    if error:
+        return error
+
+    job, error = submit_job(input_path, filename)
+    if error:
+        return error
+
+    resp = jsonify({**job.to_dict(), "status_url": f"/jobs/{job.id}"})
+    resp.headers["Location"] = f"/jobs/{job.id}"
+    return resp, 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job inconnu ou expiré."}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """
+    Flux Server-Sent Events de la progression réelle d'un job :
+    upload_received, text_extraction_finished (chars), kimi_call_started / kimi_call_finished,
+    kimi_field (field) et kimi_item (field, count) dès qu'une partie de la réponse Kimi est complète,
+    docx_generation_finished, puis done ou error. Reprise possible via Last-Event-ID.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job inconnu ou expiré."}), 404
+
+    # Identifiant illisible ou négatif : reprise depuis le début, sans erreur 500
+    try:
+        last_id = int(request.headers.get("Last-Event-ID", -1))
+    except ValueError:
+        last_id = -1
+    start = max(-1, last_id) + 1
+
+    def stream():
+        index = start
+        yield "retry: 2000\n\n"
+        while True:
+            events, finished = job.events_since(index, timeout=SSE_KEEPALIVE)
+            if not events:
+                if finished:
+                    return
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                yield f"id: {event['seq']}\nevent: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+                if event["event"] in ("done", "error"):
+                    return
+            index += len(events)
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job inconnu ou expiré."}), 404
+    if job.status == "error":
+        return job_error_response(job)
+    if job.status != "done":
+        return jsonify({**job.to_dict(), "error": "Conversion en cours."}), 409
+    if job.output is None:
+        if not os.path.exists(job.output_path):
+            return jsonify({"error": "Résultat expiré, relancez la conversion."}), 410
+        output_store.touch(job.output_path)
+    return send_job_result(job)
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
 
 
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok", "service": "Maltem CV Converter"})
+    return jsonify({
+        "status": "ok",
+        "service": "Maltem CV Converter",
+        "jobs": job_manager.stats(),
+        "kimi_cache": kimi_cache.stats(),
+        "outputs": output_store.stats(),
+        "kimi_admission": kimi_admission.stats(),
+    })
 
 
 # ── Lancement ─────────────────────────────────────────────────────────────────
@@ -0,0 +1,212 @@
+"""
+batch.py — Conversion d'un lot de CV (POST /convert/batch)
+
+Les CV du lot sont des jobs en mémoire du JobManager, soumis BATCH_WORKERS à
+la fois : ils partagent le pool et la limite JOB_QUEUE_MAX des autres
+conversions (503 si la file ne peut accueillir aucun CV du lot). Chaque DOCX
+est ajouté à une archive ZIP envoyée au fil de l'eau, dès que sa conversion se
+termine. Un manifest.json (statut de chaque fichier) ferme l'archive : l'échec
+d'un CV n'interrompt pas le lot. Si le client se déconnecte, les CV pas encore
+soumis sont abandonnés et les conversions en cours s'arrêtent avant leur
+étape suivante.
+"""
+import os
+import json
+import time
+import zlib
+import queue
+import zipfile
+
+from jobs import JobQueueFull
+
+BATCH_WORKERS   = max(1, int(os.environ.get("BATCH_WORKERS", "4")))       # jobs soumis à la fois par lot
+BATCH_MAX_FILES = max(1, int(os.environ.get("BATCH_MAX_FILES", "200")))
+BATCH_MAX_MB    = float(os.environ.get("BATCH_MAX_MB", "200"))           # taille max de la requête
+BATCH_MAX_UNZIPPED_MB = float(os.environ.get("BATCH_MAX_UNZIPPED_MB", "400"))   # CV du lot une fois décompressés
+
+ALLOWED_EXTENSIONS = {"pdf", "docx"}
+# Taille décompressée max d'un CV extrait d'une archive (protection contre les ZIP bombs)
+MAX_ENTRY_BYTES = 10 * 1024 * 1024
+
+
+class _ChunkWriter:
+    """Flux non seekable pour zipfile : accumule les octets écrits jusqu'au prochain drain()."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class BatchTooLarge(Exception):
+    """Lot refusé avant toute décompression : trop de CV, ou trop volumineux une fois décompressé (400)."""
+
+
+class BatchBudget:
+    """CV et octets décompressés encore acceptés dans un lot (partagés par ses archives et fichiers)."""
+
+    def __init__(self, max_files: int = BATCH_MAX_FILES, max_mb: float = BATCH_MAX_UNZIPPED_MB):
+        self.max_files = max_files
+        self.max_mb = max_mb
+        self.files = max_files
+        self.bytes = int(max_mb * 1024 * 1024)
+
+    def reserve(self, files: int, size: int):
+        if files > self.files:
+            raise BatchTooLarge(f"Trop de CV dans le lot ({self.max_files} max).")
+        if size > self.bytes:
+            raise BatchTooLarge(f"Lot trop volumineux une fois décompressé ({self.max_mb:g} Mo max).")
+        self.files -= files
+        self.bytes -= size
+
+
+def unpack_zip(source, budget: BatchBudget = None) -> tuple:
+    """
+    Lit les PDF / DOCX d'une archive (chemin ou fichier ouvert).
+    Le nombre de CV et leur taille décompressée (déclarée dans le répertoire
+    central, que zipfile ne laisse pas dépasser à la lecture) sont réservés sur
+    `budget` avant de lire la moindre entrée : BatchTooLarge si le lot dépasse.
+    Retourne ([(contenu, nom)], [entrée de manifeste pour chaque fichier ignoré]).
+    """
+    budget = budget or BatchBudget()
+    entries, skipped = [], []
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile:
+        raise ValueError("Archive ZIP invalide.")
+    with archive:
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or not name or name.startswith(".") or info.filename.startswith("__MACOSX/"):
+                continue
+            if name.rsplit(".", 1)[-1].lower() not in ALLOWED_EXTENSIONS:
+                skipped.append({"file": info.filename, "status": "skipped", "error": "Format non supporté."})
+                continue
+            if info.file_size > MAX_ENTRY_BYTES:
+                skipped.append({"file": info.filename, "status": "skipped", "error": "Fichier trop volumineux."})
+                continue
+            entries.append(info)
+        budget.reserve(len(entries), sum(info.file_size for info in entries))
+
+        items = []
+        for info in entries:
+            try:
+                with archive.open(info) as src:
+                    items.append((src.read(), info.filename))
+            except NotImplementedError:
+                skipped.append({"file": info.filename, "status": "skipped",
+                                "error": "Méthode de compression non prise en charge."})
+            except RuntimeError:        # entrée chiffrée (mot de passe requis)
+                skipped.append({"file": info.filename, "status": "skipped", "error": "Fichier chiffré."})
+            except (zipfile.BadZipFile, zlib.error, EOFError):
+                skipped.append({"file": info.filename, "status": "skipped", "error": "Fichier corrompu dans l'archive."})
+    return items, skipped
+
+
+class Batch:
+    """
+    Jobs d'un lot : soumis au JobManager `workers` à la fois ; l'itération produit
+    une entrée de manifeste par CV, dans l'ordre de fin des conversions (le DOCX
+    est sous la clé « data »). close() abandonne ce qui reste (idempotent).
+    """
+
+    def __init__(self, items: list, manager, workers: int = BATCH_WORKERS):
+        self.manager = manager
+        self.workers = workers
+        self._pending = items[::-1]         # pop() dans l'ordre du lot
+        items.clear()                       # les contenus ne sont plus référencés que par les jobs et le lot
+        self._finished = queue.Queue()
+        self._running = {}                  # job.id → (job, [(nom, soumis à)]) ; un doublon rejoint le même job
+        self._fill(initial=True)
+
+    def _fill(self, initial: bool = False) -> list:
+        """
+        Soumet les CV suivants. File pleine : nouvel essai à la fin d'un CV du lot,
+        JobQueueFull si rien du lot n'a pu démarrer (503 avant la réponse), sinon
+        le CV échoue en 503 ; retourne les entrées de ces CV refusés.
+        """
+        rejected = []
+        while self._pending and len(self._running) < self.workers:
+            data, name = self._pending[-1]
+            try:
+                job = self.manager.submit(data, name, pinned=False)
+            except JobQueueFull:
+                if self._running:
+                    break
+                if initial:
+                    raise
+                self._pending.pop()
+                rejected.append({"file": name, "status": "error", "http_status": 503,
+                                 "error": "Serveur saturé, réessayez dans quelques instants."})
+                continue
+            self._pending.pop()
+            if job.id not in self._running:
+                self._running[job.id] = (job, [])
+                job.add_done_callback(self._finished.put)
+            self._running[job.id][1].append((name, time.time()))
+        return rejected
+
+    def __iter__(self):
+        try:
+            while self._running:
+                job = self._finished.get()
+                _, names = self._running.pop(job.id)
+                for name, submitted in names:
+                    yield self._entry(job, name, submitted)
+                self.manager.discard(job.id)
+                yield from self._fill()
+        finally:
+            self.close()
+
+    def close(self):
+        """Client déconnecté : plus rien n'est soumis, les jobs en cours s'arrêtent avant leur étape suivante."""
+        self._pending.clear()
+        running, self._running = self._running, {}
+        for job, names in running.values():
+            for _ in names:
+                self.manager.release(job)
+
+    @staticmethod
+    def _entry(job, name: str, submitted: float) -> dict:
+        duration = round(max(0.0, job.finished_at - submitted), 3)
+        if job.status == "done":
+            return {"file": name, "status": "done", "output": job.download_name, "data": job.output,
+                    "duration": duration}
+        return {"file": name, "status": "error", "error": job.error, "http_status": job.http_status,
+                "retry_after": job.retry_after, "duration": duration}
+
+
+def stream_zip(entries, skipped: list = None):
+    """Génère l'archive ZIP résultat par morceaux : un DOCX par conversion terminée, puis manifest.json."""
+    started = time.time()
+    manifest = list(skipped or [])
+    sink = _ChunkWriter()
+    written = set()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for entry in entries:
+            output = entry.pop("data", None)
+            # Fichiers identiques dans le lot : un seul job, donc un seul DOCX
+            if output is not None and entry["output"] not in written:
+                archive.writestr(entry["output"], output.getvalue())
+                written.add(entry["output"])
+            manifest.append(entry)
+            yield sink.drain()
+        archive.writestr("manifest.json", json.dumps({
+            "total": len(manifest),
+            "done": sum(1 for e in manifest if e["status"] == "done"),
+            "errors": sum(1 for e in manifest if e["status"] == "error"),
+            "skipped": sum(1 for e in manifest if e["status"] == "skipped"),
+            "duration": round(time.time() - started, 3),
+            "files": manifest,
+        }, ensure_ascii=False, indent=2))
+    yield sink.drain()
@@ -1,13 +1,37 @@
 """
 cv_formatter.py — CV Maltem Africa — 100% fidèle référence ZAID v2
+
+Les parties fixes du document (mise en page, styles, bandeau d'en-tête avec
+barre rouge, logo et déco, pied de page avec champs PAGE / NUMPAGES) sont
+construites une fois dans un squelette (voir skeleton.py) ; chaque CV part d'un
+clone et n'ajoute que ses sections. DOCX_SKELETON=0 reconstruit tout à chaque
+appel (comparaison, débogage). DOCX_ENGINE=stream écrit le même document sans
+arbre python-docx complet (voir docx_stream.py, qui part toujours du squelette).
+
+La mise en forme passe par les styles nommés de cv_styles.py : chaque
+paragraphe reçoit son style (para), chaque run éventuellement un style de
+caractère (text). sp() / ind() / sf() ne servent plus qu'aux cas isolés.
 """
-import os, re
+import os, re, io
+import docx
 from docx import Document
 from docx.shared import Pt, RGBColor, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
-from lxml import etree
+from docx.oxml.shape import CT_Inline
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.image.image import Image
+
+import instrumentation
+import cv_styles as S
+from skeleton import DocumentSkeleton
+from xml_proto import Prototype
+
+DOCX_SKELETON = os.environ.get("DOCX_SKELETON", "1") != "0"
+# Moteur de rendu : "docx" (arbre python-docx puis doc.save) ou "stream"
+# (document.xml écrit bloc par bloc dans le ZIP, voir docx_stream.py)
+DOCX_ENGINE = os.environ.get("DOCX_ENGINE", "docx").strip().lower()
 
 RED   = RGBColor(0xC0, 0x00, 0x00)
 TITLE = RGBColor(0xBE, 0x3B, 0x4E)
@@ -20,6 +44,73 @@ LOGO    = os.path.join(ASSETS, "logo_maltem.png")
 DECO_TL = os.path.join(ASSETS, "deco_top_left_white.png")
 DECO_BR = os.path.join(ASSETS, "deco_bottom_right_white.png")
 
+# Largeur affichée de chaque image (sert aussi à cli/optimize_assets.py pour la résolution cible)
+ASSET_WIDTHS = {
+    LOGO:    Cm(6.76),
+    DECO_TL: Cm(1.9),
+    DECO_BR: Cm(1.87),
+}
+
+# Modèle vierge de python-docx, lu une fois au lieu d'à chaque Document()
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(docx.__file__), "templates", "default.docx")
+
+_file_bytes = {}
+
+
+def file_bytes(path: str) -> bytes:
+    """Contenu d'une ressource (images, modèle), lu une seule fois par processus."""
+    data = _file_bytes.get(path)
+    if data is None:
+        with open(path, "rb") as f:
+            data = _file_bytes[path] = f.read()
+    return data
+
+
+# ─── IMAGES ───────────────────────────────────────────────────────────────────
+# Registre des images du processus : chaque PNG est lu, analysé (format,
+# dimensions, DPI) et haché (SHA-1) une seule fois ; add_picture le refaisait à
+# chaque appel, deux fois par document pour DECO_TL.
+_images = {}
+
+
+def asset_image(path: str) -> Image:
+    image = _images.get(path)
+    if image is None:
+        blob = file_bytes(path)
+        image = Image._from_stream(io.BytesIO(blob), blob, os.path.basename(path))
+        image.sha1                      # calculé ici plutôt qu'au premier document
+        _images[path] = image
+    return image
+
+
+def add_asset_picture(run, path: str):
+    """
+    Équivalent de run.add_picture(path, width=ASSET_WIDTHS[path]) à partir du registre.
+    La partie image est ajoutée au paquet une seule fois ; les insertions suivantes
+    (même document) ne créent qu'une relation vers elle.
+    """
+    image = asset_image(path)
+    part = run.part
+    image_parts = part.package.image_parts
+    image_part = image_parts._get_by_sha1(image.sha1) or image_parts._add_image_part(image)
+    rId = part.relate_to(image_part, RT.IMAGE)
+    cx, cy = image.scaled_dimensions(ASSET_WIDTHS[path], None)
+    inline = CT_Inline.new_pic_inline(part.next_id, rId, image.filename, cx, cy)
+    run._r.add_drawing(inline)
+    return inline
+
+
+def preload():
+    """Charge images, modèle, squelette et ZIP modèle du moteur en flux (appelé par warmup avant le fork)."""
+    file_bytes(DEFAULT_TEMPLATE)
+    for path in ASSET_WIDTHS:
+        asset_image(path)
+    if DOCX_SKELETON:
+        SKELETON.get()
+    if DOCX_ENGINE == "stream":
+        import docx_stream
+        docx_stream.preload()
+
 
 # ─── UTILITAIRES ──────────────────────────────────────────────────────────────
 
@@ -41,6 +132,24 @@ def sf(run, size_pt=10, bold=False, italic=False, underline=False, color=None, f
     rPr.insert(0, rF)
 
 
+def para(container, style_id):
+    """Nouveau paragraphe de style `style_id` (cv_styles) dans un document ou une cellule."""
+    return styled(container.add_paragraph(), style_id)
+
+
+def styled(p, style_id):
+    p._p.get_or_add_pPr().style = style_id
+    return p
+
+
+def text(p, value, style_id=None):
+    """Run `value` dans `p`, avec le style de caractère `style_id` si donné."""
+    r = p.add_run(value)
+    if style_id:
+        r._r.style = style_id
+    return r
+
+
 def sp(para, before=0, after=0, line=240):
     pPr = para._p.get_or_add_pPr()
     s = pPr.find(qn('w:spacing'))
@@ -96,13 +205,7 @@ def keep_with_next(para):
     Word colle ce paragraphe au paragraphe suivant.
     Utiliser sur TOUS les titres de sections.
     """
-    pPr = para._p.get_or_add_pPr()
-    old = pPr.find(qn('w:keepWithNext'))
-    if old is not None:
-        pPr.remove(old)
-    kwn = OxmlElement('w:keepWithNext')
-    kwn.set(qn('w:val'), '1')
-    pPr.append(kwn)
+    para._p.get_or_add_pPr().keepNext_val = True
 
 
 def remove_cell_borders(cell):
@@ -144,14 +247,7 @@ def set_cell_width(cell, width_twips):
 
 # ─── IMAGES / FORMES FLOTTANTES ───────────────────────────────────────────────
 
-def make_anchor_from_inline(run, cx, cy, posH_offset, posV_offset, doc_id,
-                             relH="column", relV="paragraph", behindDoc="0"):
-    r_xml = run._r.xml
-    m = re.search(r'r:embed="(rId\d+)"', r_xml)
-    if not m:
-        return None
-    rId = m.group(1)
-    anchor_xml = f'''<w:drawing
+_ANCHOR_PROTO = Prototype('''<w:drawing
   xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"
   xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
   xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"
@@ -184,12 +280,20 @@ def make_anchor_from_inline(run, cx, cy, posH_offset, posV_offset, doc_id,
       </a:graphicData>
     </a:graphic>
   </wp:anchor>
-</w:drawing>'''
-    return etree.fromstring(anchor_xml)
+</w:drawing>''')
 
 
-def make_red_bar_xml():
-    return etree.fromstring('''<w:drawing
+def make_anchor_from_inline(run, cx, cy, posH_offset, posV_offset, doc_id,
+                             relH="column", relV="paragraph", behindDoc="0"):
+    """Ancre flottante (wp:anchor) pour l'image insérée en ligne dans `run` ; None si le run n'a pas d'image."""
+    embed = run._r.xpath("./w:drawing/wp:inline/a:graphic/a:graphicData/pic:pic/pic:blipFill/a:blip/@r:embed")
+    if not embed:
+        return None
+    return _ANCHOR_PROTO.new(rId=embed[0], cx=cx, cy=cy, posH_offset=posH_offset, posV_offset=posV_offset,
+                             doc_id=doc_id, relH=relH, relV=relV, behindDoc=behindDoc)
+
+
+_RED_BAR_PROTO = Prototype('''<w:drawing
   xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"
   xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
   xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"
@@ -221,10 +325,11 @@ def make_red_bar_xml():
 </w:drawing>''')
 
 
-def make_badge_xml(periode_text, doc_id=100):
-    cx = 1097280
-    cy = 246888
-    base_xml = f'''<w:drawing
+def make_red_bar_xml():
+    return _RED_BAR_PROTO.new()
+
+
+_BADGE_PROTO = Prototype('''<w:drawing
   xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"
   xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
   xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"
@@ -262,7 +367,7 @@ def make_badge_xml(periode_text, doc_id=100):
                     <w:rFonts w:ascii="Century Gothic" w:hAnsi="Century Gothic" w:cs="Century Gothic"/>
                     <w:color w:val="FFFFFF"/><w:sz w:val="16"/><w:szCs w:val="16"/>
                   </w:rPr>
-                  <w:t xml:space="preserve">BADGE_PLACEHOLDER</w:t>
+                  <w:t xml:space="preserve">{periode}</w:t>
                 </w:r>
               </w:p>
             </w:txbxContent>
@@ -272,19 +377,17 @@ def make_badge_xml(periode_text, doc_id=100):
       </a:graphicData>
     </a:graphic>
   </wp:anchor>
-</w:drawing>'''
-    root = etree.fromstring(base_xml)
-    W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
-    for wt in root.iter(f"{{{W}}}t"):
-        if wt.text == "BADGE_PLACEHOLDER":
-            wt.text = periode_text
-            break
-    return root
+</w:drawing>''')
+
+
+def make_badge_xml(periode_text, doc_id=100):
+    return _BADGE_PROTO.new(periode=periode_text, doc_id=doc_id, cx=1097280, cy=246888)
 
 
 # ─── EN-TÊTE ──────────────────────────────────────────────────────────────────
 
-def build_header(doc, cv_data):
+def build_header_banner(doc):
+    """Bandeau fixe en tête du corps : barre rouge, logo et déco haut-gauche (partie du squelette)."""
     p_main = doc.add_paragraph()
     p_main.alignment = WD_ALIGN_PARAGRAPH.RIGHT
     sp(p_main, before=0, after=0)
@@ -294,7 +397,7 @@ def build_header(doc, cv_data):
     p_main._p.insert(1, make_red_bar_xml())
 
     r_logo = p_main.add_run()
-    r_logo.add_picture(LOGO, width=Cm(6.76))
+    add_asset_picture(r_logo, LOGO)
     logo_anchor = make_anchor_from_inline(r_logo, 2433960, 635257, 4852434, -482157, 44,
                                           relH="page", relV="paragraph", behindDoc="0")
     if logo_anchor is not None:
@@ -302,40 +405,33 @@ def build_header(doc, cv_data):
         p_main._p.insert(2, logo_anchor)
 
     r_tl = p_main.add_run()
-    r_tl.add_picture(DECO_TL, width=Cm(1.9))
+    add_asset_picture(r_tl, DECO_TL)
     tl_anchor = make_anchor_from_inline(r_tl, 682625, 1567180, -106680, -106680, 50,
                                         relH="page", relV="paragraph", behindDoc="1")
     if tl_anchor is not None:
         r_tl._r.getparent().remove(r_tl._r)
         p_main._p.insert(3, tl_anchor)
 
+
+def build_header(doc, cv_data):
     # Ligne noire au-dessus du nom
-    p_l1 = doc.add_paragraph()
+    p_l1 = para(doc, S.RULE_LINE)
     sp(p_l1, before=6, after=4)
-    bdr(p_l1, bottom=True, color="231F20", sz="6")
 
     # Nom + expérience (normal, centré)
-    p_nom = doc.add_paragraph()
-    p_nom.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    sp(p_nom, before=4, after=2)
+    p_nom = para(doc, S.NAME)
     nom = cv_data.get("nom_prenom", "")
     exp = cv_data.get("annees_experience", "")
-    r_n = p_nom.add_run(nom)
-    sf(r_n, size_pt=14)
+    text(p_nom, nom)
     if exp:
-        r_e = p_nom.add_run(f" – {exp}")
-        sf(r_e, size_pt=14)
+        text(p_nom, f" – {exp}")
 
     # Titre poste — gras, centré, taille 14
-    p_t = doc.add_paragraph()
-    p_t.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    sp(p_t, before=0, after=4)
-    sf(p_t.add_run(cv_data.get("titre_poste", "")), size_pt=14, bold=True)
+    text(para(doc, S.JOB_TITLE), cv_data.get("titre_poste", ""))
 
     # Ligne noire en dessous
-    p_l2 = doc.add_paragraph()
+    p_l2 = para(doc, S.RULE_LINE)
     sp(p_l2, before=4, after=8)
-    bdr(p_l2, bottom=True, color="231F20", sz="6")
 
 
 # ─── TITRE DE SECTION ─────────────────────────────────────────────────────────
@@ -346,14 +442,10 @@ def section_title(doc, title, page_break=False):
     Comme dans la référence : 'À PROPOS', 'COMPÉTENCES', 'FORMATION'...
     Si page_break=True → saut de page AVANT (pour EXPÉRIENCES PROFESSIONNELLES).
     """
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    sp(p, before=10, after=4)
+    p = para(doc, S.SECTION_TITLE)  # keepWithNext : titre toujours collé à son premier sous-élément
     if page_break:
         page_break_before(p)
-    keep_with_next(p)  # titre toujours collé à son premier sous-élément
-    sf(p.add_run(title.upper()), size_pt=10, bold=True, color=BLACK)
-    bdr(p, bottom=True, color="231F20", sz="6")
+    text(p, title.upper())
     return p
 
 
@@ -379,17 +471,11 @@ def build_a_propos(doc, a_propos):
         if not ligne:
             continue
 
-        # ── Paragraphe bullet avec espacement référence ──
-        p = doc.add_paragraph()
-        p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-        # Espacement important entre bullets comme dans la référence
-        sp(p, before=8, after=8, line=276)
-        # Indentation : left=426, hanging=0
-        ind(p, left=426)
+        # ── Paragraphe bullet : justifié, grand espacement, retrait 426 ──
+        p = para(doc, S.ABOUT)
 
         # Tiret
-        r_dash = p.add_run("- ")
-        sf(r_dash, size_pt=10, color=BLACK)
+        text(p, "- ")
 
         # Traiter les mots en gras (entre ** ou liste de mots-clés)
         _add_text_with_bold(p, ligne)
@@ -399,21 +485,18 @@ def build_a_propos(doc, a_propos):
     sp(p_space, before=0, after=4)
 
 
-def _add_text_with_bold(para, text):
+def _add_text_with_bold(p, value):
     """
     Ajoute du texte dans un paragraphe en gérant le gras.
     Supporte le format **mot** pour le gras, sinon texte simple.
     """
     # Parser les segments **gras** et normal
-    parts = re.split(r'(\*\*[^*]+\*\*)', text)
+    parts = re.split(r'(\*\*[^*]+\*\*)', value)
     for part in parts:
         if part.startswith('**') and part.endswith('**'):
-            inner = part[2:-2]
-            r = para.add_run(inner)
-            sf(r, size_pt=10, bold=True, color=BLACK)
-        else:
-            r = para.add_run(part)
-            sf(r, size_pt=10, color=BLACK)
+            text(p, part[2:-2], S.STRONG)
+        elif part:
+            text(p, part)
 
 
 # ─── COMPÉTENCES EN 2 COLONNES ────────────────────────────────────────────────
@@ -514,10 +597,7 @@ def _fill_competence_column(cell, categories):
                 first = False
             else:
                 p = cell.add_paragraph()
-            p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            # Espacement before plus grand entre catégories sauf la première
-            sp(p, before=6 if not first else 0, after=2)
-            sf(p.add_run(cat["categorie"]), size_pt=10, bold=True, color=BLACK)
+            text(styled(p, S.COMPETENCE_CAT), cat["categorie"])
 
         # ── Items avec tiret ──
         for item in cat.get("items", []):
@@ -526,13 +606,9 @@ def _fill_competence_column(cell, categories):
                 first = False
             else:
                 p = cell.add_paragraph()
-            p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            sp(p, before=0, after=0, line=240)
-            ind(p, left=283)  # ~0.5cm indentation comme dans la référence
-            r_dash = p.add_run("- ")
-            sf(r_dash, size_pt=10, color=BLACK)
-            r_item = p.add_run(item)
-            sf(r_item, size_pt=10, color=BLACK)
+            styled(p, S.COMPETENCE_ITEM)  # retrait ~0.5cm comme dans la référence
+            text(p, "- ")
+            text(p, item)
 
 
 # ─── EXPÉRIENCES ──────────────────────────────────────────────────────────────
@@ -545,23 +621,18 @@ def exp_section_title(doc):
     Fidèle 100% à la référence.
     """
     # Ligne noire au-dessus
-    p_top = doc.add_paragraph()
+    p_top = para(doc, S.RULE_LINE)
     sp(p_top, before=10, after=0)
     # PAGE BREAK BEFORE sur ce paragraphe
     page_break_before(p_top)
     keep_with_next(p_top)
-    bdr(p_top, bottom=True, color="231F20", sz="6")
 
     # Titre centré rouge
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    sp(p, before=4, after=4)
-    sf(p.add_run("EXPÉRIENCES PROFESSIONNELLES"), size_pt=12, bold=True, color=TITLE)
+    text(para(doc, S.EXP_TITLE), "EXPÉRIENCES PROFESSIONNELLES")
 
     # Ligne noire en dessous
-    p_bot = doc.add_paragraph()
+    p_bot = para(doc, S.RULE_LINE)
     sp(p_bot, before=0, after=8)
-    bdr(p_bot, bottom=True, color="231F20", sz="6")
 
 
 def exp_badge_line(doc, periode, entreprise, badge_id=100):
@@ -574,11 +645,7 @@ def exp_badge_line(doc, periode, entreprise, badge_id=100):
     IMPORTANT : le <w:drawing> du badge DOIT être dans un <w:r> (run),
     pas directement dans <w:p>, sinon Word l'ignore silencieusement.
     """
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    sp(p, before=10, after=2)
-    ind(p, left=1800)
-    keep_with_next(p)  # badge toujours collé au poste qui suit
+    p = para(doc, S.EXP_HEADING)  # keepWithNext : badge toujours collé au poste qui suit
 
     if periode:
         try:
@@ -594,21 +661,18 @@ def exp_badge_line(doc, periode, entreprise, badge_id=100):
                 p._p.insert(0, r_badge)
         except Exception as e:
             # Fallback texte si badge échoue
-            r_per = p.add_run(f"[{periode}]  ")
-            sf(r_per, size_pt=9, bold=True, color=RED)
+            text(p, f"[{periode}]  ", S.COMPANY).font.size = Pt(9)
 
     if entreprise:
-        sf(p.add_run(entreprise.upper()), size_pt=10, bold=True, color=RED)
+        text(p, entreprise.upper(), S.COMPANY)
 
     return p
 
 
 def exp_poste(doc, poste):
     """Poste centré gras sous le badge — comme dans la référence."""
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    sp(p, before=2, after=6)
-    sf(p.add_run(poste), size_pt=10, bold=True, color=BLACK)
+    p = para(doc, S.EXP_ROLE)
+    text(p, poste)
     return p
 
 
@@ -619,78 +683,67 @@ def exp_label(doc, label):
     PAS de ligne de séparation — seulement espacement.
     keepWithNext : évite que le label soit seul en bas de page sans son contenu.
     """
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    sp(p, before=8, after=2)
-    keep_with_next(p)  # label toujours collé à son premier item
-    sf(p.add_run(label), size_pt=10, bold=True, color=BLACK)
+    p = para(doc, S.EXP_LABEL)  # keepWithNext : label toujours collé à son premier item
+    text(p, label)
     return p
 
 
-def exp_body(doc, text, indent_twips=426):
+def exp_body(doc, value, indent_twips=426):
     """Corps de texte justifié avec tiret, pour Contexte et Environnement."""
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    sp(p, before=0, after=2, line=252)
-    ind(p, left=indent_twips)
-    r_dash = p.add_run("- ")
-    sf(r_dash, size_pt=10, color=BLACK)
-    sf(p.add_run(text), size_pt=10, color=BLACK)
+    p = para(doc, S.EXP_BODY)
+    if indent_twips != 426:
+        ind(p, left=indent_twips)
+    text(p, "- ")
+    text(p, value)
     return p
 
 
-def exp_item(doc, text, indent_twips=426):
+def exp_item(doc, value, indent_twips=426):
     """
     Item de liste simple avec tiret.
     Pour: Objectifs, items sans gras initial.
     """
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    sp(p, before=1, after=1, line=252)
-    ind(p, left=indent_twips)
-    r_dash = p.add_run("- ")
-    sf(r_dash, size_pt=10, color=BLACK)
-    sf(p.add_run(text), size_pt=10, color=BLACK)
+    p = para(doc, S.EXP_ITEM)
+    if indent_twips != 426:
+        ind(p, left=indent_twips)
+    text(p, "- ")
+    text(p, value)
     return p
 
 
-def exp_item_bold_prefix(doc, text, indent_twips=426):
+def exp_item_bold_prefix(doc, value, indent_twips=426):
     """
     Item de réalisation avec PREMIER TERME EN GRAS jusqu'au ':'.
     Ex: '- Optimisation & Diagnostic JVM : Analyse...'
         → '- ' + 'Optimisation & Diagnostic JVM :' (gras) + ' Analyse...' (normal)
     Fidèle 100% à la référence.
     """
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    sp(p, before=1, after=1, line=252)
-    ind(p, left=indent_twips)
+    p = para(doc, S.EXP_ITEM)
+    if indent_twips != 426:
+        ind(p, left=indent_twips)
 
     # Tiret
-    r_dash = p.add_run("- ")
-    sf(r_dash, size_pt=10, color=BLACK)
+    text(p, "- ")
 
     # Chercher le séparateur ':' ou '–'
-    colon_idx = text.find(' : ')
-    dash_idx  = text.find(' – ')
+    colon_idx = value.find(' : ')
+    dash_idx  = value.find(' – ')
 
     if colon_idx > 0:
-        bold_part  = text[:colon_idx + 2]   # inclut ' :'
-        normal_part = text[colon_idx + 2:]   # reste après ' :'
+        bold_part  = value[:colon_idx + 2]   # inclut ' :'
+        normal_part = value[colon_idx + 2:]   # reste après ' :'
     elif dash_idx > 0:
-        bold_part  = text[:dash_idx + 2]
-        normal_part = text[dash_idx + 2:]
+        bold_part  = value[:dash_idx + 2]
+        normal_part = value[dash_idx + 2:]
     else:
         # Pas de séparateur → tout normal
-        sf(p.add_run(text), size_pt=10, color=BLACK)
+        text(p, value)
         return p
 
-    r_bold = p.add_run(bold_part)
-    sf(r_bold, size_pt=10, bold=True, color=BLACK)
+    text(p, bold_part, S.STRONG)
 
     if normal_part.strip():
-        r_normal = p.add_run(normal_part)
-        sf(r_normal, size_pt=10, color=BLACK)
+        text(p, normal_part)
 
     return p
 
@@ -702,48 +755,25 @@ def build_footer(doc):
     footer  = section.footer
     for para in footer.paragraphs:
         para.clear()
-    fp = footer.paragraphs[0]
-    fp.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    sp(fp, before=0, after=0)
+    fp = styled(footer.paragraphs[0], S.FOOTER)   # filet haut, tabulations, 8 pt gris
 
-    pPr  = fp._p.get_or_add_pPr()
-    pBdr = OxmlElement('w:pBdr')
-    top  = OxmlElement('w:top')
-    top.set(qn('w:val'),   'single')
-    top.set(qn('w:sz'),    '6')
-    top.set(qn('w:space'), '1')
-    top.set(qn('w:color'), 'auto')
-    pBdr.append(top)
-    pPr.append(pBdr)
+    text(fp, "MALTEM AFRICA\t")
 
-    tabs_el = OxmlElement('w:tabs')
-    for val, pos in [('center', '4536'), ('right', '9026')]:
-        t = OxmlElement('w:tab')
-        t.set(qn('w:val'), val)
-        t.set(qn('w:pos'), pos)
-        tabs_el.append(t)
-    pPr.append(tabs_el)
-
-    sf(fp.add_run("MALTEM AFRICA"), size_pt=8, color=GREY)
-    fp.add_run("\t").font.size = Pt(8)
-
-    def field(para, instr):
-        r = para.add_run()
-        r.font.size = Pt(8)
-        r.font.color.rgb = GREY
+    def field(p, instr):
+        r = p.add_run()
         f1 = OxmlElement('w:fldChar'); f1.set(qn('w:fldCharType'), 'begin')
         it = OxmlElement('w:instrText'); it.text = instr
         f2 = OxmlElement('w:fldChar'); f2.set(qn('w:fldCharType'), 'end')
         r._r.extend([f1, it, f2])
 
-    sf(fp.add_run("\tPage "), size_pt=8, color=GREY)
+    text(fp, "\tPage ")
     field(fp, ' PAGE ')
-    sf(fp.add_run(" sur "), size_pt=8, color=GREY)
+    text(fp, " sur ")
     field(fp, ' NUMPAGES ')
 
     # Deco bas-droite
     r_br = fp.add_run()
-    r_br.add_picture(DECO_BR, width=Cm(1.87))
+    add_asset_picture(r_br, DECO_BR)
     br_anchor = make_anchor_from_inline(r_br, 673100, 1567180, 6886900, -1200000, 51,
                                         relH="page", relV="paragraph", behindDoc="1")
     if br_anchor is not None:
@@ -752,7 +782,7 @@ def build_footer(doc):
 
     # Deco haut-gauche (depuis footer, remonte en haut de page)
     r_tl = fp.add_run()
-    r_tl.add_picture(DECO_TL, width=Cm(1.9))
+    add_asset_picture(r_tl, DECO_TL)
     tl_anchor = make_anchor_from_inline(r_tl, 682625, 1567180, -106680, -9500000, 52,
                                         relH="page", relV="paragraph", behindDoc="1")
     if tl_anchor is not None:
@@ -762,8 +792,8 @@ def build_footer(doc):
 
 # ─── GÉNÉRATION PRINCIPALE ────────────────────────────────────────────────────
 
-def generate_maltem_cv(cv_data: dict, output_path: str) -> str:
-    doc = Document()
+def build_skeleton(doc):
+    """Parties communes à tous les CV : mise en page, styles, bandeau d'en-tête, pied de page."""
     s   = doc.sections[0]
     s.page_height      = Cm(29.7)
     s.page_width       = Cm(21.0)
@@ -772,176 +802,202 @@ def generate_maltem_cv(cv_data: dict, output_path: str) -> str:
     s.top_margin       = Cm(1.8)
     s.bottom_margin    = Cm(1.8)
     s.footer_distance  = Cm(0.8)
-    doc.styles['Normal'].font.name = 'Century Gothic'
-    doc.styles['Normal'].font.size = Pt(10)
+    S.install(doc)
+    build_header_banner(doc)
+    with instrumentation.timed("docx_footer"):
+        build_footer(doc)
+
+
+SKELETON = DocumentSkeleton(build_skeleton, template=file_bytes(DEFAULT_TEMPLATE))
+
+
+def new_document():
+    """Document prêt à recevoir les sections d'un CV (clone du squelette)."""
+    if DOCX_SKELETON:
+        return SKELETON.clone()
+    doc = Document(io.BytesIO(file_bytes(DEFAULT_TEMPLATE)))
+    build_skeleton(doc)
+    return doc
+
+
+def generate_maltem_cv(cv_data: dict, output_path):
+    """Écrit le CV Maltem dans `output_path` : chemin ou flux binaire (BytesIO, réponse...)."""
+    if DOCX_ENGINE == "stream":
+        import docx_stream
+        return docx_stream.generate_maltem_cv(cv_data, output_path)
 
-    # ── EN-TÊTE ──────────────────────────────────────────────────────────────
-    build_header(doc, cv_data)
+    with instrumentation.timed("docx_document"):
+        doc = new_document()
+    build_body(doc, cv_data)
 
-    # ── À PROPOS ─────────────────────────────────────────────────────────────
-    a_propos = cv_data.get("a_propos", "")
-    if a_propos:
-        build_a_propos(doc, a_propos)
+    with instrumentation.timed("docx_save"):
+        doc.save(output_path)
+    return output_path
+
+
+def build_body(doc, cv_data: dict):
+    """
+    Contenu variable du CV, dans l'ordre du document. `doc` n'est utilisé qu'à
+    travers add_paragraph() / add_table() : Document python-docx, ou StreamBody
+    de docx_stream.py qui écrit chaque bloc dès le suivant commencé.
+    Chaque partie est chronométrée (événements docx_*, voir bench/bench_formatter.py).
+    """
+    with instrumentation.timed("docx_header"):
+        build_header(doc, cv_data)
+
+    with instrumentation.timed("docx_about"):
+        # ── À PROPOS ─────────────────────────────────────────────────────────
+        a_propos = cv_data.get("a_propos", "")
+        if a_propos:
+            build_a_propos(doc, a_propos)
 
     # ── COMPÉTENCES (2 colonnes avec gap) ────────────────────────────────────
     competences = cv_data.get("competences", [])
     if competences:
-        build_competences_table(doc, competences)
+        with instrumentation.timed("docx_competences"):
+            build_competences_table(doc, competences)
+
+    with instrumentation.timed("docx_sections"):
+        build_other_sections(doc, cv_data)
+
+    # ── EXPÉRIENCES PROFESSIONNELLES (nouvelle page) ──────────────────────────
+    experiences = cv_data.get("experiences", [])
+    if experiences:
+        with instrumentation.timed("docx_experiences"):
+            build_experiences(doc, experiences)
+
 
+def build_other_sections(doc, cv_data: dict):
+    """Formation, certifications, langues, autres références, projets marquants."""
     # ── FORMATION ────────────────────────────────────────────────────────────
     formations = cv_data.get("formations", [])
     if formations:
         section_title(doc, "FORMATION")
         for form in formations:
-            p = doc.add_paragraph()
-            p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            sp(p, before=4, after=2)
+            p = para(doc, S.FORMATION)
             annee       = form.get("annee", "")
             diplome     = form.get("diplome", "")
             etablissement = form.get("etablissement", "")
             if annee:
-                r_yr = p.add_run(f"{annee}  ")
-                sf(r_yr, size_pt=10, bold=True, color=BLACK)
+                text(p, f"{annee}  ", S.STRONG)
             txt = diplome
             if etablissement:
                 txt += f" – {etablissement}"
-            sf(p.add_run(txt), size_pt=10, color=BLACK)
+            text(p, txt)
 
     # ── CERTIFICATIONS ───────────────────────────────────────────────────────
     certs = cv_data.get("certifications", [])
     if certs:
         section_title(doc, "CERTIFICATIONS")
         for cert in certs:
-            p = doc.add_paragraph()
-            p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            sp(p, before=0, after=0)
-            ind(p, left=426)
-            r_dash = p.add_run("- ")
-            sf(r_dash, size_pt=10, color=BLACK)
-            sf(p.add_run(cert), size_pt=10, color=BLACK)
+            p = para(doc, S.LIST_ITEM)
+            text(p, "- ")
+            text(p, cert)
 
     # ── LANGUES ──────────────────────────────────────────────────────────────
     langues = cv_data.get("langues", [])
     if langues:
         section_title(doc, "LANGUES")
         for langue in langues:
-            p = doc.add_paragraph()
-            sp(p, before=0, after=0)
-            ind(p, left=426)
-            r_dash = p.add_run("- ")
-            sf(r_dash, size_pt=10, color=BLACK)
-            sf(p.add_run(langue), size_pt=10, color=BLACK)
+            p = para(doc, S.LIST_ITEM)
+            text(p, "- ")
+            text(p, langue)
 
     # ── AUTRES RÉFÉRENCES ────────────────────────────────────────────────────
     refs = cv_data.get("autres_references", [])
     if refs:
         section_title(doc, "AUTRES RÉFÉRENCES")
         for ref in refs:
-            p = doc.add_paragraph()
-            p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            sp(p, before=2, after=2)
+            p = para(doc, S.REFERENCE)
             # Entreprise en rouge gras + poste en noir
             entreprise_ref = ref.get("entreprise", "") if isinstance(ref, dict) else ""
             poste_ref      = ref.get("poste", "")      if isinstance(ref, dict) else ""
             if entreprise_ref:
-                r_ent = p.add_run(f"{entreprise_ref} : ")
-                sf(r_ent, size_pt=10, bold=True, color=RED)
+                text(p, f"{entreprise_ref} : ", S.COMPANY)
             if poste_ref:
-                sf(p.add_run(poste_ref), size_pt=10, color=BLACK)
+                text(p, poste_ref)
             # Si c'est juste une string
             if isinstance(ref, str):
-                sf(p.add_run(ref), size_pt=10, color=BLACK)
+                text(p, ref)
 
     # ── PROJETS MARQUANTS ────────────────────────────────────────────────────
     projets = cv_data.get("projets_marquants", [])
     if projets:
         section_title(doc, "PROJETS MARQUANTS")
         for projet in projets:
-            p = doc.add_paragraph()
-            p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            sp(p, before=1, after=1)
-            ind(p, left=426)
-            r_dash = p.add_run("- ")
-            sf(r_dash, size_pt=10, color=BLACK)
-            sf(p.add_run(projet if isinstance(projet, str) else str(projet)), size_pt=10, color=BLACK)
+            p = para(doc, S.PROJECT)
+            text(p, "- ")
+            text(p, projet if isinstance(projet, str) else str(projet))
+
+
+def build_experiences(doc, experiences: list):
+    """Section EXPÉRIENCES PROFESSIONNELLES : titre sur nouvelle page, puis chaque expérience."""
+    # Titre avec saut de page avant
+    exp_section_title(doc)
+
+    badge_id = 100
+    for exp in experiences:
+        periode       = exp.get("periode", "")
+        entreprise    = exp.get("entreprise", "")
+        poste         = exp.get("poste", "")
+        direction     = exp.get("direction", "")
+        contexte      = exp.get("contexte", "")
+        objectifs     = exp.get("objectifs", [])
+        missions      = exp.get("missions", [])
+        realisations  = exp.get("realisations", [])
+        resultats     = exp.get("resultats", [])
+        environnement = exp.get("environnement", "")
+
+        # Badge période + entreprise
+        exp_badge_line(doc, periode, entreprise, badge_id=badge_id)
+        badge_id += 1
+
+        # Poste centré gras
+        if poste:
+            exp_poste(doc, poste)
+
+        # Direction (si présente)
+        if direction:
+            p = para(doc, S.EXP_ROLE)
+            sp(p, before=0, after=2)
+            text(p, direction)
+
+        # Contexte & enjeux
+        if contexte:
+            exp_label(doc, "Contexte & enjeux :")
+            if isinstance(contexte, list):
+                for c in contexte:
+                    exp_item(doc, c)
+            else:
+                exp_body(doc, contexte)
+
+        # Objectifs
+        if objectifs:
+            exp_label(doc, "Objectifs :")
+            for o in objectifs:
+                exp_item(doc, o)
+
+        # Réalisations (premier terme en gras)
+        reals = realisations if realisations else missions
+        if reals:
+            exp_label(doc, "Réalisations :")
+            for r in reals:
+                exp_item_bold_prefix(doc, r)
+
+        # Résultats / impacts
+        if resultats:
+            exp_label(doc, "Résultats / impacts :")
+            for r in resultats:
+                exp_item(doc, r)
+
+        # Environnement
+        if environnement:
+            exp_label(doc, "Environnement :")
+            if isinstance(environnement, list):
+                for e in environnement:
+                    exp_item(doc, e)
+            else:
+                exp_body(doc, environnement)
 
-    # ── EXPÉRIENCES PROFESSIONNELLES (nouvelle page) ──────────────────────────
-    experiences = cv_data.get("experiences", [])
-    if experiences:
-        # Titre avec saut de page avant
-        exp_section_title(doc)
-
-        badge_id = 100
-        for exp in experiences:
-            periode       = exp.get("periode", "")
-            entreprise    = exp.get("entreprise", "")
-            poste         = exp.get("poste", "")
-            direction     = exp.get("direction", "")
-            contexte      = exp.get("contexte", "")
-            objectifs     = exp.get("objectifs", [])
-            missions      = exp.get("missions", [])
-            realisations  = exp.get("realisations", [])
-            resultats     = exp.get("resultats", [])
-            environnement = exp.get("environnement", "")
-
-            # Badge période + entreprise
-            exp_badge_line(doc, periode, entreprise, badge_id=badge_id)
-            badge_id += 1
-
-            # Poste centré gras
-            if poste:
-                exp_poste(doc, poste)
-
-            # Direction (si présente)
-            if direction:
-                p = doc.add_paragraph()
-                p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                sp(p, before=0, after=2)
-                sf(p.add_run(direction), size_pt=10, bold=True, color=BLACK)
-
-            # Contexte & enjeux
-            if contexte:
-                exp_label(doc, "Contexte & enjeux :")
-                if isinstance(contexte, list):
-                    for c in contexte:
-                        exp_item(doc, c)
-                else:
-                    exp_body(doc, contexte)
-
-            # Objectifs
-            if objectifs:
-                exp_label(doc, "Objectifs :")
-                for o in objectifs:
-                    exp_item(doc, o)
-
-            # Réalisations (premier terme en gras)
-            reals = realisations if realisations else missions
-            if reals:
-                exp_label(doc, "Réalisations :")
-                for r in reals:
-                    exp_item_bold_prefix(doc, r)
-
-            # Résultats / impacts
-            if resultats:
-                exp_label(doc, "Résultats / impacts :")
-                for r in resultats:
-                    exp_item(doc, r)
-
-            # Environnement
-            if environnement:
-                exp_label(doc, "Environnement :")
-                if isinstance(environnement, list):
-                    for e in environnement:
-                        exp_item(doc, e)
-                else:
-                    exp_body(doc, environnement)
-
-            # Séparateur entre expériences
-            p_sep = doc.add_paragraph()
-            sp(p_sep, before=6, after=0)
-
-    # ── PIED DE PAGE ─────────────────────────────────────────────────────────
-    build_footer(doc)
-
-    doc.save(output_path)
-    return output_path
+        # Séparateur entre expériences
+        para(doc, S.EXP_SEPARATOR)
@@ -1,24 +1,30 @@
 """
 cv_parser.py — Extraction du texte brut depuis un CV PDF ou DOCX
 """
+import io
 import os
 import pdfplumber
 from docx import Document
 
+import instrumentation
 
-def extract_text_from_pdf(filepath: str) -> str:
-    """Extrait le texte d'un fichier PDF."""
+# Séparateur de pages PDF (exploité par text_normalizer pour les en-têtes / pieds répétés)
+PAGE_BREAK = "\f"
+
+
+def extract_text_from_pdf(filepath) -> str:
+    """Extrait le texte d'un fichier PDF (chemin ou fichier ouvert en binaire)."""
     text = []
     with pdfplumber.open(filepath) as pdf:
         for page in pdf.pages:
             page_text = page.extract_text()
             if page_text:
                 text.append(page_text)
-    return "\n".join(text)
+    return f"\n{PAGE_BREAK}\n".join(text)
 
 
-def extract_text_from_docx(filepath: str) -> str:
-    """Extrait le texte d'un fichier DOCX."""
+def extract_text_from_docx(filepath) -> str:
+    """Extrait le texte d'un fichier DOCX (chemin ou fichier ouvert en binaire)."""
     doc = Document(filepath)
     paragraphs = []
     for para in doc.paragraphs:
@@ -33,12 +39,35 @@ def extract_text_from_docx(filepath: str) -> str:
     return "\n".join(paragraphs)
 
 
-def extract_cv_text(filepath: str) -> str:
-    """Détecte le type de fichier et extrait le texte."""
-    ext = os.path.splitext(filepath)[1].lower()
+def _sniff_format(stream, filename: str = None) -> str:
+    """Format d'un contenu en mémoire : signature du fichier, sinon extension de `filename`."""
+    pos = stream.tell()
+    head = stream.read(4)
+    stream.seek(pos)
+    if head.startswith(b"%PDF"):
+        return ".pdf"
+    if head.startswith(b"PK"):      # DOCX = archive ZIP
+        return ".docx"
+    return os.path.splitext(filename or "")[1].lower()
+
+
+def extract_cv_text(source, filename: str = None) -> str:
+    """
+    Détecte le type de fichier et extrait le texte.
+    source : chemin, contenu (bytes) ou fichier ouvert en binaire ; pour un contenu
+    en mémoire, `filename` sert seulement si la signature du fichier n'est pas reconnue.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        ext = os.path.splitext(source)[1].lower()
+    else:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        ext = _sniff_format(source, filename)
     if ext == ".pdf":
-        return extract_text_from_pdf(filepath)
+        with instrumentation.timed("extract_text_from_pdf"):
+            return extract_text_from_pdf(source)
     elif ext in (".docx", ".doc"):
-        return extract_text_from_docx(filepath)
+        with instrumentation.timed("extract_text_from_docx"):
+            return extract_text_from_docx(source)
     else:
         raise ValueError(f"Format non supporté : {ext}. Utilisez PDF ou DOCX.")
@@ -0,0 +1,146 @@
+"""
+cv_preextract.py — Pré-extraction locale (règles + regex) des champs simples du CV
+
+Les langues et les années d'expérience sont trouvées directement dans le texte
+brut : kimi_extractor retire alors ces champs du prompt, et Kimi ne dépense ses
+tokens que sur ce qui demande de la compréhension.
+"""
+import re
+from datetime import date
+
+import cv_segmenter
+
+# ── Expressions précompilées ─────────────────────────────────────────────────
+_MONTHS = {
+    "jan": 1, "fev": 2, "feb": 2, "mar": 3, "avr": 4, "apr": 4, "mai": 5, "may": 5,
+    "juin": 6, "jun": 6, "juil": 7, "jul": 7, "aou": 8, "aug": 8, "sep": 9, "oct": 10,
+    "nov": 11, "dec": 12,
+}
+_POINT_RE = re.compile(r"(?:(?P<month>[a-z]{3,9})\.?\s+|(?P<mm>\d{1,2})\s*/\s*)?(?P<year>(?:19|20)\d{2})")
+_ONGOING_RE = re.compile(r"aujourd|present|now|current|actuel|en cours")
+
+LANGUAGES = {
+    "francais": "Français", "french": "Français",
+    "anglais": "Anglais", "english": "Anglais",
+    "arabe": "Arabe", "arabic": "Arabe",
+    "espagnol": "Espagnol", "spanish": "Espagnol",
+    "allemand": "Allemand", "german": "Allemand",
+    "italien": "Italien", "italian": "Italien",
+    "portugais": "Portugais", "portuguese": "Portugais",
+    "neerlandais": "Néerlandais", "dutch": "Néerlandais",
+    "chinois": "Chinois", "mandarin": "Chinois", "chinese": "Chinois",
+    "japonais": "Japonais", "japanese": "Japonais",
+    "russe": "Russe", "russian": "Russe",
+    "turc": "Turc", "turkish": "Turc",
+    "amazighe": "Amazighe", "berbere": "Amazighe", "tamazight": "Amazighe",
+    "wolof": "Wolof", "bambara": "Bambara", "swahili": "Swahili",
+}
+LEVELS = {
+    "langue maternelle": "langue maternelle", "maternelle": "langue maternelle", "natif": "natif",
+    "native": "natif", "bilingue": "bilingue", "bilingual": "bilingue", "courant": "courant",
+    "fluent": "courant", "professionnel": "professionnel", "professional": "professionnel",
+    "intermediaire": "intermédiaire", "intermediate": "intermédiaire", "notions": "notions",
+    "debutant": "débutant", "beginner": "débutant", "basic": "notions", "scolaire": "scolaire",
+}
+_LANG_RE = re.compile(r"\b(" + "|".join(sorted(LANGUAGES, key=len, reverse=True)) + r")\b")
+_LEVEL_RE = re.compile(r"\b(" + "|".join(sorted(LEVELS, key=len, reverse=True)) + r"|[abc][12])\b")
+
+# Champs du prompt « infos » que la pré-extraction peut remplacer
+PROMPT_FIELDS = ("annees_experience", "langues")
+
+
+# ── Extracteurs ──────────────────────────────────────────────────────────────
+def _month_index(point) -> int:
+    """Date → nombre de mois depuis l'an 0 (janvier si le mois est inconnu)."""
+    year = int(point.group("year"))
+    month = 1
+    if point.group("mm"):
+        month = min(max(int(point.group("mm")), 1), 12)
+    elif point.group("month"):
+        month = _MONTHS.get(point.group("month")[:4], _MONTHS.get(point.group("month")[:3], 1))
+    return year * 12 + month - 1
+
+
+def find_date_ranges(text: str, today: date = None) -> list:
+    """Plages (début, fin) en mois absolus ; « aujourd'hui / présent » = mois courant."""
+    today = today or date.today()
+    now = today.year * 12 + today.month - 1
+    ranges = []
+    for m in cv_segmenter.DATE_RANGE_RE.finditer(text):
+        raw = cv_segmenter.fold_text(m.group(0))
+        points = list(_POINT_RE.finditer(raw))
+        if not points:
+            continue
+        start = _month_index(points[0])
+        if len(points) > 1:
+            end = _month_index(points[1])
+            if not (points[1].group("month") or points[1].group("mm")):
+                end += 11  # « 2019 – 2021 » : jusqu'à la fin de l'année de fin
+        elif _ONGOING_RE.search(raw):
+            end = now
+        else:
+            continue
+        if start <= end <= now + 12:
+            ranges.append((start, end))
+    return ranges
+
+
+def years_of_experience(ranges: list):
+    """Durée couverte par l'union des plages (les missions simultanées ne comptent qu'une fois)."""
+    if not ranges:
+        return None
+    months, cur_start, cur_end = 0, None, None
+    for start, end in sorted(ranges):
+        if cur_end is None or start > cur_end + 1:
+            if cur_end is not None:
+                months += cur_end - cur_start + 1
+            cur_start, cur_end = start, end
+        else:
+            cur_end = max(cur_end, end)
+    months += cur_end - cur_start + 1
+    years = months // 12
+    if years < 1:
+        return None
+    return f"{years} an{'s' if years > 1 else ''} d'expérience"
+
+
+def find_languages(section_text: str) -> list:
+    """Langues (et niveau s'il est indiqué sur la même ligne) d'une section « Langues »."""
+    found, seen = [], set()
+    for line in section_text.split("\n"):
+        folded = cv_segmenter.fold_text(line)
+        # Plusieurs langues sur une ligne : « Français, Anglais (courant) »
+        for part in re.split(r"[,;/|]", folded):
+            langs = [LANGUAGES[m.group(1)] for m in _LANG_RE.finditer(part)]
+            level = _LEVEL_RE.search(part) if len(langs) == 1 else None
+            for label in langs:
+                if label in seen:
+                    continue
+                seen.add(label)
+                if level:
+                    lvl = level.group(1)
+                    label += f" ({LEVELS.get(lvl, lvl.upper())})"
+                found.append(label)
+    return found
+
+
+def pre_extract(text: str, sections: dict = None) -> dict:
+    """
+    Champs trouvés localement, au format de cv_data. Un champ absent du résultat
+    reste à la charge de Kimi.
+    """
+    sections = sections if sections is not None else cv_segmenter.split_sections(text)
+    fields = {}
+
+    if "langues" in sections:
+        langues = find_languages(sections["langues"])
+        if langues:
+            fields["langues"] = langues
+
+    # Sans section « Expériences » identifiée, les dates de formation fausseraient le calcul
+    if "experiences" in sections:
+        annees = years_of_experience(find_date_ranges(sections["experiences"]))
+        if annees:
+            fields["annees_experience"] = annees
+
+    return fields
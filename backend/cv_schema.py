@@ -0,0 +1,115 @@
+"""
+cv_schema.py — Validation des données structurées d'un CV (cv_data)
+
+Vérifie un document cv_data venu de l'extérieur (POST /render, convert.py
+--from-json) avant de le confier à generate_maltem_cv : mêmes champs que ceux
+produits par kimi_extractor. Les écarts sans ambiguïté sont corrigés (null →
+valeur vide, nombre → texte, texte seul → liste) ; le reste lève ValueError
+avec le chemin du champ fautif, ex. « experiences[2].missions : liste attendue ».
+"""
+
+TEXT_FIELDS = ("nom_prenom", "titre_poste", "annees_experience")
+TEXT_LIST_FIELDS = ("certifications", "langues", "projets_marquants")
+
+EXPERIENCE_TEXT_FIELDS = ("periode", "entreprise", "poste", "direction")
+EXPERIENCE_LIST_FIELDS = ("objectifs", "missions", "realisations", "resultats")
+# Texte ou liste de textes, les deux sont mis en forme par cv_formatter
+EXPERIENCE_MIXED_FIELDS = ("contexte", "environnement")
+
+FORMATION_FIELDS = ("annee", "diplome", "etablissement")
+REFERENCE_FIELDS = ("entreprise", "poste")
+
+MAX_ITEMS = 500          # éléments par liste
+MAX_TEXT = 20000         # caractères par texte
+
+
+def _text(value, path: str) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"{path} : texte attendu")
+    value = str(value)
+    if len(value) > MAX_TEXT:
+        raise ValueError(f"{path} : texte trop long ({MAX_TEXT} caractères max)")
+    return value
+
+
+def _list(value, path: str) -> list:
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise ValueError(f"{path} : liste attendue")
+    if len(value) > MAX_ITEMS:
+        raise ValueError(f"{path} : trop d'éléments ({MAX_ITEMS} max)")
+    return value
+
+
+def _text_list(value, path: str) -> list:
+    if isinstance(value, str):
+        value = [value]
+    return [_text(item, f"{path}[{i}]") for i, item in enumerate(_list(value, path))]
+
+
+def _text_or_list(value, path: str):
+    return _text_list(value, path) if isinstance(value, list) else _text(value, path)
+
+
+def _object(value, path: str) -> dict:
+    if not isinstance(value, dict):
+        raise ValueError(f"{path} : objet attendu")
+    return value
+
+
+def validate_cv_data(data) -> dict:
+    """Retourne une copie normalisée de `data`, prête pour generate_maltem_cv ; lève ValueError sinon."""
+    data = _object(data, "cv_data")
+    cv = dict(data)
+
+    for field in TEXT_FIELDS:
+        cv[field] = _text(data.get(field), field)
+    for field in TEXT_LIST_FIELDS:
+        cv[field] = _text_list(data.get(field), field)
+    cv["a_propos"] = _text_or_list(data.get("a_propos"), "a_propos")
+
+    competences = []
+    for i, cat in enumerate(_list(data.get("competences"), "competences")):
+        path = f"competences[{i}]"
+        cat = _object(cat, path)
+        competences.append({**cat,
+                            "categorie": _text(cat.get("categorie"), f"{path}.categorie"),
+                            "items": _text_list(cat.get("items"), f"{path}.items")})
+    cv["competences"] = competences
+
+    formations = []
+    for i, form in enumerate(_list(data.get("formations"), "formations")):
+        path = f"formations[{i}]"
+        form = _object(form, path)
+        formations.append({**form, **{f: _text(form.get(f), f"{path}.{f}") for f in FORMATION_FIELDS}})
+    cv["formations"] = formations
+
+    references = []
+    for i, ref in enumerate(_list(data.get("autres_references"), "autres_references")):
+        path = f"autres_references[{i}]"
+        if isinstance(ref, dict):
+            references.append({**ref, **{f: _text(ref.get(f), f"{path}.{f}") for f in REFERENCE_FIELDS}})
+        else:
+            references.append(_text(ref, path))
+    cv["autres_references"] = references
+
+    experiences = []
+    for i, exp in enumerate(_list(data.get("experiences"), "experiences")):
+        path = f"experiences[{i}]"
+        exp = _object(exp, path)
+        clean = dict(exp)
+        for field in EXPERIENCE_TEXT_FIELDS:
+            clean[field] = _text(exp.get(field), f"{path}.{field}")
+        for field in EXPERIENCE_LIST_FIELDS:
+            clean[field] = _text_list(exp.get(field), f"{path}.{field}")
+        for field in EXPERIENCE_MIXED_FIELDS:
+            clean[field] = _text_or_list(exp.get(field), f"{path}.{field}")
+        experiences.append(clean)
+    cv["experiences"] = experiences
+
+    if not (cv["nom_prenom"] or cv["titre_poste"] or cv["experiences"]):
+        raise ValueError("cv_data : au moins nom_prenom, titre_poste ou une expérience est requis")
+    return cv
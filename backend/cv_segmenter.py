@@ -0,0 +1,128 @@
+"""
+cv_segmenter.py — Découpage du texte brut d'un CV en sections et en blocs d'expériences
+
+Sert à traiter les CV longs sans tronquer : chaque morceau reçoit son propre
+prompt Kimi, les appels partent en parallèle puis les résultats sont fusionnés.
+"""
+import re
+import unicodedata
+
+# ── Titres de sections reconnus (FR / EN), comparés sans accents ni casse ────
+SECTION_HEADINGS = {
+    "a_propos": ["a propos", "profil", "resume", "synthese", "presentation", "summary",
+                 "profile", "about me", "about", "objective"],
+    "experiences": ["experiences professionnelles", "experience professionnelle", "experiences",
+                    "experience", "parcours professionnel", "parcours", "professional experience",
+                    "work experience", "employment history", "career history"],
+    "competences": ["competences techniques", "competences", "savoir-faire", "skills",
+                    "technical skills", "core competencies", "expertise"],
+    "formation": ["formations", "formation", "education", "diplomes", "cursus",
+                  "academic background", "etudes"],
+    "certifications": ["certifications", "certification", "certificats", "certificates"],
+    "langues": ["langues", "langue", "languages", "language skills"],
+    "projets": ["projets marquants", "projets", "realisations marquantes", "projects", "key projects"],
+    "references": ["autres references", "references", "references clients"],
+    "divers": ["centres d'interet", "loisirs", "interets", "interests", "hobbies", "divers"],
+}
+
+_HEADING_MAX_LEN = 60
+
+_heading_re = re.compile(
+    r"^(?:\d+[.)]?\s*)?(?P<title>"
+    + "|".join(sorted({re.escape(t) for ts in SECTION_HEADINGS.values() for t in ts}, key=len, reverse=True))
+    + r")\s*[:\-–]?\s*$"
+)
+_heading_kind = {t: kind for kind, ts in SECTION_HEADINGS.items() for t in ts}
+
+# ── Plages de dates ouvrant un bloc d'expérience ─────────────────────────────
+_MONTH = (r"(?:janv?|f[ée]vr?|mars|avr|mai|juin|juil|ao[uû]t|sept?|oct|nov|d[ée]c|jan|feb|mar|apr|may|jun|jul"
+          r"|aug|sep|dec)[a-zéû]*\.?")
+_DATE = rf"(?:(?:{_MONTH}\s+|\d{{1,2}}\s*/\s*)?(?:19|20)\d{{2}})"
+_END = rf"(?:{_DATE}|aujourd'hui|aujourd’hui|pr[ée]sent|present|now|current|actuel(?:lement)?|en cours)"
+DATE_RANGE_RE = re.compile(rf"(?i)\b{_DATE}\s*(?:-|–|—|à|au|to|until)\s*{_END}")
+
+
+def fold_text(line: str) -> str:
+    """Minuscules, sans accents ni ponctuation de bord."""
+    text = unicodedata.normalize("NFKD", line).encode("ascii", "ignore").decode("ascii")
+    return text.lower().strip(" \t•●▪■-*:|")
+
+
+def heading_kind(line: str):
+    """Type de section si la ligne est un titre connu, sinon None."""
+    line = line.strip()
+    if not line or len(line) > _HEADING_MAX_LEN:
+        return None
+    m = _heading_re.match(fold_text(line))
+    return _heading_kind[m.group("title")] if m else None
+
+
+def split_sections(text: str) -> dict:
+    """
+    Découpe le texte en sections : {"head": en-tête avant le 1er titre, "<type>": texte, ...}.
+    Une section présente plusieurs fois (ex. une par page) est concaténée.
+    """
+    sections = {"head": []}
+    current = "head"
+    for line in text.split("\n"):
+        kind = heading_kind(line)
+        if kind:
+            current = kind
+            sections.setdefault(current, [])
+            continue
+        sections[current].append(line)
+    return {k: "\n".join(v).strip() for k, v in sections.items() if "\n".join(v).strip()}
+
+
+def split_experiences(text: str, context_lines: int = 2) -> list:
+    """
+    Découpe une section d'expériences en blocs, un par plage de dates.
+    Les `context_lines` lignes qui précèdent une date (souvent entreprise / poste)
+    sont rattachées au bloc de cette date.
+    """
+    lines = text.split("\n")
+    starts = [i for i, line in enumerate(lines) if DATE_RANGE_RE.search(line)]
+    if len(starts) < 2:
+        return [text] if text.strip() else []
+
+    cuts = [0]
+    for i in starts[1:]:
+        cut = max(i - context_lines, cuts[-1] + 1)
+        # Ne pas remonter au-delà d'une ligne vide ou d'une puce (fin du bloc précédent)
+        for j in range(i - 1, cut - 1, -1):
+            if not lines[j].strip() or lines[j].lstrip()[:1] in "-•●▪■*":
+                cut = j + 1
+                break
+        cuts.append(min(cut, i))
+    cuts.append(len(lines))
+    blocks = ["\n".join(lines[a:b]).strip() for a, b in zip(cuts, cuts[1:])]
+    return [b for b in blocks if b]
+
+
+def pack(blocks: list, max_chars: int) -> list:
+    """Regroupe des blocs consécutifs en morceaux d'au plus `max_chars` caractères."""
+    chunks, current = [], ""
+    for block in blocks:
+        while len(block) > max_chars:
+            # Bloc trop long à lui seul : coupe à la dernière fin de ligne possible
+            cut = block.rfind("\n", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(block[:cut])
+            block = block[cut:].lstrip("\n")
+        if current and len(current) + 1 + len(block) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{block}" if current else block
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def experience_chunks(text: str, max_chars: int) -> list:
+    """Morceaux de texte d'expériences prêts pour un appel Kimi chacun."""
+    sections = split_sections(text)
+    source = sections.get("experiences") or text
+    return pack(split_experiences(source), max_chars)
@@ -0,0 +1,125 @@
+"""
+cv_styles.py — Styles nommés du CV Maltem (paragraphes et caractères)
+
+Toute la mise en forme répétée du CV (police, taille, gras, couleur,
+espacements, retraits, bordures, keepWithNext) est décrite ici une seule fois,
+sous forme de styles Word ajoutés à styles.xml par install() dans le squelette.
+Les builders de cv_formatter ne posent plus que la référence au style
+(<w:pStyle>, <w:rStyle>) : document.xml ne répète plus ces propriétés sur
+chaque paragraphe et chaque run.
+
+Règle : un style de caractère gras (STRONG, COMPANY) ne s'applique que dans un
+paragraphe dont le style n'est pas déjà gras. Le gras est une propriété
+« bascule » dans Word : gras de paragraphe + gras de caractère = non gras.
+"""
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.shared import Pt
+
+FONT = "Century Gothic"
+
+RED   = "C00000"
+TITLE = "BE3B4E"
+BLACK = "111111"
+GREY  = "606060"
+RULE  = "231F20"
+
+# ─── IDENTIFIANTS ─────────────────────────────────────────────────────────────
+# Paragraphes
+NAME               = "MaltemNom"
+JOB_TITLE          = "MaltemTitrePoste"
+RULE_LINE          = "MaltemLigne"
+SECTION_TITLE      = "MaltemTitreSection"
+ABOUT              = "MaltemAPropos"
+COMPETENCE_CAT     = "MaltemCompetenceCategorie"
+COMPETENCE_ITEM    = "MaltemCompetenceItem"
+FORMATION          = "MaltemFormation"
+LIST_ITEM          = "MaltemListe"
+REFERENCE          = "MaltemReference"
+PROJECT            = "MaltemProjet"
+EXP_TITLE          = "MaltemExpTitre"
+EXP_HEADING        = "MaltemExpBadge"
+EXP_ROLE           = "MaltemExpPoste"
+EXP_LABEL          = "MaltemExpLabel"
+EXP_BODY           = "MaltemExpCorps"
+EXP_ITEM           = "MaltemExpItem"
+EXP_SEPARATOR      = "MaltemExpSeparateur"
+FOOTER             = "MaltemPiedDePage"
+# Caractères
+STRONG             = "MaltemGras"
+COMPANY            = "MaltemEntreprise"
+
+# ─── DÉFINITIONS ──────────────────────────────────────────────────────────────
+# Paragraphes : (id, nom affiché dans Word, pPr, rPr). Espacements en points
+# (before, after, line en 240e d'interligne), comme sp() dans cv_formatter.
+
+def _spacing(before, after, line=240):
+    return (f'<w:spacing w:before="{int(before * 20)}" w:after="{int(after * 20)}" '
+            f'w:line="{line}" w:lineRule="auto"/>')
+
+
+def _border(side, color=RULE):
+    return f'<w:pBdr><w:{side} w:val="single" w:sz="6" w:space="1" w:color="{color}"/></w:pBdr>'
+
+
+_KEEP = '<w:keepNext/>'
+_IND  = '<w:ind w:left="{}"/>'.format
+_JC   = '<w:jc w:val="{}"/>'.format
+_B    = '<w:b/>'
+_COLOR = '<w:color w:val="{}"/>'.format
+_SZ   = '<w:sz w:val="{}"/>'.format
+
+PARAGRAPH_STYLES = (
+    (NAME,            "Maltem Nom",                 _spacing(4, 2) + _JC("center"),                        _SZ(28)),
+    (JOB_TITLE,       "Maltem Titre du poste",      _spacing(0, 4) + _JC("center"),                        _B + _SZ(28)),
+    (RULE_LINE,       "Maltem Ligne",               _border("bottom"),                                     ""),
+    (SECTION_TITLE,   "Maltem Titre de section",    _KEEP + _border("bottom") + _spacing(10, 4) + _JC("left"), _B + _COLOR(BLACK)),
+    (ABOUT,           "Maltem À propos",            _spacing(8, 8, 276) + _IND(426) + _JC("both"),         _COLOR(BLACK)),
+    (COMPETENCE_CAT,  "Maltem Catégorie compétences", _spacing(6, 2) + _JC("left"),                        _B + _COLOR(BLACK)),
+    (COMPETENCE_ITEM, "Maltem Compétence",          _spacing(0, 0) + _IND(283) + _JC("left"),              _COLOR(BLACK)),
+    (FORMATION,       "Maltem Formation",           _spacing(4, 2) + _JC("left"),                          _COLOR(BLACK)),
+    (LIST_ITEM,       "Maltem Liste",               _spacing(0, 0) + _IND(426) + _JC("left"),              _COLOR(BLACK)),
+    (REFERENCE,       "Maltem Référence",           _spacing(2, 2) + _JC("left"),                          _COLOR(BLACK)),
+    (PROJECT,         "Maltem Projet",              _spacing(1, 1) + _IND(426) + _JC("both"),              _COLOR(BLACK)),
+    (EXP_TITLE,       "Maltem Titre expériences",   _spacing(4, 4) + _JC("center"),                        _B + _COLOR(TITLE) + _SZ(24)),
+    (EXP_HEADING,     "Maltem Période et client",   _KEEP + _spacing(10, 2) + _IND(1800) + _JC("left"),    ""),
+    (EXP_ROLE,        "Maltem Poste",               _spacing(2, 6) + _JC("center"),                        _B + _COLOR(BLACK)),
+    (EXP_LABEL,       "Maltem Label expérience",    _KEEP + _spacing(8, 2) + _JC("left"),                  _B + _COLOR(BLACK)),
+    (EXP_BODY,        "Maltem Texte expérience",    _spacing(0, 2, 252) + _IND(426) + _JC("both"),         _COLOR(BLACK)),
+    (EXP_ITEM,        "Maltem Item expérience",     _spacing(1, 1, 252) + _IND(426) + _JC("both"),         _COLOR(BLACK)),
+    (EXP_SEPARATOR,   "Maltem Séparateur",          _spacing(6, 0),                                        ""),
+    (FOOTER,          "Maltem Pied de page",
+     _border("top", "auto") + '<w:tabs><w:tab w:val="center" w:pos="4536"/><w:tab w:val="right" w:pos="9026"/></w:tabs>'
+     + _spacing(0, 0) + _JC("left"),                                                                       _COLOR(GREY) + _SZ(16)),
+)
+
+# Caractères : (id, nom, rPr)
+CHARACTER_STYLES = (
+    (STRONG,  "Maltem Gras",       _B + _COLOR(BLACK)),
+    (COMPANY, "Maltem Entreprise", _B + _COLOR(RED)),
+)
+
+
+def _style(kind, style_id, name, ppr, rpr, based_on):
+    return parse_xml(
+        f'<w:style {nsdecls("w")} w:type="{kind}" w:customStyle="1" w:styleId="{style_id}">'
+        f'<w:name w:val="{name}"/><w:basedOn w:val="{based_on}"/><w:qFormat/>'
+        + (f'<w:pPr>{ppr}</w:pPr>' if ppr else '')
+        + (f'<w:rPr>{rpr}</w:rPr>' if rpr else '')
+        + '</w:style>')
+
+
+def install(doc):
+    """Police et taille du style Normal, puis ajout des styles Maltem à styles.xml (une fois, dans le squelette)."""
+    normal = doc.styles["Normal"]
+    normal.font.size = Pt(10)
+    # Police explicite sur les quatre plages : les runs n'ont plus leur propre <w:rFonts>
+    rFonts = normal.element.get_or_add_rPr().get_or_add_rFonts()
+    for attr in ("w:ascii", "w:hAnsi", "w:eastAsia", "w:cs"):
+        rFonts.set(qn(attr), FONT)
+
+    styles = doc.styles.element
+    for style_id, name, ppr, rpr in PARAGRAPH_STYLES:
+        styles.append(_style("paragraph", style_id, name, ppr, rpr, "Normal"))
+    for style_id, name, rpr in CHARACTER_STYLES:
+        styles.append(_style("character", style_id, name, "", rpr, "DefaultParagraphFont"))
@@ -0,0 +1,166 @@
+"""
+docx_stream.py — Moteur de rendu DOCX en flux (DOCX_ENGINE=stream)
+
+Même entrée / sortie que cv_formatter.generate_maltem_cv, sans arbre
+python-docx complet ni doc.save :
+- les parties fixes du paquet (styles, pied de page, images, thème, relations…)
+  sont celles du squelette, compressées une fois par processus dans un ZIP
+  modèle ; chaque CV commence par une copie de ces octets ;
+- word/document.xml est ajouté à ce ZIP et écrit au fil de l'eau par
+  lxml.etree.xmlfile : début du corps du squelette (bandeau), puis chaque bloc
+  produit par cv_formatter.build_body, écrit (et compressé) dès que le bloc
+  suivant commence, puis la mise en page (sectPr).
+
+Les builders sont ceux de cv_formatter, appelés sur un StreamBody à la place du
+Document : le balisage produit est le même (badges, ancres, tableau des
+compétences, champs du pied de page), ce que vérifie
+bench/check_stream_engine.py. La mémoire ne dépend plus de la longueur du CV :
+un seul bloc vit à la fois. Pas d'événement docx_save : l'écriture du fichier
+se fait pendant la construction (docx_generation la couvre en entier).
+
+Limite : le corps variable ne peut pas ajouter de partie au paquet (image,
+lien hypertexte…). Ce qui en a besoin va dans le squelette. Les builders ne
+voient la partie du squelette, partagée par tout le processus, qu'à travers
+_ReadOnlyPart : toute autre opération que la recherche d'un style lève
+ReadOnlyPartError au lieu de modifier tous les documents suivants.
+"""
+import io
+import os
+import zipfile
+import threading
+
+from lxml import etree
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.oxml.table import CT_Tbl
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+import cv_formatter
+
+DOCUMENT_XML = "word/document.xml"
+
+
+class ReadOnlyPartError(Exception):
+    """Le corps en flux a tenté de modifier la partie partagée du squelette (relation, image, identifiant…)."""
+
+
+class _ReadOnlyPart:
+    """Partie du squelette vue par StreamBody : recherche des styles seulement."""
+
+    _ALLOWED = frozenset(("get_style", "get_style_id"))
+
+    def __init__(self, part):
+        self._part = part
+
+    def __getattr__(self, name):
+        if name in self._ALLOWED:
+            return getattr(self._part, name)
+        raise ReadOnlyPartError(f"part.{name} indisponible pour le moteur en flux : "
+                                "la partie du squelette est partagée, ce contenu va dans le squelette.")
+
+
+class StreamBody:
+    """
+    Remplace le Document python-docx dans build_body. add_paragraph / add_table
+    retournent les mêmes objets python-docx, sur des éléments détachés ; le bloc
+    précédent est alors terminé et écrit dans le flux.
+    """
+
+    def __init__(self, xf, part, block_width):
+        self._xf = xf
+        self.part = _ReadOnlyPart(part)     # partie du squelette, en lecture (recherche des styles)
+        self._block_width = block_width
+        self._pending = None
+
+    def add_paragraph(self):
+        return Paragraph(self._start(OxmlElement("w:p")), self)
+
+    def add_table(self, rows, cols):
+        table = Table(self._start(CT_Tbl.new_tbl(rows, cols, self._block_width)), self)
+        table.style = None                  # comme Document.add_table
+        return table
+
+    def _start(self, element):
+        self.flush()
+        self._pending = element
+        return element
+
+    def flush(self):
+        if self._pending is not None:
+            self._xf.write(self._pending)
+            self._pending = None
+
+
+class _Template:
+    """ZIP du squelette sans document.xml, et document.xml du squelette découpé autour du corps."""
+
+    def __init__(self, doc):
+        saved = io.BytesIO()
+        doc.save(saved)
+        package = io.BytesIO()
+        with zipfile.ZipFile(saved) as src, zipfile.ZipFile(package, "w", zipfile.ZIP_DEFLATED) as dst:
+            for info in src.infolist():
+                if info.filename != DOCUMENT_XML:
+                    dst.writestr(info, src.read(info))
+        self.package = package.getvalue()
+
+        self.part = doc.part
+        self.root = doc.element
+        self.body = self.root.body
+        self.sectPr = self.body.find(qn("w:sectPr"))
+        self.prefix = [el for el in self.body if el is not self.sectPr]
+        self.block_width = doc._block_width
+
+
+_template = None
+_lock = threading.Lock()
+
+
+def template() -> _Template:
+    global _template
+    if _template is None:
+        with _lock:
+            if _template is None:
+                _template = _Template(cv_formatter.SKELETON.get())
+    return _template
+
+
+def preload():
+    template()
+
+
+def _write(tpl: _Template, cv_data: dict, f):
+    f.write(tpl.package)
+    with zipfile.ZipFile(f, "a", zipfile.ZIP_DEFLATED) as zf:
+        with zf.open(DOCUMENT_XML, "w") as raw, etree.xmlfile(raw, encoding="UTF-8") as xf:
+            xf.write_declaration(standalone=True)
+            with xf.element(tpl.root.tag, dict(tpl.root.attrib), nsmap=tpl.root.nsmap):
+                for child in tpl.root:
+                    if child is not tpl.body:
+                        xf.write(child)
+                        continue
+                    with xf.element(tpl.body.tag):
+                        for el in tpl.prefix:
+                            xf.write(el)
+                        body = StreamBody(xf, tpl.part, tpl.block_width)
+                        cv_formatter.build_body(body, cv_data)
+                        body.flush()
+                        if tpl.sectPr is not None:
+                            xf.write(tpl.sectPr)
+
+
+def generate_maltem_cv(cv_data: dict, output_path):
+    """Écrit le CV Maltem dans `output_path` (chemin ou flux binaire), en flux."""
+    tpl = template()
+    if isinstance(output_path, (str, os.PathLike)):
+        with open(output_path, "w+b") as f:
+            _write(tpl, cv_data, f)
+    elif output_path.seekable() and output_path.readable():
+        _write(tpl, cv_data, output_path)
+    else:
+        # Flux en écriture seule (le mode "a" de zipfile relit le répertoire central)
+        buf = io.BytesIO()
+        _write(tpl, cv_data, buf)
+        output_path.write(buf.getvalue())
+    return output_path
@@ -0,0 +1,135 @@
+"""
+instrumentation.py — Événements de mesure du pipeline de conversion
+
+Les modules du pipeline appellent emit(event, **champs) ; les consommateurs
+(logs, CLI verbose, ...) s'abonnent avec add_listener(fn).
+Sans abonné ni conversion en cours, un emit() coûte un appel de fonction
+et deux tests.
+
+Pour les comptes par conversion (caractères, tokens, coût), le code appelant
+ouvre `with conversion() as stats:` ; les événements émis dans ce contexte, y
+compris depuis les threads lancés avec contextvars.copy_context(), y sont cumulés.
+"""
+import os
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+logger = logging.getLogger("maltem.pipeline")
+
+# Tarifs optionnels (même unité monétaire, par million de tokens) pour estimer le coût
+KIMI_PRICE_INPUT_PER_M  = float(os.environ.get("KIMI_PRICE_INPUT_PER_M", "0"))
+KIMI_PRICE_OUTPUT_PER_M = float(os.environ.get("KIMI_PRICE_OUTPUT_PER_M", "0"))
+
+_listeners = []
+_current = contextvars.ContextVar("maltem_conversion", default=None)
+
+
+def add_listener(fn):
+    """fn(event: str, fields: dict) — appelé depuis le thread qui émet l'événement."""
+    if fn not in _listeners:
+        _listeners.append(fn)
+
+
+def remove_listener(fn):
+    if fn in _listeners:
+        _listeners.remove(fn)
+
+
+def emit(event: str, **fields):
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s %s", event, fields)
+    stats = _current.get()
+    if stats is not None:
+        stats.add(event, fields)
+    for fn in tuple(_listeners):
+        try:
+            fn(event, fields)
+        except Exception:
+            logger.exception("Listener d'instrumentation en échec (%s)", event)
+
+
+@contextmanager
+def timed(stage: str, **fields):
+    """
+    Chronomètre une étape : émet « <stage>_started » puis « <stage>_finished »
+    avec sa durée. Le dict produit peut être complété par l'appelant (ex. nombre
+    de caractères) ; en cas d'exception, son type est ajouté dans « error ».
+    """
+    emit(f"{stage}_started", **fields)
+    started = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        fields["error"] = type(e).__name__
+        raise
+    finally:
+        emit(f"{stage}_finished", duration=time.perf_counter() - started, **fields)
+
+
+# ── Comptes par conversion ───────────────────────────────────────────────────
+class ConversionStats:
+    """
+    Cumul des caractères et tokens d'une conversion (thread-safe).
+    on_event(event, fields) reçoit en plus chaque événement de la conversion
+    (flux de progression d'un job, par exemple).
+    """
+
+    def __init__(self, on_event=None):
+        self.on_event = on_event
+        self._lock = threading.Lock()
+        self.chars_in = 0
+        self.chars_out = 0
+        self.kimi_calls = 0
+        self.cached_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = []
+
+    def add(self, event: str, fields: dict):
+        with self._lock:
+            if event == "text_normalized":
+                self.chars_in += fields["chars_in"]
+                self.chars_out += fields["chars_out"]
+            elif event == "kimi_call_finished":
+                self.kimi_calls += 1
+                self.cached_calls += bool(fields.get("cached"))
+                self.prompt_tokens += fields.get("prompt_tokens") or 0
+                self.completion_tokens += fields.get("completion_tokens") or 0
+                self.calls.append(fields)
+        if self.on_event:
+            self.on_event(event, fields)
+
+    @property
+    def cost(self) -> float:
+        return (self.prompt_tokens * KIMI_PRICE_INPUT_PER_M
+                + self.completion_tokens * KIMI_PRICE_OUTPUT_PER_M) / 1_000_000
+
+    def as_dict(self) -> dict:
+        return {
+            "chars_in": self.chars_in,
+            "chars_out": self.chars_out,
+            "kimi_calls": self.kimi_calls,
+            "cached_calls": self.cached_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": round(self.cost, 6),
+        }
+
+
+@contextmanager
+def conversion(on_event=None):
+    """Ouvre le cumul d'une conversion ; le résumé est journalisé à la sortie."""
+    stats = ConversionStats(on_event)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        logger.info("conversion %s", stats.as_dict())
+
+
+def current_stats():
+    return _current.get()
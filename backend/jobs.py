@@ -0,0 +1,280 @@
+"""
+jobs.py — Conversions en arrière-plan (POST /jobs, GET /jobs/<id>)
+
+Un pool borné de threads exécute le pipeline ; la requête HTTP rend la main
+tout de suite avec un identifiant de job. Un job reçoit soit le chemin de
+l'upload (résultat écrit dans `output_dir`), soit son contenu en mémoire
+(résultat gardé dans un BytesIO, sans passer par le disque). Les jobs vivent en mémoire du
+processus : avec plusieurs workers gunicorn, le suivi d'un job doit revenir
+sur le même worker (cas par défaut avec workers = 1).
+
+Un même fichier envoyé deux fois pendant sa conversion (double clic, nouvel
+essai impatient) ne relance rien : la seconde demande est rattachée au job en
+cours, repéré par l'empreinte SHA-256 du contenu, et reçoit le même résultat.
+Avec JOB_MEMO_TTL > 0, un résultat réussi sert aussi les renvois du même
+fichier pendant ce délai.
+
+Un appelant qui abandonne un job non suivi (lot dont le client s'est
+déconnecté) appelle release() : quand plus personne ne l'attend, le job
+s'arrête avant son étape suivante (pipeline.Cancelled).
+"""
+import os
+import time
+import uuid
+import hashlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import pipeline
+import instrumentation
+
+JOB_WORKERS   = max(1, int(os.environ.get("JOB_WORKERS", "2")))
+JOB_QUEUE_MAX = max(JOB_WORKERS, int(os.environ.get("JOB_QUEUE_MAX", str(max(20, 2 * JOB_WORKERS)))))   # en attente ou en cours
+JOB_TTL       = int(os.environ.get("JOB_TTL", "3600"))               # conservation après la fin (s)
+JOB_COALESCE  = os.environ.get("JOB_COALESCE", "1") != "0"           # rattache les doublons en cours
+JOB_MEMO_TTL  = int(os.environ.get("JOB_MEMO_TTL", "0"))             # réutilisation d'un résultat (s), 0 = non
+
+
+class JobQueueFull(Exception):
+    """Trop de jobs en attente : la requête doit être rejetée (503)."""
+
+
+def content_digest(source) -> str:
+    """Empreinte SHA-256 d'un upload (chemin ou contenu en bytes)."""
+    if not isinstance(source, str):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Job:
+    def __init__(self, job_id: str, source, filename: str):
+        self.id = job_id
+        self.source = source            # chemin de l'upload, ou son contenu (bytes)
+        self.filename = filename
+        self.digest = None              # empreinte du contenu (regroupement des doublons)
+        self.pinned = False             # suivi par /jobs/<id> : gardé jusqu'au TTL même après discard()
+        self.status = "queued"          # queued | running | done | error
+        self.stage = "queued"
+        self.error = None
+        self.http_status = None
+        self.retry_after = None         # délai conseillé si le job a été rejeté pour surcharge (429)
+        self.output_path = None
+        self.output = None              # BytesIO du DOCX pour un job en mémoire
+        self.download_name = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.done = threading.Event()
+        self.cancelled = threading.Event()  # vérifié par le pipeline entre deux étapes
+        self.waiters = 0                # appelants rattachés (submit), moins ceux qui ont appelé release()
+        self._callbacks = []
+        self.events = []
+        self._events_changed = threading.Condition()
+
+    # ── Événements de progression (flux SSE) ─────────────────────────────────
+    def add_event(self, event: str, fields: dict = None):
+        with self._events_changed:
+            self.events.append({
+                "seq": len(self.events),
+                "event": event,
+                "t": round(time.time() - self.created_at, 3),
+                **(fields or {}),
+            })
+            self._events_changed.notify_all()
+
+    def events_since(self, index: int, timeout: float) -> tuple:
+        """Événements à partir de `index` (attend au plus `timeout` s) et fin du job."""
+        with self._events_changed:
+            if index >= len(self.events) and not self.done.is_set():
+                self._events_changed.wait(timeout)
+            return self.events[index:], self.done.is_set()
+
+    def add_done_callback(self, fn):
+        """fn(job) à la fin du job (tout de suite s'il est déjà terminé)."""
+        with self._events_changed:
+            if not self.done.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def to_dict(self) -> dict:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "filename": self.filename,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == "done":
+            data["result_url"] = f"/jobs/{self.id}/result"
+            data["download_name"] = self.download_name
+        if self.status == "error":
+            data["error"] = self.error
+        return data
+
+
+class JobManager:
+    def __init__(self, output_dir: str, workers: int = JOB_WORKERS,
+                 max_pending: int = JOB_QUEUE_MAX, ttl: int = JOB_TTL, store=None,
+                 coalesce: bool = JOB_COALESCE, memo_ttl: int = JOB_MEMO_TTL):
+        self.output_dir = output_dir
+        self.store = store              # retention.OutputStore qui indexe les DOCX écrits
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.coalesce = coalesce
+        self.memo_ttl = memo_ttl
+        self._jobs = {}
+        self._by_digest = {}            # empreinte → job en cours, ou terminé depuis moins de memo_ttl
+        self.coalesced = {"inflight": 0, "memo": 0}
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        # Pool créé au premier job, et recréé après un fork
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def submit(self, source, filename: str, pinned: bool = True) -> Job:
+        """
+        source : chemin du fichier uploadé (supprimé après conversion) ou contenu en bytes.
+        pinned=False pour un appelant qui attend la fin puis appelle discard() (POST /convert).
+        Un contenu identique à un job en cours (ou mémorisé) retourne ce job sans rien relancer.
+        """
+        digest = content_digest(source) if self.coalesce else None
+        with self._lock:
+            self._purge()
+            job = self._by_digest.get(digest) if digest else None
+            if job is not None and job.cancelled.is_set():
+                job = None              # abandonné : le doublon repart d'un nouveau job
+            if job is not None:
+                kind = "inflight" if not job.done.is_set() else "memo"
+                self.coalesced[kind] += 1
+                job.pinned = job.pinned or pinned
+                job.waiters += 1
+                self._jobs[job.id] = job
+            else:
+                pending = sum(1 for j in self._jobs.values() if j.status in ("queued", "running"))
+                if pending >= self.max_pending:
+                    raise JobQueueFull(f"{pending} conversions en attente")
+                job = Job(uuid.uuid4().hex, source, filename)
+                job.digest = digest
+                job.pinned = pinned
+                job.waiters = 1
+                size = os.path.getsize(source) if isinstance(source, str) else len(source)
+                job.add_event("upload_received", {"filename": filename, "bytes": size})
+                self._jobs[job.id] = job
+                if digest:
+                    self._by_digest[digest] = job
+                # Le contexte (trace de la requête, ...) suit le job dans le thread du pool
+                self._executor().submit(contextvars.copy_context().run, self._run, job)
+                return job
+        # Doublon : l'upload n'est plus utile
+        if isinstance(source, str) and os.path.exists(source):
+            os.remove(source)
+        instrumentation.emit("conversion_coalesced", kind=kind, job_id=job.id)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def discard(self, job_id: str):
+        """Oublie un job dont le résultat a été remis (libère le DOCX en mémoire), sauf s'il est suivi par /jobs."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.pinned:
+                del self._jobs[job_id]
+
+    def release(self, job: Job):
+        """
+        L'appelant n'attend plus ce job. Un job non suivi que plus personne
+        n'attend est annulé (s'il tourne encore) puis oublié.
+        """
+        with self._lock:
+            job.waiters -= 1
+            if job.waiters > 0 or job.pinned:
+                return
+            job.cancelled.set()
+            if job.done.is_set():
+                self._jobs.pop(job.id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.workers, "max_pending": self.max_pending, **counts,
+                "coalesced": dict(self.coalesced), "memo_ttl": self.memo_ttl}
+
+    # ── Exécution ────────────────────────────────────────────────────────────
+    def _run(self, job: Job):
+        job.status = "running"
+
+        def on_stage(name):
+            job.stage = name
+
+        try:
+            if isinstance(job.source, str):
+                job.output_path, job.download_name = pipeline.run_conversion(
+                    job.source, self.output_dir, unique_id=job.id[:8],
+                    on_stage=on_stage, on_event=job.add_event, cancel=job.cancelled)
+                if self.store is not None:
+                    self.store.register(job.output_path)
+            else:
+                job.output, job.download_name = pipeline.convert_in_memory(
+                    job.source, job.filename, unique_id=job.id[:8],
+                    on_stage=on_stage, on_event=job.add_event, cancel=job.cancelled)
+            job.status = "done"
+            final = ("done", {"result_url": f"/jobs/{job.id}/result", "download_name": job.download_name})
+        except Exception as e:
+            job.status = "error"
+            job.error = pipeline.error_message(e)
+            job.http_status = pipeline.error_status(e)
+            job.retry_after = getattr(e, "retry_after", None)
+            final = ("error", {"error": job.error, "http_status": job.http_status})
+        finally:
+            job.finished_at = time.time()
+            if isinstance(job.source, str) and os.path.exists(job.source):
+                os.remove(job.source)
+            job.source = None
+        # Le dernier événement est publié avant de signaler la fin aux flux SSE
+        job.add_event(*final)
+        if job.digest and (job.status == "error" or not self.memo_ttl):
+            self._forget(job)
+        with job._events_changed:
+            job.done.set()
+            callbacks, job._callbacks = job._callbacks, []
+            job._events_changed.notify_all()
+        for callback in callbacks:
+            callback(job)
+        if job.cancelled.is_set():
+            self.discard(job.id)        # abandonné : personne ne viendra chercher le résultat
+
+    def _forget(self, job: Job):
+        """Retire le job du regroupement des doublons (sans toucher à son suivi)."""
+        with self._lock:
+            if self._by_digest.get(job.digest) is job:
+                del self._by_digest[job.digest]
+
+    def _purge(self):
+        """Oublie les jobs terminés depuis plus de `ttl` secondes (appelé sous verrou)."""
+        limit = time.time() - self.ttl
+        expired = [jid for jid, j in self._jobs.items() if j.finished_at and j.finished_at < limit]
+        for jid in expired:
+            del self._jobs[jid]
+        # Résultats mémorisés expirés, ou dont le DOCX a été supprimé par le ménage
+        memo_limit = time.time() - self.memo_ttl
+        stale = [d for d, j in self._by_digest.items() if j.finished_at and (
+            j.finished_at < memo_limit or (j.output is None and not os.path.exists(j.output_path or "")))]
+        for digest in stale:
+            del self._by_digest[digest]
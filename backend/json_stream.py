@@ -0,0 +1,169 @@
+"""
+json_stream.py — Parseur JSON incrémental pour les réponses Kimi en streaming
+
+Reçoit le texte morceau par morceau et signale :
+- chaque champ de premier niveau dès que sa valeur est complète (on_field)
+- chaque élément d'un tableau de premier niveau dès qu'il est complet (on_item),
+  par exemple chaque entrée de "experiences"
+Une réponse qui ne commence pas par un objet JSON est rejetée immédiatement.
+"""
+import json
+
+_WS = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    Analyse un objet JSON de premier niveau alimenté par feed().
+    Les balises markdown (```json ... ```) autour de l'objet sont ignorées.
+    Lève ValueError dès que le flux ne peut plus être un objet JSON valide.
+    """
+
+    def __init__(self, on_field=None, on_item=None):
+        self.on_field = on_field
+        self.on_item = on_item
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._start = None        # index du '{' d'ouverture
+        self._end = None          # index après le '}' de fermeture
+        self._in_fence = False    # ligne ``` en cours d'être sautée
+        self._depth = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._expect_key = True
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+        self._value_emitted = False
+        self._item_start = None
+        self._item_index = 0
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def feed(self, chunk: str):
+        self.text += chunk
+        text = self.text
+        i = self._pos
+        n = len(text)
+        while i < n:
+            c = text[i]
+            if self._start is None:
+                i = self._scan_prelude(text, i)
+            elif self.done:
+                i = n
+                break
+            elif self._in_string:
+                self._scan_string_char(text, c, i)
+            else:
+                self._scan_char(text, c, i)
+            i += 1
+        self._pos = i
+
+    def result(self) -> dict:
+        """Objet complet ; ValueError si le flux s'est arrêté avant la fin."""
+        if not self.done:
+            raise ValueError("Réponse JSON incomplète")
+        return json.loads(self.text[self._start:self._end])
+
+    def json_text(self) -> str:
+        """Texte de l'objet JSON seul (sans balises markdown)."""
+        if self._start is None:
+            return self.text.strip()
+        return self.text[self._start:self._end or len(self.text)].strip()
+
+    # ── Analyse ──────────────────────────────────────────────────────────────
+    def _scan_prelude(self, text, i):
+        c = text[i]
+        if self._in_fence:
+            if c == "\n":
+                self._in_fence = False
+            return i
+        if c in _WS:
+            return i
+        if c == "`":
+            self._in_fence = True
+            return i
+        if c == "{":
+            self._start = i
+            self._depth = 1
+            self._stack.append("{")
+            return i
+        raise ValueError(f"Réponse Kimi non JSON (début : {text[i:i + 40]!r})")
+
+    def _scan_string_char(self, text, c, i):
+        if self._escape:
+            self._escape = False
+        elif c == "\\":
+            self._escape = True
+        elif c == '"':
+            self._in_string = False
+            if self._depth == 1 and self._expect_key:
+                self._key = json.loads(text[self._key_start:i + 1])
+
+    def _scan_char(self, text, c, i):
+        depth = self._depth
+        in_top_array = depth == 2 and self._stack[1] == "["
+        if c in _WS:
+            return
+        if c == '"':
+            self._in_string = True
+            if depth == 1 and self._expect_key:
+                self._key_start = i
+            else:
+                self._mark_value_start(i, depth, in_top_array)
+        elif c in "{[":
+            self._mark_value_start(i, depth, in_top_array)
+            self._depth += 1
+            self._stack.append(c)
+        elif c in "}]":
+            if not self._stack or {"}": "{", "]": "["}[c] != self._stack[-1]:
+                raise ValueError(f"JSON mal formé à la position {i}")
+            if in_top_array:
+                self._finish_item(text, i)
+            if depth == 1:
+                self._finish_value(text, i)
+                self.done = True
+                self._end = i + 1
+            self._depth -= 1
+            self._stack.pop()
+            if self._depth == 1:
+                self._finish_value(text, i + 1)
+        elif c == ":":
+            if depth == 1:
+                self._expect_key = False
+                self._value_start = None
+                self._value_emitted = False
+        elif c == ",":
+            if depth == 1:
+                self._finish_value(text, i)
+                self._expect_key = True
+            elif in_top_array:
+                self._finish_item(text, i)
+        else:
+            if depth == 1 and self._expect_key:
+                raise ValueError(f"JSON mal formé à la position {i}")
+            self._mark_value_start(i, depth, in_top_array)
+
+    def _mark_value_start(self, i, depth, in_top_array):
+        if depth == 1 and self._value_start is None:
+            self._value_start = i
+            self._item_index = 0
+        elif in_top_array and self._item_start is None:
+            self._item_start = i
+
+    def _finish_value(self, text, end):
+        if self._value_start is None or self._value_emitted or self._expect_key:
+            return
+        self._value_emitted = True
+        if self.on_field:
+            self.on_field(self._key, json.loads(text[self._value_start:end]))
+
+    def _finish_item(self, text, end):
+        if self._item_start is None:
+            return
+        raw = text[self._item_start:end]
+        self._item_start = None
+        if self.on_item:
+            self.on_item(self._key, self._item_index, json.loads(raw))
+        self._item_index += 1
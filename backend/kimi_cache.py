@@ -0,0 +1,223 @@
+"""
+kimi_cache.py — Cache disque des réponses Kimi, adressé par contenu (SQLite)
+
+Clé = SHA-256 du prompt, du texte envoyé, du modèle et de la température.
+Le fichier SQLite (mode WAL) est partagé sans risque entre les workers gunicorn.
+Une lecture n'écrit rien : la date de dernière lecture des entrées et les
+compteurs hits / misses sont accumulés en mémoire, puis écrits en une seule
+transaction (flush) au prochain put, avant une éviction, à la lecture des
+statistiques, ou toutes les _FLUSH_EVERY lectures.
+"""
+import os, time, json, sqlite3, hashlib, threading
+
+CACHE_ENABLED = os.environ.get("KIMI_CACHE", "1") != "0"
+CACHE_PATH    = os.environ.get("KIMI_CACHE_PATH",
+                               os.path.join(os.path.dirname(__file__), "cache", "kimi_cache.sqlite3"))
+CACHE_TTL     = int(os.environ.get("KIMI_CACHE_TTL", str(30 * 24 * 3600)))   # 30 jours
+CACHE_MAX_MB  = float(os.environ.get("KIMI_CACHE_MAX_MB", "200"))
+
+# Éviction déclenchée tous les N écritures (évite un SUM() à chaque put)
+_EVICT_EVERY = 50
+# Lectures accumulées au plus avant d'écrire last_access et les compteurs
+_FLUSH_EVERY = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    value       TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+"""
+
+
+def make_key(prompt: str, text: str, model: str, temperature: float) -> str:
+    """Empreinte SHA-256 de tout ce qui détermine la réponse du modèle."""
+    raw = json.dumps([prompt, text, model, temperature], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class KimiCache:
+    """
+    Cache clé → réponse JSON brute de Kimi.
+    - TTL : les entrées plus anciennes que `ttl` secondes sont ignorées puis purgées
+    - Taille : au-delà de `max_bytes`, les entrées les moins récemment lues sont supprimées
+    - Toute erreur SQLite est traitée comme un miss : le cache ne casse jamais une conversion
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: int = CACHE_TTL, max_mb: float = CACHE_MAX_MB):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._puts = 0
+        # Compteurs du processus courant (les compteurs globaux sont dans SQLite)
+        self.hits = 0
+        self.misses = 0
+        # Lectures pas encore écrites dans SQLite (protégées par _lock)
+        self._touched = {}              # clé → date de lecture
+        self._pending = {"hits": 0, "misses": 0}
+
+    # ── Connexion (une par thread et par processus) ──────────────────────────
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, conn, name: str, n: int = 1):
+        conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (n, name))
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def _record(self, key: str = None, now: float = None, persist: bool = True):
+        """Compte une lecture (hit si `key`) ; écrit le lot accumulé tous les _FLUSH_EVERY."""
+        with self._lock:
+            if key is not None:
+                self.hits += 1
+                self._touched[key] = now
+            else:
+                self.misses += 1
+            if not persist:
+                return
+            self._pending["hits" if key is not None else "misses"] += 1
+            due = sum(self._pending.values()) >= _FLUSH_EVERY
+        if due:
+            self.flush()
+
+    def get(self, key: str):
+        try:
+            conn = self._conn()
+            now = time.time()
+            row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self._record()
+                return None
+            self._record(key, now)
+            return row[0]
+        except sqlite3.Error:
+            self._record(persist=False)
+            return None
+
+    def flush(self):
+        """Écrit en une transaction les dates de lecture et compteurs accumulés par get()."""
+        with self._lock:
+            touched, pending = self._touched, self._pending
+            if not touched and not any(pending.values()):
+                return
+            self._touched, self._pending = {}, {"hits": 0, "misses": 0}
+        try:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                                 [(at, key) for key, at in touched.items()])
+                for name, n in pending.items():
+                    if n:
+                        self._count(conn, name, n)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            pass                        # dates et compteurs approximatifs : jamais d'erreur pour une conversion
+
+    def put(self, key: str, value: str):
+        try:
+            conn = self._conn()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            with self._lock:
+                self._puts += 1
+                due = self._puts % _EVICT_EVERY == 1
+            if due:
+                self.evict()
+            else:
+                self.flush()
+        except sqlite3.Error:
+            pass
+
+    def evict(self) -> int:
+        """Purge les entrées expirées puis, si besoin, les moins récemment lues."""
+        self.flush()                    # l'ordre LRU tient compte des lectures récentes
+        conn = self._conn()
+        removed = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute("DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl,))
+            removed += cur.rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                freed = 0
+                victims = []
+                for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+                    victims.append((key,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+                removed += len(victims)
+            if removed:
+                self._count(conn, "evictions", removed)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def stats(self) -> dict:
+        self.flush()
+        try:
+            conn = self._conn()
+            counters = dict(conn.execute("SELECT name, value FROM counters"))
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        except sqlite3.Error:
+            counters, entries, size = {}, None, None
+        return {
+            "enabled": CACHE_ENABLED,
+            "entries": entries,
+            "bytes": size,
+            "hits": counters.get("hits"),
+            "misses": counters.get("misses"),
+            "evictions": counters.get("evictions"),
+            "process_hits": self.hits,
+            "process_misses": self.misses,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> KimiCache:
+    """Instance partagée, créée à la première utilisation."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = KimiCache()
+    return _cache
+
+
+def stats() -> dict:
+    if not CACHE_ENABLED:
+        return {"enabled": False}
+    return get_cache().stats()
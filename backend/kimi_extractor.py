@@ -1,14 +1,215 @@
 """
 kimi_extractor.py — Extraction structurée du CV via Kimi K2 (NVIDIA NIM)
 """
-import os, json, requests
+import os, json, time, random, threading, contextvars, requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+
+import kimi_cache
+import instrumentation
+from admission import kimi_admission, Overloaded, KIMI_MAX_CONCURRENCY
+import cv_segmenter
+import cv_preextract
+from json_stream import IncrementalJSONParser
 
 NVIDIA_API_KEY = os.environ.get("NVIDIA_API_KEY", "")
-API_URL = "https://integrate.api.nvidia.com/v1/chat/completions"
+API_URL = os.environ.get("NVIDIA_API_URL", "https://integrate.api.nvidia.com/v1/chat/completions")
 MODEL   = "moonshotai/kimi-k2-instruct"
+TEMPERATURE = 0.1
+
+# Les 3 prompts sont indépendants → envoyés en parallèle (KIMI_PARALLEL=0 pour revenir au séquentiel)
+KIMI_PARALLEL = os.environ.get("KIMI_PARALLEL", "1") != "0"
+
+# Champs simples (langues, années d'expérience) extraits localement
+PREEXTRACT = os.environ.get("PREEXTRACT", "1") != "0"
+
+# CV plus longs que SINGLE_PASS_CHARS : découpage par sections, un appel par morceau d'expériences
+SINGLE_PASS_CHARS = 8000
+KIMI_CHUNK_CHARS  = int(os.environ.get("KIMI_CHUNK_CHARS", "6000"))
+
+# Réponses en streaming SSE, analysées au fil de l'eau (KIMI_STREAM=1)
+KIMI_STREAM = os.environ.get("KIMI_STREAM", "0") == "1"
+
+# ── Client HTTP : pool keep-alive + retries ──────────────────────────────────
+KIMI_POOL_SIZE       = int(os.environ.get("KIMI_POOL_SIZE", str(KIMI_MAX_CONCURRENCY)))
+KIMI_CONNECT_TIMEOUT = float(os.environ.get("KIMI_CONNECT_TIMEOUT", "10"))
+KIMI_READ_TIMEOUT    = float(os.environ.get("KIMI_READ_TIMEOUT", "170"))
+KIMI_MAX_RETRIES     = int(os.environ.get("KIMI_MAX_RETRIES", "3"))
+KIMI_BACKOFF_BASE    = float(os.environ.get("KIMI_BACKOFF_BASE", "1.0"))
+KIMI_BACKOFF_MAX     = float(os.environ.get("KIMI_BACKOFF_MAX", "30"))
+RETRY_STATUSES       = {429, 500, 502, 503, 504}
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Session partagée du processus (recréée après un fork)."""
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=KIMI_POOL_SIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Backoff exponentiel avec « full jitter »."""
+    return random.uniform(0, min(KIMI_BACKOFF_MAX, KIMI_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _retry_after(resp):
+    """Délai demandé par l'en-tête Retry-After (secondes ou date HTTP), sinon None."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _send_with_retry(headers: dict, payload: dict, read, info: dict = None):
+    """
+    POST vers l'API avec retries bornés sur les erreurs transitoires
+    (429/5xx, échec de connexion). Une place du contrôle d'admission est tenue
+    pendant l'appel et la lecture de la réponse (read), mais libérée pendant l'attente ;
+    Overloaded est levée si la file d'admission est pleine ou trop lente.
+    Un timeout de lecture n'est pas rejoué : la génération a déjà coûté tout le délai.
+    """
+    stream = bool(payload.get("stream"))
+    attempt = 0
+    while True:
+        with kimi_admission.slot() as slot:
+            if info is not None:
+                info["queue_wait"] = info.get("queue_wait", 0.0) + slot["queue_wait"]
+            try:
+                resp = _get_session().post(API_URL, headers=headers, json=payload, stream=stream,
+                                           timeout=(KIMI_CONNECT_TIMEOUT, KIMI_READ_TIMEOUT))
+            except requests.Timeout as e:
+                if isinstance(e, requests.ConnectTimeout) and attempt < KIMI_MAX_RETRIES:
+                    resp = None
+                else:
+                    raise RuntimeError(f"Délai dépassé pour l'API Kimi ({KIMI_READ_TIMEOUT:.0f}s)") from e
+            except requests.ConnectionError as e:
+                if attempt >= KIMI_MAX_RETRIES:
+                    raise RuntimeError(f"Erreur réseau Kimi : {e}") from e
+                resp = None
+            else:
+                if resp.status_code == 200:
+                    # Réponse entamée : une coupure pendant la lecture n'est pas rejouée
+                    try:
+                        with resp:
+                            return read(resp)
+                    except requests.RequestException as e:
+                        raise RuntimeError(f"Réponse Kimi interrompue : {e}") from e
+
+        if resp is None:
+            delay = _backoff_delay(attempt)
+        else:
+            # Réponse d'erreur : toujours fermée (retry ou exception), la connexion retourne au pool
+            try:
+                delay = _retry_after(resp) if resp.status_code in RETRY_STATUSES else None
+                if delay is None and resp.status_code in RETRY_STATUSES:
+                    delay = _backoff_delay(attempt)
+                # Erreur définitive, retries épuisés, ou Retry-After trop long pour bloquer le worker
+                if delay is None or attempt >= KIMI_MAX_RETRIES or delay > KIMI_BACKOFF_MAX:
+                    if resp.status_code == 429:
+                        # Limite de débit NVIDIA : même réponse au client qu'une file d'admission pleine
+                        raise Overloaded("Limite de débit de l'API Kimi atteinte, réessayez plus tard.",
+                                         delay or kimi_admission.retry_after())
+                    raise RuntimeError(f"Erreur API Kimi: {resp.status_code} - {resp.text[:200]}")
+            finally:
+                resp.close()
+        attempt += 1
+        time.sleep(delay)
+
+
+def _strip_fences(content: str) -> str:
+    content = content.strip()
+    if content.startswith("```"):
+        lines = content.split("\n")
+        content = "\n".join(lines[1:-1] if lines[-1].strip() == "```" else lines[1:])
+        content = content.replace("```json", "").replace("```", "").strip()
+    return content
+
+
+def _read_full(resp) -> dict:
+    body = resp.json()
+    return {
+        "content": _strip_fences(body["choices"][0]["message"]["content"]),
+        "usage": body.get("usage") or {},
+        "first_token_at": None,
+        "chunks": 0,
+    }
 
 
-def call_kimi(prompt: str, text: str) -> str:
+def _read_stream(resp, parser) -> dict:
+    """
+    Lit le flux SSE (« data: {...} ») et alimente le parseur incrémental :
+    une réponse mal formée est rejetée dès les premiers tokens.
+    """
+    first_token_at = None
+    chunks = 0
+    usage = {}
+    for line in resp.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        event = json.loads(data)
+        if event.get("usage"):
+            usage = event["usage"]
+        for choice in event.get("choices") or []:
+            delta = (choice.get("delta") or {}).get("content")
+            if delta:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                chunks += 1
+                parser.feed(delta)
+    parser.result()  # ValueError si le flux s'est arrêté avant la fin de l'objet
+    return {"content": parser.json_text(), "usage": usage, "first_token_at": first_token_at, "chunks": chunks}
+
+
+def call_kimi(prompt: str, text: str, use_cache: bool = True, name: str = "kimi",
+              stream: bool = None, on_field=None, on_item=None) -> str:
+    """
+    Envoie un prompt à Kimi et retourne le JSON (texte) de la réponse.
+    - stream : utilise l'API SSE (défaut : KIMI_STREAM)
+    - on_field(cle, valeur) / on_item(cle, index, valeur) : appelés dès qu'un champ
+      de premier niveau ou un élément de tableau (ex. une expérience) est complet.
+      Ils peuvent être appelés depuis un thread du pool Kimi.
+    """
+    stream = KIMI_STREAM if stream is None else stream
+    with instrumentation.timed("kimi_call", name=name) as info:
+        return _call_kimi(prompt, text, use_cache, stream, on_field, on_item, info)
+
+
+def _call_kimi(prompt, text, use_cache, stream, on_field, on_item, info) -> str:
+    """Corps de call_kimi ; les mesures de l'appel sont ajoutées à `info`."""
+    started = time.perf_counter()
+    info["cached"] = False
+    use_cache = use_cache and kimi_cache.CACHE_ENABLED
+    if use_cache:
+        cache_key = kimi_cache.make_key(prompt, text, MODEL, TEMPERATURE)
+        cached = kimi_cache.get_cache().get(cache_key)
+        if cached is not None:
+            if on_field or on_item:
+                IncrementalJSONParser(on_field, on_item).feed(cached)
+            info["cached"] = True
+            return cached
+
     if not NVIDIA_API_KEY:
         raise ValueError("NVIDIA_API_KEY non défini")
 
@@ -22,30 +223,62 @@ def call_kimi(prompt: str, text: str) -> str:
             {"role": "system", "content": "Tu es un expert en extraction de données de CV. Retourne UNIQUEMENT du JSON valide, sans markdown, sans explication."},
             {"role": "user", "content": f"{prompt}\n\nCV:\n{text}"}
         ],
-        "temperature": 0.1,
+        "temperature": TEMPERATURE,
         "max_tokens": 4096
     }
 
-    resp = requests.post(API_URL, headers=headers, json=payload, timeout=180)
+    if stream:
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        parser = IncrementalJSONParser(on_field, on_item)
+        reply = _send_with_retry(headers, payload, lambda resp: _read_stream(resp, parser), info)
+    else:
+        reply = _send_with_retry(headers, payload, _read_full, info)
+        if on_field or on_item:
+            IncrementalJSONParser(on_field, on_item).feed(reply["content"])
 
-    if resp.status_code != 200:
-        raise RuntimeError(f"Erreur API Kimi: {resp.status_code} - {resp.text[:200]}")
+    content = reply["content"]
+    finished = time.perf_counter()
 
-    content = resp.json()["choices"][0]["message"]["content"].strip()
+    # ── Mesures : time-to-first-token et débit ───────────────────────────────
+    usage = reply["usage"]
+    completion_tokens = usage.get("completion_tokens") or reply["chunks"] or None
+    first = reply["first_token_at"]
+    generation_time = finished - first if first else finished - started
+    info.update(
+        stream=stream,
+        ttft=first - started if first else None,
+        prompt_tokens=usage.get("prompt_tokens"),
+        completion_tokens=completion_tokens,
+        tokens_per_s=completion_tokens / generation_time if completion_tokens and generation_time > 0 else None,
+    )
 
-    if content.startswith("```"):
-        lines = content.split("\n")
-        content = "\n".join(lines[1:-1] if lines[-1].strip() == "```" else lines[1:])
-        content = content.replace("```json", "").replace("```", "").strip()
+    # On ne met en cache que du JSON exploitable
+    if use_cache:
+        try:
+            json.loads(content)
+        except ValueError:
+            return content
+        kimi_cache.get_cache().put(cache_key, content)
 
     return content
 
 
-def extract_cv_data(text: str) -> dict:
+def extract_cv_data(text: str, use_cache: bool = True, on_field=None, on_item=None) -> dict:
+    """
+    Structure le texte brut du CV en 3 appels Kimi.
+    Au-delà de SINGLE_PASS_CHARS, le texte est découpé par sections et les
+    expériences sont extraites par morceaux en parallèle (map-reduce).
+    on_field / on_item : voir call_kimi (champs disponibles avant la fin des appels ;
+    pour un CV découpé, "experiences" arrive une fois par morceau).
+    """
 
     first_chunk = text[:4000]
     all_text = text[:8000]
 
+    # ── Étape 0 : Pré-extraction locale (les champs trouvés sortent du prompt) ─
+    local = cv_preextract.pre_extract(text) if PREEXTRACT else {}
+
     # ── Étape 1 : Infos de base ──────────────────────────────────────────────
     prompt1 = """Analyse attentivement ce CV et extrais ces informations.
 IMPORTANT : Le nom et prénom sont généralement au tout début du CV, souvent en titre ou en gros.
@@ -62,8 +295,7 @@ Retourne ce JSON exact :
   "certifications": ["cert1", "cert2"],
   "langues": ["Français", "Anglais"]
 }"""
-
-    result1 = json.loads(call_kimi(prompt1, first_chunk))
+    prompt1 = _without_fields(prompt1, [f for f in cv_preextract.PROMPT_FIELDS if f in local])
 
     # ── Étape 2 : Expériences ────────────────────────────────────────────────
     prompt2 = """Extrais TOUTES les expériences professionnelles du CV et retourne ce JSON :
@@ -84,8 +316,6 @@ Retourne ce JSON exact :
   ]
 }"""
 
-    result2 = json.loads(call_kimi(prompt2, all_text))
-
     # ── Étape 3 : Formation et projets ───────────────────────────────────────
     prompt3 = """Extrais la formation, projets marquants et autres références du CV et retourne ce JSON :
 {
@@ -94,13 +324,29 @@ Retourne ce JSON exact :
   "autres_references": [{"entreprise": "Entreprise", "poste": "Poste"}]
 }"""
 
-    result3 = json.loads(call_kimi(prompt3, first_chunk))
+    # ── Appels Kimi (parallèles ou séquentiels) ──────────────────────────────
+    if len(text) <= SINGLE_PASS_CHARS:
+        calls = [
+            ("infos", prompt1, first_chunk),
+            ("experiences", prompt2, all_text),
+            ("formation", prompt3, first_chunk),
+        ]
+    else:
+        calls = _chunked_calls(text, prompt1, prompt2, prompt3)
+    results = _run_prompts(calls, use_cache=use_cache, on_field=on_field, on_item=on_item)
 
     # ── Fusion ───────────────────────────────────────────────────────────────
     cv_data = {}
-    cv_data.update(result1)
-    cv_data.update(result2)
-    cv_data.update(result3)
+    cv_data.update(results[0])
+    exp_results = results[1:-1]
+    if len(exp_results) == 1:
+        cv_data.update(exp_results[0])
+    else:
+        cv_data["experiences"] = _dedupe_experiences(
+            [exp for result in exp_results for exp in result.get("experiences") or []]
+        )
+    cv_data.update(results[-1])
+    cv_data.update(local)
 
     # Vérification finale : si nom vide → forcer NOM PRENOM
     if not cv_data.get("nom_prenom", "").strip():
@@ -109,4 +355,92 @@ Retourne ce JSON exact :
     return cv_data
 
 
+def _without_fields(prompt: str, fields: list) -> str:
+    """Retire des lignes « "champ": ... » du modèle JSON d'un prompt."""
+    if not fields:
+        return prompt
+    lines = [l for l in prompt.split("\n") if not any(l.lstrip().startswith(f'"{f}"') for f in fields)]
+    # La dernière entrée avant « } » ne doit pas garder de virgule
+    for i in range(len(lines) - 1, 0, -1):
+        if lines[i].strip() == "}":
+            lines[i - 1] = lines[i - 1].rstrip().rstrip(",")
+            break
+    return "\n".join(lines)
+
+
+def _chunked_calls(text: str, prompt1: str, prompt2: str, prompt3: str) -> list:
+    """
+    Appels pour un CV long : infos et formation sur leurs sections respectives,
+    expériences découpées aux frontières de sections / de dates (un appel par morceau).
+    """
+    sections = cv_segmenter.split_sections(text)
+
+    def compose(kinds, limit, fallback):
+        parts = [sections[k] for k in kinds if k in sections]
+        return "\n\n".join(parts)[:limit] if parts else fallback
+
+    # Les expériences viennent en dernier : elles servent au calcul des années d'expérience
+    infos_text = compose(["head", "a_propos", "competences", "certifications", "langues", "experiences"],
+                         SINGLE_PASS_CHARS, text[:4000])
+    formation_text = compose(["formation", "projets", "references"], SINGLE_PASS_CHARS, text[:4000])
+
+    chunks = cv_segmenter.experience_chunks(text, KIMI_CHUNK_CHARS) or [text[:SINGLE_PASS_CHARS]]
+    calls = [("infos", prompt1, infos_text)]
+    for i, chunk in enumerate(chunks, 1):
+        prompt = prompt2
+        if len(chunks) > 1:
+            prompt += (f"\n\nCe texte est la partie {i}/{len(chunks)} des expériences du CV : "
+                       "extrais uniquement les expériences qu'il contient.")
+        calls.append((f"experiences_{i}" if len(chunks) > 1 else "experiences", prompt, chunk))
+    calls.append(("formation", prompt3, formation_text))
+    return calls
+
+
+def _dedupe_experiences(experiences: list) -> list:
+    """
+    Supprime les doublons entre morceaux (une expérience à cheval sur deux morceaux
+    est extraite deux fois) en gardant la version la plus complète, à sa première position.
+    """
+    def norm(value):
+        return cv_segmenter.fold_text(str(value or "")).replace(" ", "")
+
+    kept, index = [], {}
+    for exp in experiences:
+        if not isinstance(exp, dict):
+            continue
+        key = (norm(exp.get("entreprise")), norm(exp.get("periode")))
+        if not any(key):
+            key += (norm(exp.get("poste")), norm(exp.get("contexte"))[:80])
+        if key in index:
+            i = index[key]
+            if len(json.dumps(exp, ensure_ascii=False)) > len(json.dumps(kept[i], ensure_ascii=False)):
+                kept[i] = exp
+        else:
+            index[key] = len(kept)
+            kept.append(exp)
+    return kept
+
+
+def _run_prompts(calls: list, use_cache: bool = True, on_field=None, on_item=None) -> list:
+    """
+    Exécute les triplets (nom, prompt, texte) et retourne les JSON dans le même ordre.
+    En mode parallèle, la latence totale ≈ celle de l'appel le plus lent ;
+    le plafond KIMI_MAX_CONCURRENCY reste appliqué dans call_kimi.
+    """
+    kwargs = {"use_cache": use_cache, "on_field": on_field, "on_item": on_item}
+    if not KIMI_PARALLEL or len(calls) < 2:
+        return [json.loads(call_kimi(prompt, text, name=name, **kwargs)) for name, prompt, text in calls]
+
+    pool = ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="kimi")
+    try:
+        # Chaque appel hérite du contexte courant (cumul de la conversion en cours)
+        futures = [pool.submit(contextvars.copy_context().run, call_kimi, prompt, text, name=name, **kwargs)
+                   for name, prompt, text in calls]
+        # Échec rapide : la première erreur est levée sans attendre les autres appels
+        wait(futures, return_when=FIRST_EXCEPTION)
+        return [json.loads(f.result()) for f in futures]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 structure_cv_with_kimi = extract_cv_data
@@ -0,0 +1,113 @@
+"""
+metrics.py — Métriques Prometheus (GET /metrics)
+
+Les métriques sont alimentées par les événements d'instrumentation : un seul
+listener, appelé depuis le thread qui émet, met à jour compteurs et histogrammes.
+
+Avec plusieurs workers gunicorn, PROMETHEUS_MULTIPROC_DIR (positionné par
+gunicorn_config.py) fait écrire chaque processus dans ses propres fichiers
+mmap ; /metrics agrège alors tous les workers, quel que soit celui qui répond.
+"""
+import os
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess)
+
+import instrumentation
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Du parsing (quelques ms) aux appels Kimi (jusqu'à plusieurs minutes)
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160, 320)
+
+STAGE_DURATION = Histogram(
+    "maltem_stage_duration_seconds", "Durée des étapes du pipeline de conversion",
+    ["stage"], buckets=_BUCKETS)
+KIMI_CALL_DURATION = Histogram(
+    "maltem_kimi_call_duration_seconds", "Durée des appels call_kimi par prompt",
+    ["prompt", "cached"], buckets=_BUCKETS)
+KIMI_QUEUE_WAIT = Histogram(
+    "maltem_kimi_queue_wait_seconds", "Attente d'une place d'appel Kimi (contrôle d'admission)",
+    buckets=_BUCKETS)
+KIMI_QUEUE_DEPTH = Gauge(
+    "maltem_kimi_queue_depth", "Appels Kimi en attente d'une place", multiprocess_mode="livesum")
+KIMI_REJECTED = Counter(
+    "maltem_kimi_admission_rejected_total", "Appels Kimi refusés par le contrôle d'admission", ["reason"])
+KIMI_TOKENS = Counter(
+    "maltem_kimi_tokens_total", "Tokens consommés", ["kind"])
+CONVERSIONS_IN_FLIGHT = Gauge(
+    "maltem_conversions_in_flight", "Conversions en cours", multiprocess_mode="livesum")
+ERRORS = Counter(
+    "maltem_errors_total", "Erreurs par étape, type d'exception et statut HTTP",
+    ["stage", "exception", "status"])
+DUPLICATES_AVOIDED = Counter(
+    "maltem_duplicate_conversions_avoided_total",
+    "Conversions évitées : doublon rattaché à un job en cours (inflight) ou résultat mémorisé (memo)", ["kind"])
+HTTP_REQUESTS = Counter(
+    "maltem_http_requests_total", "Requêtes HTTP par route et statut", ["endpoint", "method", "status"])
+HTTP_DURATION = Histogram(
+    "maltem_http_request_duration_seconds", "Durée des requêtes HTTP par route",
+    ["endpoint"], buckets=_BUCKETS)
+
+# Événements « <étape>_finished » → libellé de l'étape
+_STAGES = {
+    "text_extraction_finished": "text_extraction",
+    "extract_text_from_pdf_finished": "extract_text_from_pdf",
+    "extract_text_from_docx_finished": "extract_text_from_docx",
+    "docx_generation_finished": "generate_maltem_cv",
+    "docx_save_finished": "doc.save",
+    "conversion_finished": "conversion",
+}
+
+
+def _prompt(name: str) -> str:
+    """« experiences_3 » → « experiences » : une série par prompt, pas par morceau."""
+    return (name or "kimi").split("_", 1)[0]
+
+
+def on_event(event: str, fields: dict):
+    stage = _STAGES.get(event)
+    if stage is not None:
+        STAGE_DURATION.labels(stage).observe(fields["duration"])
+        if event == "conversion_finished":
+            CONVERSIONS_IN_FLIGHT.dec()
+        if fields.get("error"):
+            ERRORS.labels(stage, fields["error"], str(fields.get("http_status", ""))).inc()
+    elif event == "kimi_call_finished":
+        prompt = _prompt(fields.get("name"))
+        KIMI_CALL_DURATION.labels(prompt, "1" if fields.get("cached") else "0").observe(fields["duration"])
+        if fields.get("queue_wait") is not None:
+            KIMI_QUEUE_WAIT.observe(fields["queue_wait"])
+        if fields.get("error"):
+            ERRORS.labels("call_kimi:" + prompt, fields["error"], "").inc()
+        KIMI_TOKENS.labels("prompt").inc(fields.get("prompt_tokens") or 0)
+        KIMI_TOKENS.labels("completion").inc(fields.get("completion_tokens") or 0)
+    elif event == "conversion_coalesced":
+        DUPLICATES_AVOIDED.labels(fields["kind"]).inc()
+    elif event == "conversion_started":
+        CONVERSIONS_IN_FLIGHT.inc()
+    elif event == "admission_queued":
+        KIMI_QUEUE_DEPTH.inc()
+    elif event == "admission_dequeued":
+        KIMI_QUEUE_DEPTH.dec()
+    elif event in ("admission_rejected", "admission_timed_out"):
+        KIMI_REJECTED.labels(event[len("admission_"):]).inc()
+
+
+def observe_request(endpoint: str, method: str, status: int, duration: float):
+    HTTP_REQUESTS.labels(endpoint, method, str(status)).inc()
+    HTTP_DURATION.labels(endpoint).observe(duration)
+
+
+def install():
+    instrumentation.add_listener(on_event)
+
+
+def render() -> tuple:
+    """(corps, content-type) de la réponse /metrics."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,176 @@
+"""
+pipeline.py — Chaîne complète de conversion d'un CV (texte → Kimi → DOCX Maltem)
+
+Utilisée telle quelle par l'endpoint synchrone /convert et par les jobs en arrière-plan ;
+render_in_memory() ne fait que la dernière étape, à partir d'un cv_data déjà structuré (/render).
+"""
+import io
+import os
+import sys
+import uuid
+import threading
+
+from cv_parser import extract_cv_text
+from text_normalizer import normalize_cv_text
+from kimi_extractor import structure_cv_with_kimi
+from cv_formatter import generate_maltem_cv
+from cv_schema import validate_cv_data
+from admission import Overloaded
+import instrumentation
+
+DOCX_MIMETYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Étapes successives d'une conversion (reportées par GET /jobs/<id>)
+STAGES = ("queued", "extracting", "structuring", "rendering", "done")
+
+
+class Cancelled(Exception):
+    """Conversion abandonnée entre deux étapes : plus personne n'attend son résultat (client déconnecté)."""
+
+
+def offload(fn, *args):
+    """
+    Exécute une étape CPU (analyse PDF, génération DOCX).
+    Sous un worker gevent, elle part dans un vrai thread du hub pour ne pas bloquer
+    la boucle d'événements pendant que les autres conversions attendent Kimi ;
+    sinon (threads, sync, CLI) l'appel est direct.
+    """
+    monkey = sys.modules.get("gevent.monkey")
+    if monkey is not None and monkey.is_module_patched("threading"):
+        import gevent
+        return gevent.get_hub().threadpool.apply(fn, args)
+    return fn(*args)
+
+
+def output_filename(cv_data: dict, unique_id: str = None) -> str:
+    nom = cv_data.get("nom_prenom", "CV").replace(" ", "_").replace("/", "_")
+    unique_id = unique_id or str(uuid.uuid4())[:8]
+    return f"CV_Maltem_{nom}_{unique_id}.docx"
+
+
+def error_status(exc: Exception) -> int:
+    """Code HTTP d'une erreur de conversion : données invalides, surcharge, API Kimi, annulation, ou erreur interne."""
+    if isinstance(exc, Cancelled):
+        return 499                  # « client closed request »
+    if isinstance(exc, ValueError):
+        return 400
+    if isinstance(exc, Overloaded):
+        return 429
+    if isinstance(exc, RuntimeError):
+        return 502
+    return 500
+
+
+def error_message(exc: Exception) -> str:
+    return str(exc) if error_status(exc) != 500 else f"Erreur interne : {str(exc)}"
+
+
+def run_conversion(input_path: str, output_dir: str, unique_id: str = None,
+                   on_stage=None, on_event=None, cancel=None) -> tuple:
+    """
+    Convertit le CV `input_path` et écrit le DOCX dans `output_dir`.
+    on_stage(nom) est appelé à chaque changement d'étape ; on_event(event, champs)
+    reçoit les événements de mesure (extraction, appels Kimi, génération DOCX).
+    cancel (threading.Event), vérifié avant chaque étape, lève Cancelled une fois levé.
+    Retourne (chemin_sortie, nom_fichier).
+    """
+    def target(cv_data):
+        filename = output_filename(cv_data, unique_id)
+        return os.path.join(output_dir, filename), filename
+
+    return _convert(input_path, None, target, on_stage, on_event, cancel)
+
+
+def convert_in_memory(data, filename: str = None, unique_id: str = None,
+                      on_stage=None, on_event=None, cancel=None) -> tuple:
+    """
+    Variante sans disque : `data` est le contenu du CV (bytes ou fichier ouvert),
+    `filename` son nom d'origine (utile si le format n'est pas reconnu au contenu).
+    Retourne (BytesIO du DOCX, nom_fichier).
+    """
+    def target(cv_data):
+        return io.BytesIO(), output_filename(cv_data, unique_id)
+
+    output, name = _convert(data, filename, target, on_stage, on_event, cancel)
+    output.seek(0)
+    return output, name
+
+
+def render_in_memory(cv_data, unique_id: str = None, on_event=None) -> tuple:
+    """
+    Génère le DOCX d'un cv_data fourni tel quel (JSON corrigé à la main, etc.),
+    sans extraction ni appel Kimi. Lève ValueError si cv_data est invalide.
+    Retourne (BytesIO du DOCX, nom_fichier).
+    """
+    with instrumentation.conversion(on_event=on_event), instrumentation.timed("conversion") as conv:
+        try:
+            cv_data = validate_cv_data(cv_data)
+            output = io.BytesIO()
+            with instrumentation.timed("docx_generation"):
+                offload(generate_maltem_cv, cv_data, output)
+        except Exception as e:
+            conv["http_status"] = error_status(e)
+            raise
+    output.seek(0)
+    return output, output_filename(cv_data, unique_id)
+
+
+def _kimi_progress() -> tuple:
+    """
+    on_field / on_item pour structure_cv_with_kimi : chaque champ ou élément de
+    tableau complet devient un événement kimi_field / kimi_item (flux SSE du job).
+    count numérote les éléments d'un champ sur l'ensemble des appels (un CV
+    découpé reçoit ses expériences morceau par morceau).
+    """
+    counts, lock = {}, threading.Lock()
+
+    def on_field(key, value):
+        instrumentation.emit("kimi_field", field=key)
+
+    def on_item(key, index, value):
+        with lock:
+            counts[key] = counts.get(key, 0) + 1
+            count = counts[key]
+        instrumentation.emit("kimi_item", field=key, count=count)
+
+    return on_field, on_item
+
+
+def _convert(source, filename, target, on_stage, on_event, cancel=None) -> tuple:
+    """Texte → Kimi → DOCX ; target(cv_data) donne (destination, nom_fichier) du DOCX."""
+    def stage(name):
+        if on_stage:
+            on_stage(name)
+
+    def checkpoint(name):
+        # Une étape commencée va jusqu'au bout ; l'annulation est vue avant la suivante
+        if cancel is not None and cancel.is_set():
+            raise Cancelled(f"Conversion annulée avant l'étape {name}.")
+        stage(name)
+
+    with instrumentation.conversion(on_event=on_event), instrumentation.timed("conversion") as conv:
+        try:
+            # Étape 1 : Extraction et nettoyage du texte
+            checkpoint("extracting")
+            with instrumentation.timed("text_extraction") as info:
+                raw_text = normalize_cv_text(offload(extract_cv_text, source, filename))
+                info["chars"] = len(raw_text)
+            if not raw_text.strip():
+                raise ValueError("Impossible d'extraire le texte du CV. Le fichier semble vide ou protégé.")
+
+            # Étape 2 : Structuration avec Kimi NVIDIA
+            checkpoint("structuring")
+            on_field, on_item = _kimi_progress()
+            cv_data = structure_cv_with_kimi(raw_text, on_field=on_field, on_item=on_item)
+
+            # Étape 3 : Génération du CV Maltem
+            checkpoint("rendering")
+            output, name = target(cv_data)
+            with instrumentation.timed("docx_generation"):
+                offload(generate_maltem_cv, cv_data, output)
+        except Exception as e:
+            conv["http_status"] = error_status(e)
+            raise
+
+    stage("done")
+    return output, name
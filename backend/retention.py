@@ -0,0 +1,266 @@
+"""
+retention.py — Rétention des CV générés dans OUTPUT_FOLDER
+
+Chaque DOCX écrit par un job est enregistré dans un index SQLite (dans le
+dossier lui-même) : nom, empreinte du contenu, taille, dates de création et de
+dernier téléchargement. Un thread de ménage applique périodiquement :
+- un âge maximum (OUTPUT_MAX_AGE) ;
+- une taille totale maximum (OUTPUT_MAX_MB), en supprimant les fichiers les
+  moins récemment téléchargés (LRU).
+Le ménage ne lit que l'index : pas de listdir / stat sur tout le dossier. Le
+dossier n'est parcouru qu'une fois, à la création de l'index, pour y reprendre
+les fichiers déjà présents.
+
+Deux sorties au contenu identique (même CV converti deux fois) ne sont stockées
+qu'une fois : la seconde devient un lien physique vers la première.
+"""
+import os
+import time
+import zipfile
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger("maltem.retention")
+
+OUTPUT_MAX_AGE        = int(os.environ.get("OUTPUT_MAX_AGE", str(24 * 3600)))    # secondes
+OUTPUT_MAX_MB         = float(os.environ.get("OUTPUT_MAX_MB", "500"))
+OUTPUT_SWEEP_INTERVAL = int(os.environ.get("OUTPUT_SWEEP_INTERVAL", "300"))      # secondes, 0 = pas de thread
+
+INDEX_NAME = ".retention.sqlite3"
+
+# Suppressions par transaction : le verrou d'écriture SQLite n'est jamais gardé longtemps
+_DELETE_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name        TEXT PRIMARY KEY,
+    hash        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_hash ON files(hash);
+CREATE INDEX IF NOT EXISTS idx_files_created_at ON files(created_at);
+CREATE INDEX IF NOT EXISTS idx_files_last_access ON files(last_access);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def content_hash(path: str) -> str:
+    """
+    Empreinte SHA-256 du contenu d'un DOCX : noms et contenus de ses parties,
+    sans les dates de l'archive ZIP (qui changent à chaque génération).
+    Tout autre fichier est haché octet par octet.
+    """
+    digest = hashlib.sha256()
+    try:
+        with zipfile.ZipFile(path) as archive:
+            for name in sorted(archive.namelist()):
+                digest.update(name.encode("utf-8") + b"\0")
+                digest.update(archive.read(name))
+        return digest.hexdigest()
+    except zipfile.BadZipFile:
+        pass
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class OutputStore:
+    """
+    Index et ménage d'un dossier de sorties. Les tailles comptées sont celles
+    occupées sur disque : un contenu partagé par plusieurs noms compte une fois.
+    Les erreurs SQLite ou disque sont journalisées sans jamais faire échouer une conversion.
+    """
+
+    def __init__(self, directory: str, max_age: int = OUTPUT_MAX_AGE, max_mb: float = OUTPUT_MAX_MB,
+                 interval: int = OUTPUT_SWEEP_INTERVAL):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self.max_age = max_age
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.interval = interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sweeper_pid = None
+        self.last_sweep = None
+
+    # ── Connexion (une par thread et par processus) ──────────────────────────
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(self.directory, exist_ok=True)
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def register(self, path: str) -> str:
+        """Indexe un fichier qui vient d'être écrit ; un doublon devient un lien vers l'original."""
+        self.start_sweeper()
+        name = os.path.basename(path)
+        try:
+            digest = content_hash(path)
+            size = os.path.getsize(path)
+            now = time.time()
+            conn = self._conn()
+            for (other,) in conn.execute("SELECT name FROM files WHERE hash = ? AND name != ?", (digest, name)):
+                if self._link(self._path(other), path):
+                    break
+            conn.execute(
+                "INSERT OR REPLACE INTO files (name, hash, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (name, digest, size, now, now),
+            )
+        except (OSError, sqlite3.Error):
+            logger.exception("Indexation de %s impossible", name)
+        return path
+
+    def _link(self, original: str, path: str) -> bool:
+        """Remplace `path` par un lien physique vers `original` (False si impossible)."""
+        tmp = f"{path}.link"
+        try:
+            os.link(original, tmp)
+            os.replace(tmp, path)
+            return True
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+
+    def touch(self, path: str):
+        """Note un téléchargement (ordre LRU)."""
+        try:
+            self._conn().execute("UPDATE files SET last_access = ? WHERE name = ?",
+                                 (time.time(), os.path.basename(path)))
+        except sqlite3.Error:
+            pass
+
+    def sweep(self) -> dict:
+        """Supprime les fichiers trop anciens, puis les moins récemment lus au-delà de la taille max."""
+        started = time.perf_counter()
+        conn = self._conn()
+        self._import_existing(conn)
+
+        expired = [name for (name,) in conn.execute(
+            "SELECT name FROM files WHERE created_at < ?", (time.time() - self.max_age,))]
+        removed = self._delete(conn, expired)
+
+        evicted = []
+        excess = self._disk_bytes(conn) - self.max_bytes
+        if excess > 0:
+            # Un contenu n'est libéré qu'à la suppression de son dernier nom
+            names_left = dict(conn.execute("SELECT hash, COUNT(*) FROM files GROUP BY hash"))
+            cursor = conn.execute("SELECT name, hash, size FROM files ORDER BY last_access")
+            for name, digest, size in cursor:
+                evicted.append(name)
+                names_left[digest] -= 1
+                if not names_left[digest]:
+                    excess -= size
+                if excess <= 0:
+                    break
+            cursor.close()
+            removed += self._delete(conn, evicted)
+
+        self.last_sweep = {
+            "at": time.time(),
+            "expired": len(expired),
+            "evicted": len(evicted),
+            "removed": removed,
+            "duration": round(time.perf_counter() - started, 4),
+        }
+        if removed:
+            logger.info("retention sweep %s", self.last_sweep)
+        return self.last_sweep
+
+    def stats(self) -> dict:
+        self.start_sweeper()
+        try:
+            conn = self._conn()
+            files, logical = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+            contents = conn.execute("SELECT COUNT(DISTINCT hash) FROM files").fetchone()[0]
+            disk = self._disk_bytes(conn)
+        except sqlite3.Error:
+            files = logical = contents = disk = None
+        return {
+            "files": files,
+            "bytes": disk,
+            "logical_bytes": logical,
+            "deduplicated": files - contents if files is not None else None,
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age,
+            "last_sweep": self.last_sweep,
+        }
+
+    # ── Ménage ───────────────────────────────────────────────────────────────
+    def _disk_bytes(self, conn) -> int:
+        return conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM files GROUP BY hash)"
+        ).fetchone()[0]
+
+    def _delete(self, conn, names: list) -> int:
+        for i in range(0, len(names), _DELETE_BATCH):
+            batch = names[i:i + _DELETE_BATCH]
+            for name in batch:
+                try:
+                    os.remove(self._path(name))
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    logger.exception("Suppression de %s impossible", name)
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM files WHERE name = ?", [(n,) for n in batch])
+            conn.execute("COMMIT")
+        return len(names)
+
+    def _import_existing(self, conn):
+        """Reprend une seule fois les fichiers présents avant la création de l'index."""
+        if conn.execute("SELECT 1 FROM meta WHERE name = 'imported'").fetchone():
+            return
+        rows = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                st = entry.stat()
+                try:
+                    digest = content_hash(entry.path)
+                except OSError:
+                    continue
+                rows.append((entry.name, digest, st.st_size, st.st_mtime, st.st_mtime))
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("INSERT OR IGNORE INTO files (name, hash, size, created_at, last_access) "
+                         "VALUES (?, ?, ?, ?, ?)", rows)
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('imported', ?)", (str(time.time()),))
+        conn.execute("COMMIT")
+
+    def start_sweeper(self):
+        """Lance le thread de ménage du processus courant (une fois, et de nouveau après un fork)."""
+        if not self.interval or self._sweeper_pid == os.getpid():
+            return
+        with self._lock:
+            if self._sweeper_pid == os.getpid():
+                return
+            self._sweeper_pid = os.getpid()
+            threading.Thread(target=self._sweep_loop, name="retention-sweeper", daemon=True).start()
+
+    def _sweep_loop(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Ménage de %s en échec", self.directory)
+            time.sleep(self.interval)
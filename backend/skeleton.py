@@ -0,0 +1,57 @@
+"""
+skeleton.py — Squelette de document python-docx construit une fois, cloné par requête
+
+Un DocumentSkeleton construit un Document avec une fonction `build(doc)` (mise
+en page, styles, en-tête et pied de page fixes, images déjà intégrées), une
+seule fois par processus, et le garde en mémoire. clone() en retourne une copie
+prête à être complétée : seule la partie principale (word/document.xml), qui
+reçoit le contenu variable, est copiée ; styles, thème, pied de page, images et
+autres parties sont partagés entre les clones, donc jamais ni relus, ni
+reconstruits, ni dupliqués.
+
+Règle d'usage : un clone ne modifie que le corps du document. Styles, pied de
+page, réglages et images du squelette appartiennent à tous les clones ; ce qui
+doit changer par document n'a pas sa place dans `build`.
+"""
+import io
+import copy
+import threading
+
+from docx import Document
+
+
+class DocumentSkeleton:
+    def __init__(self, build, template: bytes = None):
+        self._build = build
+        self._template = template       # .docx de départ (modèle python-docx par défaut si None)
+        self._lock = threading.Lock()
+        self._doc = None
+
+    def get(self):
+        """Document squelette (construit au premier appel)."""
+        if self._doc is None:
+            with self._lock:
+                if self._doc is None:
+                    doc = Document(io.BytesIO(self._template) if self._template else None)
+                    self._build(doc)
+                    self._doc = doc
+        return self._doc
+
+    def clone(self):
+        """Nouveau Document : copie du corps du squelette, autres parties partagées."""
+        part = self.get().part
+        package = type(part.package)()
+        body = type(part)(part.partname, part.content_type, copy.deepcopy(part.element), package)
+        # Mêmes relations (mêmes rId) que le squelette, vers les mêmes parties partagées
+        for rId, rel in part.rels.items():
+            body.rels.add_relationship(rel.reltype, rel._target, rId, rel.is_external)
+        for rId, rel in part.package.rels.items():
+            target = body if rel._target is part else rel._target
+            package.rels.add_relationship(rel.reltype, target, rId, rel.is_external)
+        package.after_unmarshal()   # collection d'images du paquet (add_picture dédoublonne)
+        return body.document
+
+    def reset(self):
+        """Oublie le squelette (reconstruit au prochain clone)."""
+        with self._lock:
+            self._doc = None
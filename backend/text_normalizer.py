@@ -0,0 +1,88 @@
+"""
+text_normalizer.py — Nettoyage du texte brut avant l'envoi à Kimi
+
+Retire ce qui consomme le budget de caractères (4000 / 8000) et des tokens sans
+apporter d'information : en-têtes / pieds de page répétés, numéros de page,
+espaces multiples, césures en fin de ligne, puces graphiques.
+"""
+import re
+
+import instrumentation
+from cv_parser import PAGE_BREAK
+from cv_segmenter import DATE_RANGE_RE
+
+_PAGE_NUMBER_RE = re.compile(r"(?i)^(?:page|p\.)?\s*\d{1,3}\s*(?:(?:/|sur|of|de)\s*\d{1,3})?$")
+_BULLET_RE      = re.compile(r"^[•●○◦▪▫■□►▶➢➤✓✔‣∙·*]+\s*")
+_SPACES_RE      = re.compile(r"[ \t\u00a0\u2000-\u200b\u202f\u3000]+")
+_HYPHEN_END_RE  = re.compile(r"(?:[^\W\d][-‐]|\u00ad)$")   # jamais après un chiffre (« 2019- »)
+_SOFT_HYPHEN    = "\u00ad"
+_DIGITS_RE      = re.compile(r"\d+")
+
+# Lignes examinées en haut et en bas de chaque page pour repérer en-têtes / pieds
+_MARGIN_LINES = 3
+
+
+def _margin_key(line: str) -> str:
+    """Clé de comparaison : « Page 2 – CV Jean » et « Page 3 – CV Jean » sont identiques."""
+    return _DIGITS_RE.sub("#", line.lower())
+
+
+def _margin_indexes(lines: list) -> set:
+    """Indices des _MARGIN_LINES premières et dernières lignes non vides de la page."""
+    content = [i for i, l in enumerate(lines) if l]
+    return set(content[:_MARGIN_LINES] + content[-_MARGIN_LINES:])
+
+
+def _is_margin_candidate(line: str) -> bool:
+    # Les libellés (« Réalisations : ») peuvent légitimement ouvrir plusieurs pages, et
+    # une période (« 2015 - 2017 ») donnerait la même clé que toutes les autres
+    return not line.endswith(":") and not DATE_RANGE_RE.search(line)
+
+
+def _repeated_margins(pages: list) -> set:
+    """Lignes présentes dans les marges d'au moins la moitié des pages (minimum 2)."""
+    if len(pages) < 2:
+        return set()
+    counts = {}
+    for lines in pages:
+        keys = {_margin_key(lines[i]) for i in _margin_indexes(lines) if _is_margin_candidate(lines[i])}
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+    threshold = max(2, (len(pages) + 1) // 2)
+    return {key for key, n in counts.items() if n >= threshold}
+
+
+def normalize_cv_text(text: str) -> str:
+    """Texte nettoyé ; la première occurrence d'un en-tête répété (souvent le nom) est conservée."""
+    pages = [[_SPACES_RE.sub(" ", l).strip() for l in page.split("\n")] for page in text.split(PAGE_BREAK)]
+    repeated = _repeated_margins(pages)
+
+    out, seen_margins = [], set()
+    for lines in pages:
+        # Numéros de page et en-têtes répétés : seulement dans les marges de leur page
+        margins = _margin_indexes(lines)
+        for i, line in enumerate(lines):
+            if not line:
+                if out and out[-1]:
+                    out.append("")
+                continue
+            if i in margins and _PAGE_NUMBER_RE.match(line):
+                continue
+            if i in margins and _is_margin_candidate(line):
+                key = _margin_key(line)
+                if key in repeated:
+                    if key in seen_margins:
+                        continue
+                    seen_margins.add(key)
+            line = _BULLET_RE.sub("- ", line)
+            # Coupure en fin de ligne : « Front-\nend » → « Front-end » (trait d'union
+            # conservé) ; seule la césure conditionnelle (U+00AD) disparaît
+            if out and out[-1] and _HYPHEN_END_RE.search(out[-1]) and line[:1].islower():
+                prev = out[-1]
+                out[-1] = (prev[:-1] if prev.endswith(_SOFT_HYPHEN) else prev) + line
+                continue
+            out.append(line)
+
+    normalized = "\n".join(out).strip()
+    instrumentation.emit("text_normalized", chars_in=len(text), chars_out=len(normalized))
+    return normalized
@@ -0,0 +1,154 @@
+"""
+tracing.py — Spans par requête, en-tête Server-Timing et log JSON
+
+Les spans sont construits à partir des événements d'instrumentation
+« <étape>_started » / « <étape>_finished » émis par instrumentation.timed() :
+aucun code de mesure supplémentaire dans le pipeline. La trace de la requête
+et le span courant sont portés par des contextvars ; ils suivent donc la
+conversion dans les threads du pool de jobs et des appels Kimi parallèles
+(lancés avec contextvars.copy_context()).
+
+En fin de requête : en-têtes X-Request-ID et Server-Timing (visible dans les
+outils de développement du navigateur), et une ligne de log JSON avec l'arbre
+des spans. TRACING=0 désactive tout (pas de listener, pas d'allocation).
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import contextvars
+
+import instrumentation
+
+TRACING = os.environ.get("TRACING", "1") != "0"
+
+logger = logging.getLogger("maltem.trace")
+
+_trace = contextvars.ContextVar("maltem_trace", default=None)
+_span = contextvars.ContextVar("maltem_span", default=None)
+
+_STARTED, _FINISHED = "_started", "_finished"
+# Attributs d'événement recopiés dans les spans (« name » d'un appel Kimi devient « prompt »)
+_ATTRS = (("name", "prompt"), ("cached", "cached"), ("queue_wait", "queue_wait"), ("chars", "chars"),
+          ("error", "error"), ("http_status", "http_status"))
+
+
+class Span:
+    __slots__ = ("name", "start", "end", "parent", "children", "attrs")
+
+    def __init__(self, name: str, start: float, parent=None):
+        self.name = name
+        self.start = start
+        self.end = None
+        self.parent = parent
+        self.children = []
+        self.attrs = None
+
+    def as_dict(self, origin: float) -> dict:
+        data = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(((self.end or time.perf_counter()) - self.start) * 1000, 2),
+        }
+        if self.attrs:
+            data.update(self.attrs)
+        if self.children:
+            data["children"] = [child.as_dict(origin) for child in self.children]
+        return data
+
+
+class Trace:
+    __slots__ = ("request_id", "root", "closed")
+
+    def __init__(self, request_id: str, name: str):
+        self.request_id = request_id
+        self.root = Span(name, time.perf_counter())
+        self.closed = False
+
+    def spans(self):
+        """Parcours en profondeur des spans, racine exclue."""
+        stack = list(reversed(self.root.children))
+        while stack:
+            span = stack.pop()
+            yield span
+            stack.extend(reversed(span.children))
+
+
+# ── Construction des spans ───────────────────────────────────────────────────
+def on_event(event: str, fields: dict):
+    trace = _trace.get()
+    if trace is None or trace.closed:
+        return
+    if event.endswith(_STARTED):
+        parent = _span.get() or trace.root
+        span = Span(event[:-len(_STARTED)], time.perf_counter(), parent)
+        parent.children.append(span)
+        _span.set(span)
+    elif event.endswith(_FINISHED):
+        span = _span.get()
+        if span is None or span.name != event[:-len(_FINISHED)]:
+            return
+        span.end = span.start + fields["duration"] if "duration" in fields else time.perf_counter()
+        attrs = {attr: fields[k] for k, attr in _ATTRS if fields.get(k) is not None}
+        if attrs:
+            span.attrs = attrs
+        _span.set(span.parent if span.parent is not trace.root else None)
+
+
+# ── Cycle de vie d'une requête ───────────────────────────────────────────────
+def start(name: str, request_id: str = None):
+    """Ouvre la trace de la requête courante ; retourne les jetons à passer à reset()."""
+    if not TRACING:
+        return None
+    trace = Trace(request_id or uuid.uuid4().hex[:16], name)
+    return _trace.set(trace), _span.set(None)
+
+
+def current_request_id():
+    trace = _trace.get()
+    return trace.request_id if trace is not None else None
+
+
+def server_timing(trace: Trace) -> str:
+    """Valeur de l'en-tête Server-Timing : une entrée par span, plus le total."""
+    parts = []
+    for span in trace.spans():
+        if span.end is None:
+            continue
+        metric = span.name
+        if span.attrs and "prompt" in span.attrs:
+            metric = f"{span.name}-{span.attrs['prompt']}"
+        parts.append(f"{metric};dur={(span.end - span.start) * 1000:.1f}")
+    parts.append(f"total;dur={(time.perf_counter() - trace.root.start) * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def finish(response, **fields):
+    """Ajoute X-Request-ID et Server-Timing à la réponse et journalise l'arbre des spans."""
+    trace = _trace.get()
+    if trace is None or trace.closed:
+        return response
+    trace.closed = True
+    trace.root.end = time.perf_counter()
+    response.headers["X-Request-ID"] = trace.request_id
+    response.headers["Server-Timing"] = server_timing(trace)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            "request_id": trace.request_id,
+            **fields,
+            "duration_ms": round((trace.root.end - trace.root.start) * 1000, 2),
+            "spans": [child.as_dict(trace.root.start) for child in trace.root.children],
+        }, ensure_ascii=False, default=str))
+    return response
+
+
+def reset(tokens):
+    if tokens is not None:
+        _trace.reset(tokens[0])
+        _span.reset(tokens[1])
+
+
+def install():
+    if TRACING:
+        instrumentation.add_listener(on_event)
@@ -0,0 +1,81 @@
+"""
+warmup.py — Préparation du processus avant de servir des requêtes
+
+Importe les modules lourds (pdfplumber/pdfminer, python-docx, lxml), charge
+les images et le modèle DOCX du formateur, puis convertit un petit CV factice
+de bout en bout (hors Kimi) pour déclencher les imports et caches paresseux.
+
+Avec gunicorn `preload_app` (voir gunicorn_config.py), c'est le master qui
+fait ce travail une seule fois, avant le fork : les workers héritent des pages
+mémoire par copie à l'écriture et servent leur première requête sans latence
+de démarrage. gc.freeze() (hook when_ready) sort ces objets du suivi du
+ramasse-miettes, qui sinon toucherait — et dupliquerait — leurs pages.
+"""
+import io
+import os
+import time
+import logging
+
+import lxml.etree            # noqa: F401
+import docx                  # noqa: F401
+import pdfplumber            # noqa: F401
+
+import cv_formatter
+from cv_parser import extract_cv_text
+
+logger = logging.getLogger("maltem.warmup")
+
+WARMUP = os.environ.get("WARMUP", "1") != "0"
+
+_SAMPLE_CV = {
+    "nom_prenom": "Préchauffage",
+    "titre_poste": "Consultant",
+    "annees_experience": "1 an d'expérience",
+    "a_propos": "CV factice de démarrage.",
+    "competences": [{"categorie": "Data", "items": ["Python"]}],
+    "certifications": ["Certification"],
+    "langues": ["Français"],
+    "experiences": [{
+        "periode": "2023 – 2024", "entreprise": "Maltem", "poste": "Consultant",
+        "contexte": "Démarrage", "missions": ["Mission"], "realisations": ["Réalisation"],
+        "environnement": "Python",
+    }],
+    "formations": [{"annee": "2022", "diplome": "Master", "etablissement": "UCAD"}],
+    "projets_marquants": ["Projet"],
+    "autres_references": ["Référence"],
+}
+
+# PDF minimal d'une ligne de texte : charge polices et tables de pdfminer
+_SAMPLE_PDF = (
+    b"%PDF-1.4\n"
+    b"1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 200 50]/Contents 4 0 R"
+    b"/Resources<</Font<</F1 5 0 R>>>>>>endobj\n"
+    b"4 0 obj<</Length 41>>stream\nBT /F1 12 Tf 10 20 Td (Warm-up CV) Tj ET\nendstream endobj\n"
+    b"5 0 obj<</Type/Font/Subtype/Type1/BaseFont/Helvetica>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+_done = False
+
+
+def warm_up() -> float:
+    """Prépare le processus (une seule fois) ; retourne la durée en secondes."""
+    global _done
+    if _done or not WARMUP:
+        return 0.0
+    started = time.perf_counter()
+    cv_formatter.preload()
+    try:
+        buf = io.BytesIO()
+        cv_formatter.generate_maltem_cv(_SAMPLE_CV, buf)
+        extract_cv_text(buf.getvalue(), "warmup.docx")
+        extract_cv_text(_SAMPLE_PDF, "warmup.pdf")
+    except Exception:
+        # Un préchauffage raté ne doit jamais empêcher le serveur de démarrer
+        logger.exception("Préchauffage incomplet")
+    _done = True
+    elapsed = time.perf_counter() - started
+    logger.info("warm-up en %.2fs (pid %d)", elapsed, os.getpid())
+    return elapsed
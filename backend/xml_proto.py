@@ -0,0 +1,62 @@
+"""
+xml_proto.py — Prototypes d'éléments XML analysés une fois, copiés à chaque usage
+
+Un Prototype part d'un modèle XML dont certains attributs ou textes contiennent
+des emplacements {nom} (ex. cx="{cx}", name="img{doc_id}"). Le modèle est
+analysé une seule fois ; le chemin (indices d'enfants depuis la racine) de
+chaque valeur à remplir est noté à ce moment-là. new(**valeurs) copie l'arbre
+(deepcopy lxml, sans repasser par le parseur) et écrit directement les valeurs
+aux endroits notés : ni formatage d'une longue chaîne, ni analyse XML, ni
+parcours de l'arbre à la recherche d'un texte de remplacement.
+"""
+import re
+import copy
+
+from lxml import etree
+
+_SLOT = re.compile(r"\{(\w+)\}")
+
+
+class Prototype:
+    def __init__(self, xml: str):
+        self.root = etree.fromstring(xml)
+        # (chemin, attribut ou None pour le texte, modèle de valeur, nom si le modèle est « {nom} » seul)
+        self._targets = []
+        for el in self.root.iter():
+            path = self._path(el)
+            for attr, value in el.attrib.items():
+                if _SLOT.search(value):
+                    self._targets.append(self._target(path, attr, value))
+            if el.text and _SLOT.search(el.text):
+                self._targets.append(self._target(path, None, el.text))
+        self.slots = frozenset(name for _, _, template, _ in self._targets for name in _SLOT.findall(template))
+
+    @staticmethod
+    def _target(path: tuple, attr, template: str) -> tuple:
+        whole = _SLOT.fullmatch(template)
+        return path, attr, template, whole.group(1) if whole else None
+
+    def _path(self, el) -> tuple:
+        path = []
+        while el is not self.root:
+            parent = el.getparent()
+            path.append(parent.index(el))
+            el = parent
+        return tuple(reversed(path))
+
+    def new(self, **values):
+        """Copie du prototype avec chaque {nom} remplacé par values[nom]."""
+        missing = self.slots.difference(values)
+        if missing:
+            raise KeyError(f"Valeurs manquantes pour le prototype : {', '.join(sorted(missing))}")
+        root = copy.deepcopy(self.root)
+        for path, attr, template, name in self._targets:
+            el = root
+            for i in path:
+                el = el[i]
+            value = str(values[name]) if name else template.format(**values)
+            if attr is None:
+                el.text = value
+            else:
+                el.set(attr, value)
+        return root
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+bench/bench_concurrency.py — Conversions simultanées tenues par un conteneur
+Utilisation : python bench_concurrency.py [--latency 2] [--levels 1,8,32,64] [--modes sync,gthread,gevent]
+
+Lance gunicorn avec gunicorn_config.py (un worker, comme le Dockerfile) devant
+un faux serveur Kimi local qui répond après `--latency` secondes, puis envoie
+N requêtes POST /convert simultanées par palier. Pour chaque mode de worker :
+latence p50 / p95, débit, erreurs et mémoire résidente (RSS) de gunicorn.
+
+Exemple :
+  python bench_concurrency.py --latency 3 --levels 1,16,64 --modes sync,gthread
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Réponse unique du faux Kimi : elle couvre les champs des 3 prompts
+FAKE_CV_DATA = {
+    "nom_prenom": "Awa Diallo",
+    "titre_poste": "Consultante Data",
+    "annees_experience": "6 ans d'expérience",
+    "a_propos": "Consultante data orientée produit.",
+    "competences": [{"categorie": "Data", "items": ["Python", "SQL", "Spark"]}],
+    "certifications": ["AWS Data Analytics"],
+    "langues": ["Français", "Anglais"],
+    "experiences": [{
+        "periode": "2019 – 2024", "entreprise": "ACME", "poste": "Data engineer",
+        "contexte": "Plateforme de données", "missions": ["Pipelines"], "realisations": ["Migration Spark"],
+        "environnement": "Python, Spark, Airflow",
+    }],
+    "formations": [{"annee": "2018", "diplome": "Master Informatique", "etablissement": "UCAD"}],
+    "projets_marquants": ["Data lake"],
+    "autres_references": [],
+}
+
+
+# ── Faux serveur Kimi ─────────────────────────────────────────────────────────
+def start_fake_kimi(latency: float) -> ThreadingHTTPServer:
+    body = json.dumps({
+        "choices": [{"message": {"content": json.dumps(FAKE_CV_DATA, ensure_ascii=False)}}],
+        "usage": {"prompt_tokens": 1200, "completion_tokens": 400},
+    }).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+def sample_cv() -> bytes:
+    """CV DOCX de test, généré avec python-docx."""
+    from docx import Document
+    doc = Document()
+    doc.add_heading("Awa Diallo", 0)
+    doc.add_paragraph("Consultante Data — awa.diallo@example.com — +221 77 000 00 00")
+    doc.add_heading("Expériences professionnelles", 1)
+    for year in range(2019, 2025):
+        doc.add_paragraph(f"{year} – {year + 1} : ACME, Data engineer. Pipelines Spark, Airflow, SQL.")
+    doc.add_heading("Formation", 1)
+    doc.add_paragraph("2018 : Master Informatique, UCAD")
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float:
+    """RSS cumulée d'un processus et de ses enfants directs (Linux, /proc)."""
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(p) for p in f.read().split()]
+    except OSError:
+        return float("nan")
+    total = 0
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+# ── Gunicorn ─────────────────────────────────────────────────────────────────
+def start_gunicorn(mode: str, port: int, kimi_url: str, args, workdir: str) -> subprocess.Popen:
+    env = dict(os.environ,
+               PORT=str(port),
+               GUNICORN_WORKER_CLASS=mode,
+               GUNICORN_THREADS=str(args.threads),
+               GUNICORN_WORKER_CONNECTIONS=str(args.threads),
+               NVIDIA_API_URL=kimi_url,
+               NVIDIA_API_KEY="bench",
+               KIMI_CACHE="0",
+               KIMI_MAX_CONCURRENCY=str(args.kimi_slots),
+               JOB_QUEUE_MAX=str(4 * max(args.levels)),
+               LOG_LEVEL="WARNING")
+    cmd = [sys.executable, "-m", "gunicorn", "--config", os.path.join(ROOT, "gunicorn_config.py"),
+           "--chdir", os.path.join(ROOT, "backend"), "--access-logfile", "/dev/null", "app:app"]
+    proc = subprocess.Popen(cmd, env=env, cwd=workdir,
+                            stdout=subprocess.DEVNULL, stderr=open(os.path.join(workdir, f"{mode}.log"), "w"))
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn ({mode}) s'est arrêté, voir {workdir}/{mode}.log")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok:
+                return proc
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"gunicorn ({mode}) ne répond pas")
+
+
+def run_level(port: int, cv: bytes, n: int, timeout: float) -> dict:
+    def one(_):
+        started = time.perf_counter()
+        try:
+            resp = requests.post(f"http://127.0.0.1:{port}/convert",
+                                 files={"cv_file": ("cv.docx", cv)}, timeout=timeout)
+            return resp.status_code, time.perf_counter() - started
+        except requests.RequestException:
+            return None, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        results = list(pool.map(one, range(n)))
+    elapsed = time.perf_counter() - started
+    ok = [t for status, t in results if status == 200]
+    return {
+        "n": n,
+        "ok": len(ok),
+        "errors": n - len(ok),
+        "p50": percentile(ok, 0.5),
+        "p95": percentile(ok, 0.95),
+        "wall": elapsed,
+        "throughput": len(ok) / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concurrence des modes de worker gunicorn")
+    parser.add_argument("--latency", type=float, default=2.0, help="Latence du faux Kimi par appel (s)")
+    parser.add_argument("--levels", default="1,8,32,64", help="Paliers de requêtes simultanées")
+    parser.add_argument("--modes", default="sync,gthread,gevent", help="Classes de worker à comparer")
+    parser.add_argument("--threads", type=int, default=64, help="GUNICORN_THREADS / WORKER_CONNECTIONS")
+    parser.add_argument("--kimi-slots", type=int, default=256, help="KIMI_MAX_CONCURRENCY du serveur testé")
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier")
+    args = parser.parse_args()
+    args.levels = [int(x) for x in args.levels.split(",")]
+
+    kimi = start_fake_kimi(args.latency)
+    kimi_url = f"http://127.0.0.1:{kimi.server_address[1]}/v1/chat/completions"
+    cv = sample_cv()
+    # Une conversion = 3 appels Kimi parallèles : ~1 latence de bout en bout
+    timeout = args.latency * (max(args.levels) + 10)
+    report = {}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in args.modes.split(","):
+            if mode == "gevent":
+                try:
+                    import gevent  # noqa: F401
+                except ImportError:
+                    print(f"{mode:8s} ignoré (pip install gevent)")
+                    continue
+            port = free_port()
+            proc = start_gunicorn(mode, port, kimi_url, args, workdir)
+            try:
+                report[mode] = []
+                for n in args.levels:
+                    result = run_level(port, cv, n, timeout)
+                    result["rss_mb"] = rss_mb(proc.pid)
+                    report[mode].append(result)
+                    print(f"{mode:8s} n={n:<4d} ok={result['ok']:<4d} err={result['errors']:<3d} "
+                          f"p50={result['p50']:6.2f}s p95={result['p95']:6.2f}s "
+                          f"débit={result['throughput']:6.2f}/s rss={result['rss_mb']:6.1f} Mo")
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+    # Capacité : plus grand palier servi sans erreur en moins de 2 latences (p95)
+    print()
+    for mode, results in report.items():
+        held = [r["n"] for r in results if not r["errors"] and r["p95"] <= 2 * args.latency + 1]
+        print(f"{mode:8s} conversions simultanées tenues : {max(held) if held else 0}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"latency": args.latency, "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
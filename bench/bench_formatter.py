@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+bench/bench_formatter.py — Benchmark de cv_formatter sur des CV synthétiques
+Utilisation : python bench_formatter.py [--profiles small,typical] [--runs 10]
+              [--engine docx|stream] [--no-skeleton] [--json résultats.json]
+              [--baseline fichier.json] [--threshold 0.3] [--save-baseline]
+
+Génère pour chaque profil un cv_data synthétique reproductible (graine
+`--seed`) : de 1 à 200 expériences, nombreuses catégories de compétences,
+longues listes de réalisations (voir PROFILES). Pour chaque profil :
+- durée totale de generate_maltem_cv (p50 / p95 / moyenne / meilleur rendu) ;
+- durée par étape, d'après les événements docx_* émis par cv_formatter
+  (document = clone du squelette, header, sections, competences, experiences,
+  save ; footer seulement avec --no-skeleton, le pied de page étant sinon
+  construit une fois dans le squelette) ;
+- pic de mémoire allouée pendant un rendu (tracemalloc, rendu à part) ;
+- taille du DOCX et de word/document.xml.
+
+Les résultats (JSON avec --json) sont comparés au fichier de référence
+(`--baseline`, défaut : formatter_baseline.json à côté de ce script, s'il
+existe) : code de sortie 1 si la durée du meilleur rendu ou le pic mémoire
+d'un profil dépasse la référence de plus de `--threshold` (30 % par défaut).
+Les durées dépendent de la machine : régénérer la référence sur la machine qui
+fait la comparaison avec --save-baseline.
+
+Exemple :
+  python bench_formatter.py --profiles small,typical --json formatter.json
+  python bench_formatter.py --save-baseline
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import random
+import zipfile
+import argparse
+import platform
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import docx  # noqa: E402
+from bench_concurrency import percentile  # noqa: E402
+import instrumentation  # noqa: E402
+import cv_formatter  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "formatter_baseline.json")
+
+# experiences, catégories de compétences × items, réalisations par expérience, rendus mesurés
+PROFILES = {
+    "small":   {"experiences": 1,   "categories": 2,  "items": 4,  "realisations": 3,  "runs": 50},
+    "typical": {"experiences": 10,  "categories": 6,  "items": 8,  "realisations": 6,  "runs": 20},
+    "large":   {"experiences": 50,  "categories": 12, "items": 10, "realisations": 12, "runs": 8},
+    "extreme": {"experiences": 200, "categories": 30, "items": 15, "realisations": 40, "runs": 3},
+}
+# Métriques comparées à la référence (meilleur rendu : bien moins sensible au bruit de la machine que p50)
+COMPARED = ("min_ms", "peak_kb")
+
+_WORDS = ("plateforme données migration cloud pilotage qualité architecture intégration continue "
+          "supervision sécurité performance référentiel client équipe livraison agile analyse "
+          "conception déploiement API microservices entrepôt tableau de bord gouvernance "
+          "automatisation tests revue budget risques fournisseurs conformité").split()
+_TOOLS = ("Python", "Java", "Spark", "Kafka", "Airflow", "SQL", "PostgreSQL", "Docker", "Kubernetes",
+          "Terraform", "AWS", "Azure", "GCP", "Power BI", "Tableau", "Jira", "Git", "Linux", "React", "Scala")
+_COMPANIES = ("Orange", "Sonatel", "Wave", "Ecobank", "Total", "ACME", "Attijariwafa", "MTN", "Jumia", "Société Générale")
+
+
+# ── Génération de cv_data ─────────────────────────────────────────────────────
+def synthetic_cv(experiences: int, categories: int, items: int, realisations: int, seed: int = 0) -> dict:
+    """cv_data synthétique, identique pour les mêmes paramètres et la même graine."""
+    rng = random.Random(f"{seed}:{experiences}:{categories}:{items}:{realisations}")
+
+    def sentence(lo=6, hi=18):
+        words = rng.choices(_WORDS, k=rng.randint(lo, hi))
+        return " ".join(words).capitalize()
+
+    def realisation():
+        if rng.random() < 0.7:                      # préfixe en gras jusqu'au « : » ou « – »
+            return f"{sentence(2, 5)} {rng.choice((':', '–'))} {sentence(8, 30)}"
+        return sentence(8, 30)
+
+    def experience(i):
+        year = 2024 - i
+        return {
+            "periode": f"{year - 1} – {year}",
+            "entreprise": rng.choice(_COMPANIES),
+            "poste": sentence(2, 4),
+            "direction": sentence(2, 5) if rng.random() < 0.3 else "",
+            "contexte": sentence(15, 40) if rng.random() < 0.5 else [sentence() for _ in range(rng.randint(1, 3))],
+            "objectifs": [sentence() for _ in range(rng.randint(0, 4))],
+            "missions": [],
+            "realisations": [realisation() for _ in range(realisations)],
+            "resultats": [sentence() for _ in range(rng.randint(0, 3))],
+            "environnement": ", ".join(rng.sample(_TOOLS, rng.randint(3, 10))),
+        }
+
+    return {
+        "nom_prenom": "Awa Diallo",
+        "titre_poste": "Consultante Data",
+        "annees_experience": f"{experiences} ans d'expérience",
+        "a_propos": [f"{sentence()} **{rng.choice(_TOOLS)}** {sentence(4, 10)}" for _ in range(4)],
+        "competences": [{"categorie": sentence(1, 3), "items": rng.choices(_TOOLS, k=items)}
+                        for _ in range(categories)],
+        "formations": [{"annee": str(2010 + i), "diplome": sentence(2, 5), "etablissement": rng.choice(_COMPANIES)}
+                       for i in range(3)],
+        "certifications": [f"{rng.choice(_TOOLS)} {sentence(1, 3)}" for _ in range(4)],
+        "langues": ["Français", "Anglais", "Wolof"],
+        "autres_references": [{"entreprise": rng.choice(_COMPANIES), "poste": sentence(2, 4)} for _ in range(3)],
+        "projets_marquants": [sentence() for _ in range(3)],
+        "experiences": [experience(i) for i in range(experiences)],
+    }
+
+
+# ── Mesure ────────────────────────────────────────────────────────────────────
+class StageTimer:
+    """Somme, pour le rendu en cours, des durées des événements docx_*_finished."""
+
+    def __init__(self):
+        self.current = {}
+
+    def __call__(self, event: str, fields: dict):
+        if event.startswith("docx_") and event.endswith("_finished") and "duration" in fields:
+            stage = event[len("docx_"):-len("_finished")]
+            self.current[stage] = self.current.get(stage, 0.0) + fields["duration"]
+
+
+def render(cv_data: dict) -> bytes:
+    buf = io.BytesIO()
+    cv_formatter.generate_maltem_cv(cv_data, buf)
+    return buf.getvalue()
+
+
+def measure(cv_data: dict, runs: int) -> dict:
+    data = render(cv_data)                          # caches, squelette, modèle du moteur en flux
+    timer = StageTimer()
+    instrumentation.add_listener(timer)
+    durations, stages = [], {}
+    try:
+        for _ in range(runs):
+            timer.current = {}
+            started = time.perf_counter()
+            render(cv_data)
+            durations.append(time.perf_counter() - started)
+            for stage, duration in timer.current.items():
+                stages.setdefault(stage, []).append(duration)
+    finally:
+        instrumentation.remove_listener(timer)
+
+    tracemalloc.start()
+    render(cv_data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        document_xml = z.getinfo("word/document.xml").file_size
+    return {
+        "runs": runs,
+        "p50_ms": round(percentile(durations, 0.5) * 1000, 2),
+        "p95_ms": round(percentile(durations, 0.95) * 1000, 2),
+        "mean_ms": round(sum(durations) / len(durations) * 1000, 2),
+        "min_ms": round(min(durations) * 1000, 2),
+        "stages_p50_ms": {stage: round(percentile(values, 0.5) * 1000, 2) for stage, values in stages.items()},
+        "peak_kb": round(peak / 1024, 1),
+        "docx_bytes": len(data),
+        "document_xml_bytes": document_xml,
+    }
+
+
+# ── Référence ─────────────────────────────────────────────────────────────────
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Régressions de plus de `threshold` par rapport à `baseline` (liste de messages)."""
+    for key in ("engine", "skeleton", "seed"):
+        if results["meta"][key] != baseline["meta"].get(key):
+            print(f"⚠ {key} différent de la référence ({results['meta'][key]} / {baseline['meta'].get(key)}) : "
+                  "mesures non comparées")
+            return []
+    regressions = []
+    for name, r in results["profiles"].items():
+        b = baseline["profiles"].get(name)
+        if b is None:
+            continue
+        if b.get("profile") != r["profile"]:
+            print(f"⚠ {name} : profil modifié depuis la référence, non comparé")
+            continue
+        for metric in COMPARED:
+            if b.get(metric) and r[metric] > b[metric] * (1 + threshold):
+                regressions.append(f"{name} {metric} : {r[metric]:.1f} contre {b[metric]:.1f} "
+                                   f"(+{(r[metric] / b[metric] - 1) * 100:.0f} %, seuil {threshold * 100:.0f} %)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de cv_formatter sur des CV synthétiques")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help=f"Profils mesurés (défaut : {','.join(PROFILES)})")
+    parser.add_argument("--runs", type=int, help="Rendus mesurés par profil (défaut : celui du profil)")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur de cv_data")
+    parser.add_argument("--engine", choices=("docx", "stream"), default=cv_formatter.DOCX_ENGINE,
+                        help="Moteur de rendu (défaut : DOCX_ENGINE)")
+    parser.add_argument("--no-skeleton", action="store_true", help="Reconstruire tout le document à chaque rendu")
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier")
+    parser.add_argument("--baseline", default=BASELINE, help="Fichier de référence (défaut : formatter_baseline.json)")
+    parser.add_argument("--threshold", type=float, default=0.3, help="Régression tolérée (défaut : 0.3 = 30 %%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistrer les résultats comme référence")
+    args = parser.parse_args()
+
+    if args.threshold < 0:
+        parser.error("--threshold doit être positif")
+    names = [name.strip() for name in args.profiles.split(",") if name.strip()]
+    unknown = [name for name in names if name not in PROFILES]
+    if unknown:
+        parser.error(f"profils inconnus : {', '.join(unknown)}")
+
+    cv_formatter.DOCX_ENGINE = args.engine
+    cv_formatter.DOCX_SKELETON = not args.no_skeleton
+    results = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "python_docx": docx.__version__,
+            "machine": platform.machine(),
+            "engine": args.engine,
+            "skeleton": not args.no_skeleton,
+            "seed": args.seed,
+        },
+        "profiles": {},
+    }
+
+    for name in names:
+        profile = {k: v for k, v in PROFILES[name].items() if k != "runs"}
+        cv_data = synthetic_cv(seed=args.seed, **profile)
+        r = measure(cv_data, args.runs or PROFILES[name]["runs"])
+        results["profiles"][name] = {"profile": profile, **r}
+        stages = "  ".join(f"{stage} {ms:.1f}" for stage, ms in r["stages_p50_ms"].items())
+        print(f"{name:8} {profile['experiences']:3} exp.  p50 {r['p50_ms']:8.1f}ms  p95 {r['p95_ms']:8.1f}ms  "
+              f"pic {r['peak_kb']:7.0f}Ko  docx {r['docx_bytes'] / 1024:6.0f}Ko  "
+              f"document.xml {r['document_xml_bytes'] / 1024:6.0f}Ko")
+        print(f"{'':8} étapes p50 (ms) : {stages}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Référence enregistrée : {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"RÉGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"Aucune régression au-delà de {args.threshold * 100:.0f} % (référence {os.path.basename(args.baseline)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+bench/bench_render.py — Génération DOCX avec et sans squelette précompilé
+Utilisation : python bench_render.py [--runs 50] [--experiences 8]
+
+Appelle generate_maltem_cv dans le processus courant, sans Kimi, sur un cv_data
+de test (celui du faux Kimi de bench_concurrency.py, avec `--experiences`
+expériences), en partant soit d'un clone du squelette (DOCX_SKELETON=1, défaut),
+soit d'un document reconstruit à chaque appel (DOCX_SKELETON=0). Pour chaque
+variante : durée p50 / p95 / moyenne, et pic de mémoire allouée pendant un
+rendu (tracemalloc).
+
+Exemple :
+  python bench_render.py --runs 100 --experiences 12 --json render.json
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from bench_concurrency import FAKE_CV_DATA, percentile  # noqa: E402
+import cv_formatter  # noqa: E402
+
+
+def sample_data(experiences: int) -> dict:
+    exp = FAKE_CV_DATA["experiences"][0]
+    return {**FAKE_CV_DATA, "experiences": [
+        {**exp, "periode": f"{2000 + i} – {2001 + i}", "entreprise": f"Client {i}"} for i in range(experiences)]}
+
+
+def render(cv_data: dict):
+    cv_formatter.generate_maltem_cv(cv_data, io.BytesIO())
+
+
+def measure(skeleton: bool, cv_data: dict, runs: int) -> dict:
+    cv_formatter.DOCX_SKELETON = skeleton
+    for _ in range(3):                      # imports, caches, construction du squelette
+        render(cv_data)
+
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        render(cv_data)
+        durations.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    render(cv_data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "skeleton": skeleton,
+        "p50_ms": percentile(durations, 0.5) * 1000,
+        "p95_ms": percentile(durations, 0.95) * 1000,
+        "mean_ms": sum(durations) / len(durations) * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de generate_maltem_cv avec / sans squelette")
+    parser.add_argument("--runs", type=int, default=50, help="Rendus mesurés par variante")
+    parser.add_argument("--experiences", type=int, default=8, help="Nombre d'expériences du CV de test")
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier")
+    args = parser.parse_args()
+
+    cv_data = sample_data(args.experiences)
+    results = [measure(skeleton, cv_data, args.runs) for skeleton in (False, True)]
+    for r in results:
+        print(f"squelette={'oui' if r['skeleton'] else 'non'}  p50 {r['p50_ms']:.1f}ms  "
+              f"p95 {r['p95_ms']:.1f}ms  moyenne {r['mean_ms']:.1f}ms  "
+              f"pic mémoire {r['peak_kb']:.0f}Ko")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"runs": args.runs, "experiences": args.experiences, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+bench/bench_startup.py — Démarrage de gunicorn avec et sans préchargement
+Utilisation : python bench_startup.py [--workers 4] [--runs 3]
+
+Lance gunicorn avec gunicorn_config.py, GUNICORN_PRELOAD=0 puis 1, devant le
+faux serveur Kimi de bench_concurrency.py. Pour chaque variante :
+- délai entre le lancement et la première réponse de /health ;
+- latence de la première conversion servie par chaque worker (POST /convert) ;
+- mémoire par worker : RSS (pages résidentes, partagées comprises) et PSS
+  (pages partagées divisées entre les processus qui les utilisent), lue dans
+  /proc/<pid>/smaps_rollup. Le préchargement fait baisser la PSS, pas la RSS.
+
+Exemple :
+  python bench_startup.py --workers 4 --runs 5 --json startup.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_concurrency import ROOT, free_port, percentile, sample_cv, start_fake_kimi  # noqa: E402
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+def children(pid: int) -> list:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_mb(pid: int) -> dict:
+    """RSS et PSS d'un processus (Mo), d'après /proc/<pid>/smaps_rollup."""
+    values = {"rss": float("nan"), "pss": float("nan")}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key = line.split(":", 1)[0]
+                if key in ("Rss", "Pss"):
+                    values[key.lower()] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return values
+
+
+def wait_workers(pid: int, n: int, timeout: float = 30) -> list:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        pids = children(pid)
+        if len(pids) >= n:
+            return pids
+        time.sleep(0.05)
+    return children(pid)
+
+
+# ── Mesure ───────────────────────────────────────────────────────────────────
+def run(preload: bool, args, kimi_url: str, cv: bytes, workdir: str) -> dict:
+    port = free_port()
+    env = dict(os.environ,
+               PORT=str(port),
+               GUNICORN_PRELOAD="1" if preload else "0",
+               GUNICORN_WORKERS=str(args.workers),
+               NVIDIA_API_URL=kimi_url,
+               NVIDIA_API_KEY="bench",
+               KIMI_CACHE="0",
+               LOG_LEVEL="WARNING")
+    cmd = [sys.executable, "-m", "gunicorn", "--config", os.path.join(ROOT, "gunicorn_config.py"),
+           "--chdir", os.path.join(ROOT, "backend"), "--access-logfile", "/dev/null", "app:app"]
+    log = os.path.join(workdir, f"preload{int(preload)}.log")
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=open(log, "w"))
+    try:
+        ready = None
+        while ready is None and time.perf_counter() - started < 60:
+            if proc.poll() is not None:
+                raise RuntimeError(f"gunicorn s'est arrêté, voir {log}")
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok:
+                    ready = time.perf_counter() - started
+            except requests.RequestException:
+                time.sleep(0.02)
+        if ready is None:
+            raise RuntimeError("gunicorn ne répond pas")
+        workers = wait_workers(proc.pid, args.workers)
+        # Tous les workers ont démarré : mémoire au repos
+        time.sleep(1)
+        idle = [memory_mb(p) for p in workers]
+
+        # Une conversion simultanée par worker : chacun sert (au moins en moyenne) sa première
+        def one(_):
+            t0 = time.perf_counter()
+            resp = requests.post(f"http://127.0.0.1:{port}/convert",
+                                 files={"cv_file": ("cv.docx", cv)}, timeout=120)
+            return resp.status_code, time.perf_counter() - t0
+
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            first = list(pool.map(one, range(args.workers)))
+        busy = [memory_mb(p) for p in workers]
+        master = memory_mb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    latencies = [t for status, t in first if status == 200]
+    return {
+        "preload": preload,
+        "ready_s": ready,
+        "first_convert_p50_s": percentile(latencies, 0.5),
+        "first_convert_max_s": max(latencies) if latencies else float("nan"),
+        "errors": len(first) - len(latencies),
+        "master_rss_mb": master["rss"],
+        "worker_rss_mb": sum(m["rss"] for m in idle) / len(idle),
+        "worker_pss_mb": sum(m["pss"] for m in idle) / len(idle),
+        "worker_rss_after_mb": sum(m["rss"] for m in busy) / len(busy),
+        "worker_pss_after_mb": sum(m["pss"] for m in busy) / len(busy),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage gunicorn avec / sans preload_app")
+    parser.add_argument("--workers", type=int, default=4, help="GUNICORN_WORKERS")
+    parser.add_argument("--runs", type=int, default=3, help="Démarrages par variante (médiane retenue)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latence du faux Kimi par appel (s)")
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier")
+    args = parser.parse_args()
+
+    kimi = start_fake_kimi(args.latency)
+    kimi_url = f"http://127.0.0.1:{kimi.server_address[1]}/v1/chat/completions"
+    cv = sample_cv()
+    report = {}
+    with tempfile.TemporaryDirectory(prefix="maltem_bench_") as workdir:
+        for preload in (False, True):
+            runs = [run(preload, args, kimi_url, cv, workdir) for _ in range(args.runs)]
+            # Médiane de chaque mesure sur les démarrages
+            summary = {key: percentile([r[key] for r in runs], 0.5) for key in runs[0] if key != "preload"}
+            report["preload" if preload else "no_preload"] = summary
+            print(f"preload={'on ' if preload else 'off'}  prêt {summary['ready_s']:.2f}s  "
+                  f"1re conversion p50 {summary['first_convert_p50_s'] * 1000:.0f}ms "
+                  f"max {summary['first_convert_max_s'] * 1000:.0f}ms  "
+                  f"worker RSS {summary['worker_rss_mb']:.1f}Mo PSS {summary['worker_pss_mb']:.1f}Mo  "
+                  f"(après conversion : RSS {summary['worker_rss_after_mb']:.1f}Mo "
+                  f"PSS {summary['worker_pss_after_mb']:.1f}Mo)")
+    kimi.shutdown()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"workers": args.workers, "runs": args.runs, "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+bench/check_stream_engine.py — Équivalence et débit du moteur en flux (DOCX_ENGINE=stream)
+Utilisation : python check_stream_engine.py [--batch 200] [--experiences 8] [--skip-bench]
+
+1. Équivalence : chaque CV de référence (ci-dessous) est généré par les deux
+   moteurs de cv_formatter. Le rendu python-docx sert de référence : mêmes
+   parties dans le paquet, parties fixes identiques à l'octet près, et
+   word/document.xml identique une fois canonisé (C14N : seules les déclarations
+   d'espace de noms répétées sur chaque bloc par le moteur en flux diffèrent).
+   Code de sortie 1 au premier écart.
+2. Débit : `--batch` rendus successifs par moteur (CV de `--experiences`
+   expériences), en documents par seconde, puis pic de mémoire d'un seul rendu
+   selon la longueur du CV : RSS maximal (ru_maxrss) d'un processus neuf par
+   moteur et par longueur, qui compte aussi les arbres lxml (libxml2, invisibles
+   pour tracemalloc). Le processus fait d'abord un rendu d'une expérience
+   (imports, squelette) ; le surcoût du grand CV est l'écart avec ce premier pic.
+
+Exemple :
+  python check_stream_engine.py --batch 500 --json stream.json
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import zipfile
+import argparse
+import resource
+import subprocess
+
+from lxml import etree
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from bench_concurrency import FAKE_CV_DATA  # noqa: E402
+from bench_render import sample_data  # noqa: E402
+import cv_formatter  # noqa: E402
+
+DOCUMENT_XML = "word/document.xml"
+
+# CV de référence : chaque section, les variantes de chaque champ, les cas vides
+CASES = {
+    "complet": FAKE_CV_DATA,
+    "nom_seul": {"nom_prenom": "Solo"},
+    "sans_experience": {**FAKE_CV_DATA, "experiences": []},
+    "variantes": {
+        **FAKE_CV_DATA,
+        "a_propos": ["**Data** engineer, 6 ans", "  ", "Orientée **produit** et **qualité**"],
+        "competences": [{"categorie": f"Catégorie {i}", "items": [f"Outil {i}.{j}" for j in range(i)]}
+                        for i in range(5)] + [{"categorie": "", "items": ["Sans catégorie"]}],
+        "formations": [{"annee": "", "diplome": "Licence", "etablissement": ""}, FAKE_CV_DATA["formations"][0]],
+        "autres_references": [{"entreprise": "Orange", "poste": "Architecte"}, {"entreprise": "Wave"}, "Sonatel"],
+        "projets_marquants": ["Data lake", 2024],
+        "experiences": [
+            {"periode": "2021 – 2024", "entreprise": "ACME", "poste": "Lead", "direction": "Direction data",
+             "contexte": ["Refonte", "Migration cloud"], "objectifs": ["Fiabiliser"],
+             "realisations": ["Optimisation JVM : profilage", "Airflow – orchestration", "Sans séparateur"],
+             "resultats": ["-30 % de coûts"], "environnement": ["Python", "Spark"]},
+            {"periode": "", "entreprise": "", "missions": ["Audit : revue de code"]},
+            {"periode": "2018", "entreprise": "Beta & Co <test>"},
+        ],
+    },
+    "20_experiences": sample_data(20),
+}
+
+
+def render(engine: str, cv_data: dict) -> bytes:
+    cv_formatter.DOCX_ENGINE = engine
+    buf = io.BytesIO()
+    cv_formatter.generate_maltem_cv(cv_data, buf)
+    return buf.getvalue()
+
+
+def canonical(xml: bytes) -> bytes:
+    return etree.tostring(etree.fromstring(xml), method="c14n")
+
+
+def compare(reference: bytes, candidate: bytes) -> list:
+    """Écarts entre deux paquets DOCX (liste vide si équivalents)."""
+    ref, cand = zipfile.ZipFile(io.BytesIO(reference)), zipfile.ZipFile(io.BytesIO(candidate))
+    errors = []
+    if cand.testzip() is not None:
+        errors.append(f"ZIP corrompu : {cand.testzip()}")
+    missing = set(ref.namelist()) ^ set(cand.namelist())
+    if missing:
+        errors.append(f"parties différentes : {sorted(missing)}")
+    for name in sorted(set(ref.namelist()) & set(cand.namelist())):
+        a, b = ref.read(name), cand.read(name)
+        if name == DOCUMENT_XML:
+            a, b = canonical(a), canonical(b)
+        if a != b:
+            at = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+            errors.append(f"{name} diffère à l'octet {at} : {a[at - 40:at + 40]!r} / {b[at - 40:at + 40]!r}")
+    return errors
+
+
+def check() -> bool:
+    ok = True
+    for name, cv_data in CASES.items():
+        errors = compare(render("docx", cv_data), render("stream", cv_data))
+        print(f"{name:18} {'identique' if not errors else 'ÉCART'}")
+        for error in errors:
+            print(f"    {error}")
+        ok = ok and not errors
+    return ok
+
+
+def throughput(engine: str, cv_data: dict, batch: int) -> float:
+    render(engine, cv_data)
+    started = time.perf_counter()
+    for _ in range(batch):
+        render(engine, cv_data)
+    return batch / (time.perf_counter() - started)
+
+
+def _maxrss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss       # Ko sous Linux
+
+
+def _peak_rss(engine: str, experiences: int):
+    """Mesure dans le processus courant (appelé par peak_rss dans un processus neuf)."""
+    render(engine, sample_data(1))
+    base = _maxrss_kb()
+    render(engine, sample_data(experiences))
+    print(json.dumps({"base_kb": base, "peak_kb": _maxrss_kb()}))
+
+
+def peak_rss(engine: str, experiences: int) -> dict:
+    """RSS maximal d'un rendu de `experiences` expériences, dans un processus neuf."""
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--peak-rss", engine, str(experiences)],
+                         check=True, capture_output=True, text=True).stdout
+    data = json.loads(out.strip().splitlines()[-1])
+    data["extra_kb"] = data["peak_kb"] - data["base_kb"]
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Équivalence et débit des moteurs DOCX de cv_formatter")
+    parser.add_argument("--batch", type=int, default=200, help="Rendus mesurés par moteur")
+    parser.add_argument("--experiences", type=int, default=8, help="Expériences du CV de la mesure de débit")
+    parser.add_argument("--skip-bench", action="store_true", help="Vérifier l'équivalence seulement")
+    parser.add_argument("--json", help="Écrit les mesures dans ce fichier")
+    parser.add_argument("--peak-rss", nargs=2, metavar=("MOTEUR", "EXPERIENCES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.peak_rss:
+        _peak_rss(args.peak_rss[0], int(args.peak_rss[1]))
+        return
+
+    # Sous Linux, le ru_maxrss d'un fils part du RSS du parent au fork : les
+    # processus de mesure sont lancés avant tout rendu dans celui-ci
+    peaks = {} if args.skip_bench else {
+        engine: {n: peak_rss(engine, n) for n in (1, 20, 200)} for engine in ("docx", "stream")}
+
+    if not check():
+        sys.exit(1)
+    if args.skip_bench:
+        return
+
+    cv_data = sample_data(args.experiences)
+    results = {"batch": args.batch, "experiences": args.experiences, "engines": {}}
+    for engine in ("docx", "stream"):
+        rate = throughput(engine, cv_data, args.batch)
+        results["engines"][engine] = {"docs_per_s": rate, "peak_rss": peaks[engine]}
+        print(f"moteur={engine:6}  {rate:6.1f} docs/s  RSS max "
+              + "  ".join(f"{n} exp. {p['peak_kb'] / 1024:.1f}Mo (+{p['extra_kb'] / 1024:.1f})"
+                          for n, p in peaks[engine].items()))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
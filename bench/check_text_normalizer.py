@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+bench/check_text_normalizer.py — Non-régression du nettoyage de texte (text_normalizer)
+Utilisation : python check_text_normalizer.py
+
+Chaque cas ci-dessous est un texte brut (pages séparées par PAGE_BREAK) et les
+lignes qui doivent survivre au nettoyage, ou disparaître. Code de sortie 1 au
+premier écart.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from cv_parser import PAGE_BREAK  # noqa: E402
+from text_normalizer import normalize_cv_text  # noqa: E402
+
+PERIODS = ["2021 - 2024", "2019 - 2021", "2017 - 2019", "2015 - 2017", "2013 - 2015"]
+
+
+def _experiences(periods):
+    return [line for period in periods for line in (period, "ACME – Développeur", "Refonte du SI", "")]
+
+
+# (nom, texte, lignes attendues, lignes absentes)
+CASES = [
+    # Une période en bord de page sur deux pages ne fait pas des périodes un en-tête répété
+    ("periodes_multipages",
+     PAGE_BREAK.join([
+         "\n".join(["Jean Dupont", "Page 1 sur 2", "Expériences", ""] + _experiences(PERIODS[:3]) + ["2015 - 2017"]),
+         "\n".join(["Jean Dupont", "Page 2 sur 2", "2015 - 2017"] + _experiences(PERIODS[3:]) + ["2013 - 2015"]),
+     ]),
+     PERIODS, ["Page 1 sur 2", "Page 2 sur 2"]),
+    # En-tête répété : gardé une fois, y compris sa copie au milieu d'une page
+    ("entete_repete",
+     PAGE_BREAK.join([
+         "Jean Dupont\nCV confidentiel\nProfil\nData engineer\nCV confidentiel rappel\nFin page 1",
+         "Jean Dupont\nCV confidentiel\nSuite\nProjet\nAutre\nFin page 2",
+     ]),
+     ["Jean Dupont", "CV confidentiel", "Data engineer", "CV confidentiel rappel"], []),
+    # Nombre seul au milieu d'une page : donnée, pas numéro de page
+    ("nombre_dans_le_corps",
+     "Titre\nA\nB\nC\nEffectif\n12\nD\nE\nF\nG\n3",
+     ["12"], ["3"]),
+    ("cesures",
+     "Janvier 2019-\naujourd'hui\nFront-\nend React\ndévelop­\npement",
+     ["Janvier 2019-", "aujourd'hui", "Front-end React", "développement"], []),
+]
+
+
+def check() -> bool:
+    ok = True
+    for name, text, kept, dropped in CASES:
+        lines = normalize_cv_text(text).split("\n")
+        errors = [f"manquante : {l!r}" for l in kept if l not in lines]
+        errors += [f"non retirée : {l!r}" for l in dropped if l in lines]
+        print(f"{name:22} {'ok' if not errors else 'ÉCART'}")
+        for error in errors:
+            print(f"    {error}")
+        ok = ok and not errors
+    return ok
+
+
+def main():
+    if not check():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,17 @@
 """
 cli/convert.py — CLI Maltem CV Converter
 Utilisation : python convert.py <chemin_cv> [--output <dossier_sortie>]
+              python convert.py --from-json <cv_data.json> [--output <dossier_sortie>]
 
 Exemple :
   python convert.py mon_cv.pdf
   python convert.py mon_cv.docx --output ./output/
+  python convert.py --from-json cv_extrait.json
 """
 
 import os
 import sys
+import time
 import argparse
 import json
 
@@ -17,8 +20,11 @@ import json
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
 from cv_parser import extract_cv_text
+from text_normalizer import normalize_cv_text
 from kimi_extractor import structure_cv_with_kimi
 from cv_formatter import generate_maltem_cv
+from cv_schema import validate_cv_data
+import instrumentation
 
 
 # ── Couleurs ANSI pour le terminal ────────────────────────────────────────────
@@ -51,6 +57,20 @@ def error(msg):
     print(f"{RED}✗ ERREUR:{RESET} {msg}", file=sys.stderr)
 
 
+def print_kimi_call(event, fields):
+    """Affiche les mesures de chaque appel Kimi (mode verbose)."""
+    if event != "kimi_call_finished" or fields.get("error"):
+        return
+    if fields.get("cached"):
+        print(f"  {YELLOW}kimi:{fields['name']}{RESET} servi depuis le cache")
+        return
+    ttft = fields.get("ttft")
+    tps = fields.get("tokens_per_s")
+    print(f"  {YELLOW}kimi:{fields['name']}{RESET} {fields['duration']:.1f}s"
+          + (f" | 1er token {ttft:.1f}s" if ttft is not None else "")
+          + (f" | {fields['completion_tokens']} tokens, {tps:.0f} tok/s" if tps else ""))
+
+
 def check_env():
     """Vérifie que la clé API NVIDIA est configurée."""
     key = os.environ.get("NVIDIA_API_KEY", "")
@@ -62,6 +82,37 @@ def check_env():
         sys.exit(1)
 
 
+def render_from_json(json_file: str, output_dir: str):
+    """Régénère le DOCX depuis un cv_data sauvegardé (--json), sans extraction ni appel Kimi."""
+    json_path = os.path.abspath(json_file)
+    print(f"{BOLD}Données source :{RESET} {json_path}")
+    print(f"{BOLD}Dossier sortie :{RESET} {output_dir}\n")
+
+    step(1, 2, "Lecture et validation du JSON")
+    try:
+        with open(json_path, encoding="utf-8") as f:
+            cv_data = validate_cv_data(json.load(f))
+        success(f"Données valides : {cv_data['nom_prenom'] or '—'} | {cv_data['titre_poste'] or '—'}")
+    except OSError as e:
+        error(f"Lecture impossible : {e}")
+        sys.exit(1)
+    except ValueError as e:
+        error(f"JSON invalide : {e}")
+        sys.exit(1)
+
+    step(2, 2, "Génération du CV au format Maltem Africa")
+    try:
+        started = time.perf_counter()
+        nom_clean = (cv_data["nom_prenom"] or "CV").replace(" ", "_").replace("/", "_")
+        output_path = os.path.join(output_dir, f"CV_Maltem_{nom_clean}.docx")
+        generate_maltem_cv(cv_data, output_path)
+        success(f"CV généré en {(time.perf_counter() - started) * 1000:.0f} ms")
+    except Exception as e:
+        error(f"Échec de la génération DOCX : {e}")
+        sys.exit(1)
+    return output_path
+
+
 def main():
     banner()
 
@@ -73,14 +124,29 @@ Exemples :
   python convert.py mon_cv.pdf
   python convert.py mon_cv.docx --output ./resultats/
   python convert.py mon_cv.pdf --json cv_extrait.json
+  python convert.py mon_cv.pdf --no-cache
+  python convert.py --from-json cv_extrait.json
         """
     )
-    parser.add_argument("input", help="Chemin vers le CV source (PDF ou DOCX)")
+    parser.add_argument("input", nargs="?", help="Chemin vers le CV source (PDF ou DOCX)")
     parser.add_argument("--output", "-o", default=".", help="Dossier de sortie (défaut : répertoire courant)")
     parser.add_argument("--json", "-j", help="Sauvegarder les données extraites en JSON (optionnel)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Afficher les données extraites")
+    parser.add_argument("--no-cache", action="store_true", help="Ignorer le cache des réponses Kimi (force de nouveaux appels)")
+    parser.add_argument("--from-json", metavar="JSON",
+                        help="Générer le DOCX depuis un JSON sauvegardé avec --json (ni extraction ni appel Kimi)")
 
     args = parser.parse_args()
+    if bool(args.input) == bool(args.from_json):
+        parser.error("indiquez soit un CV source, soit --from-json")
+
+    output_dir = os.path.abspath(args.output)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if args.from_json:
+        output_path = render_from_json(args.from_json, output_dir)
+        print(f"\n{BOLD}Fichier généré :{RESET}\n  {GREEN}{output_path}{RESET}\n")
+        return
 
     # ── Vérifications ────────────────────────────────────────────────────────
     check_env()
@@ -95,9 +161,6 @@ Exemples :
         error(f"Format non supporté : {ext}. Utilisez PDF ou DOCX.")
         sys.exit(1)
 
-    output_dir = os.path.abspath(args.output)
-    os.makedirs(output_dir, exist_ok=True)
-
     print(f"{BOLD}Fichier source :{RESET} {input_path}")
     print(f"{BOLD}Dossier sortie :{RESET} {output_dir}\n")
 
@@ -106,22 +169,29 @@ Exemples :
     # ── Étape 1 : Extraction ─────────────────────────────────────────────────
     step(1, TOTAL_STEPS, "Extraction du texte du CV")
     try:
-        raw_text = extract_cv_text(input_path)
+        extracted = extract_cv_text(input_path)
+        raw_text = normalize_cv_text(extracted)
         if not raw_text.strip():
             error("Aucun texte extrait. Le fichier semble vide ou protégé.")
             sys.exit(1)
-        success(f"Texte extrait ({len(raw_text)} caractères)")
+        success(f"Texte extrait ({len(raw_text)} caractères, {len(extracted)} avant nettoyage)")
     except Exception as e:
         error(f"Échec de l'extraction : {e}")
         sys.exit(1)
 
     # ── Étape 2 : Analyse IA ─────────────────────────────────────────────────
     step(2, TOTAL_STEPS, "Analyse et structuration avec Kimi AI (NVIDIA)")
+    if args.verbose:
+        instrumentation.add_listener(print_kimi_call)
     try:
-        cv_data = structure_cv_with_kimi(raw_text)
+        with instrumentation.conversion() as stats:
+            cv_data = structure_cv_with_kimi(raw_text, use_cache=not args.no_cache)
         nom = cv_data.get("nom_prenom", "—")
         poste = cv_data.get("titre_poste", "—")
         success(f"CV analysé : {nom} | {poste}")
+        if args.verbose:
+            print(f"  {YELLOW}tokens:{RESET} {stats.prompt_tokens} prompt + {stats.completion_tokens} complétion"
+                  f" ({stats.kimi_calls} appels, {stats.cached_calls} depuis le cache)")
     except Exception as e:
         error(f"Échec de l'analyse Kimi : {e}")
         sys.exit(1)
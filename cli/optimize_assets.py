@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+cli/optimize_assets.py — Recompression des images intégrées dans chaque CV
+Utilisation : python optimize_assets.py [--dpi 220] [--colors 128] [--dry-run]
+
+Les images du formateur (logo, décorations) sont copiées telles quelles dans
+chaque DOCX généré. Pour chacune (liste et largeur affichée : ASSET_WIDTHS de
+cv_formatter.py) :
+- redimensionnement à la résolution utile, `--dpi` points par pouce à sa largeur
+  affichée (220 ppp : résolution d'impression retenue par Word) ;
+- passage en PNG à palette (`--colors` couleurs au plus, transparence conservée)
+  et compression maximale.
+Le fichier n'est remplacé que si le résultat est plus petit : relancer le
+script sur des images déjà optimisées ne change rien. Nécessite Pillow.
+
+Exemple :
+  python optimize_assets.py --dry-run
+  python optimize_assets.py --dpi 300
+"""
+
+import os
+import sys
+import io
+import argparse
+
+from PIL import Image
+
+# Ajouter le backend au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from cv_formatter import ASSET_WIDTHS
+
+EMU_PER_INCH = 914400
+
+
+def optimize(path: str, width_emu: int, dpi: int, colors: int) -> bytes:
+    """PNG optimisé pour une largeur affichée de `width_emu` à `dpi` ppp."""
+    with Image.open(path) as im:
+        im.load()
+    target = max(1, round(width_emu / EMU_PER_INCH * dpi))
+    if im.width > target:
+        height = max(1, round(im.height * target / im.width))
+        im = im.convert("RGBA").resize((target, height), Image.LANCZOS)
+    if im.mode == "RGBA" and im.getextrema()[3][0] == 255:
+        im = im.convert("RGB")          # canal alpha entièrement opaque : inutile
+    if im.mode == "RGBA":
+        im = im.quantize(colors, method=Image.Quantize.FASTOCTREE)
+    elif im.mode != "P":
+        im = im.convert("RGB").quantize(colors, method=Image.Quantize.MEDIANCUT)
+    buf = io.BytesIO()
+    im.save(buf, "PNG", optimize=True, dpi=(dpi, dpi))
+    return buf.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimise les images intégrées aux CV générés")
+    parser.add_argument("--dpi", type=int, default=220, help="Résolution cible à la taille affichée (défaut : 220)")
+    parser.add_argument("--colors", type=int, default=128, help="Couleurs maximum de la palette (défaut : 128)")
+    parser.add_argument("--dry-run", action="store_true", help="Afficher les gains sans modifier les fichiers")
+    args = parser.parse_args()
+
+    total_before = total_after = 0
+    for path, width in ASSET_WIDTHS.items():
+        before = os.path.getsize(path)
+        data = optimize(path, width, args.dpi, args.colors)
+        after = min(before, len(data))
+        with Image.open(io.BytesIO(data)) as im:
+            size = f"{im.width}x{im.height}"
+        if len(data) < before:
+            status = "optimisée" if not args.dry_run else "à optimiser"
+            if not args.dry_run:
+                with open(path, "wb") as f:
+                    f.write(data)
+        else:
+            status = "déjà optimale"
+        total_before += before
+        total_after += after
+        print(f"{os.path.basename(path):32} {before / 1024:6.1f} Ko → {after / 1024:6.1f} Ko  ({size}, {status})")
+    print(f"{'Total par CV':32} {total_before / 1024:6.1f} Ko → {total_after / 1024:6.1f} Ko")
+
+
+if __name__ == "__main__":
+    main()
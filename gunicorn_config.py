@@ -1,4 +1,7 @@
+import gc
 import os
+import shutil
+import tempfile
 
 # Timeout de 6 minutes (360s) pour gérer les 3 appels API
 timeout = 360
@@ -6,8 +9,53 @@ graceful_timeout = 360
 keepalive = 5
 
 # Worker configuration
-workers = 1
-worker_class = "sync"
+# Une conversion passe l'essentiel de son temps à attendre l'API Kimi : plutôt que
+# multiplier les processus, chaque worker sert de nombreuses requêtes à la fois.
+#   gthread (défaut) : un thread par requête, `threads` requêtes simultanées par worker
+#   gevent           : greenlets (pip install gevent) ; extraction PDF et génération DOCX
+#                      partent dans le pool de vrais threads du hub (voir pipeline.py)
+#   sync             : ancien mode, une requête à la fois par worker
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "200"))
+
+# Nombre de conversions exécutées en même temps par worker : aligné sur la capacité
+# du mode choisi, sauf si JOB_WORKERS est fixé explicitement
+if worker_class == "gthread":
+    os.environ.setdefault("JOB_WORKERS", str(threads))
+elif worker_class == "gevent":
+    os.environ.setdefault("JOB_WORKERS", str(worker_connections))
+
+# Préchargement : l'application (et son préchauffage, voir backend/warmup.py) est
+# importée une fois par le master, puis partagée par copie à l'écriture entre
+# les workers. Sessions HTTP, pools, connexions SQLite et threads de ménage sont
+# créés paresseusement par processus, donc sûrs après le fork.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+
+# Métriques Prometheus partagées entre workers (voir backend/metrics.py) : chaque
+# processus écrit dans ce dossier, vidé au démarrage du master
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "maltem_prometheus"))
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def when_ready(server):
+    # Objets chargés avant le fork hors du suivi du GC : ses passages ne
+    # réécrivent plus leurs en-têtes, les pages restent partagées
+    if preload_app:
+        gc.collect()
+        gc.freeze()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
 
 # Bind
 bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"